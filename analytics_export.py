@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Tuple
+
+# column types of each table as written to the files; scenario and week are partition keys.
+# Fixed schemas keep every file of a dataset compatible, even when a batch has no events.
+COLUMNS = {
+    "decisions": (
+        ("session_id", "string"), ("game_id", "string"), ("department", "string"), ("decision", "string"),
+        ("recommendations_version", "int64"), ("seed", "int64"), ("agents", "int64"), ("violations", "int64"),
+        ("events", "list<string>"), ("committed_at", "float64")
+    ),
+    "recommendations": (
+        ("session_id", "string"), ("game_id", "string"), ("agent", "string"), ("metric", "string"), ("change", "float64")
+    ),
+    "applied_changes": (
+        ("session_id", "string"), ("game_id", "string"), ("metric", "string"),
+        ("requested", "float64"), ("actual", "float64"), ("uncertainty", "float64")
+    ),
+    "weekly_metrics": (
+        ("session_id", "string"), ("game_id", "string"), ("department", "string"), ("metric", "string"), ("value", "float64")
+    )
+}
+TABLES = tuple(COLUMNS)
+
+
+def _load_pyarrow():
+    # pyarrow takes a while to import, only pay for it in the writer thread
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:  # pyarrow is optional, batches fall back to json lines
+        return None
+    return pyarrow
+
+
+def _schema(pyarrow, table: str):
+    types = {
+        "string": pyarrow.string(),
+        "int64": pyarrow.int64(),
+        "float64": pyarrow.float64(),
+        "list<string>": pyarrow.list_(pyarrow.string())
+    }
+    return pyarrow.schema([(name, types[kind]) for name, kind in COLUMNS[table]])
+
+
+class AnalyticsExporter:
+    """Append committed weeks of every session to columnar datasets for cross-game analysis.
+
+    Each commit becomes rows in four tables: decisions (one per committed
+    week), recommendations (agent x metric), applied_changes (requested and
+    sampled change per metric) and weekly_metrics (the week's resulting
+    values). Rows are buffered in memory and a background thread writes them
+    in batches, so a commit only pays for building a few dicts. Files land in
+    hive-style partitions, `<root>/<table>/scenario=<name>/week=<n>/`, as
+    Parquet when pyarrow is installed and JSON lines otherwise; read them
+    with `pyarrow.dataset.dataset(path, partitioning="hive")`.
+    """
+
+    def __init__(self, root: str, batch_rows: int = 5000, flush_interval: float = 10.0):
+        self.root = root
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self._rows: Dict[str, List[Dict[str, Any]]] = {table: [] for table in TABLES}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._writer: Optional[threading.Thread] = None
+
+    def record_week(self, simulation, week: int, decision: Dict[str, Any], commit: Dict[str, Any]) -> None:
+        """Buffer the rows of one committed week; never blocks on disk"""
+        base = {
+            "scenario": simulation.scenario_name,
+            "week": week,
+            "session_id": simulation.session_id,
+            "game_id": simulation.game_id
+        }
+        department = simulation.current_department.upper()
+        committed_at = time.time()
+        rows = {table: [] for table in TABLES}
+
+        rows["decisions"].append({
+            **base,
+            "department": department,
+            "decision": decision.get("decision"),
+            "recommendations_version": decision.get("recommendations_version", 1),
+            "seed": simulation.seed,
+            "agents": len(decision.get("recommendations") or {}),
+            "violations": len(commit["violations"]),
+            "events": [event["event"] for event in commit["events"]],
+            "committed_at": committed_at
+        })
+        for agent, changes in (decision.get("recommendations") or {}).items():
+            for metric, change in changes.items():
+                rows["recommendations"].append({**base, "agent": agent, "metric": metric, "change": float(change)})
+        for category, metrics in commit["actual_changes"].items():
+            for metric, (actual, uncertainty) in metrics.items():
+                rows["applied_changes"].append({
+                    **base,
+                    "metric": f"{category}.{metric}",
+                    "requested": float(commit["changes"].get(f"{category}.{metric}", 0)),
+                    "actual": float(actual),
+                    "uncertainty": float(uncertainty)
+                })
+        metrics = simulation.metrics_manager.get_week_metrics(week)
+        for metric, value in metrics.get("core", {}).items():
+            rows["weekly_metrics"].append({**base, "department": "", "metric": f"core.{metric}", "value": float(value)})
+        for dept, values in metrics.get("department", {}).items():
+            for metric, value in values.items():
+                rows["weekly_metrics"].append({**base, "department": dept, "metric": f"department.{metric}", "value": float(value)})
+
+        with self._lock:
+            for table, table_rows in rows.items():
+                self._rows[table].extend(table_rows)
+                self._pending += len(table_rows)
+            full = self._pending >= self.batch_rows
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="analytics-export", daemon=True)
+                self._writer.start()
+        if full:
+            self._wakeup.set()
+
+    def _take(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            batch = self._rows
+            self._rows = {table: [] for table in TABLES}
+            self._pending = 0
+        return batch
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write everything buffered so far"""
+        batch = self._take()
+        pyarrow = _load_pyarrow()
+        for table, rows in batch.items():
+            partitions: Dict[Tuple[str, int], List[Dict[str, Any]]] = defaultdict(list)
+            for row in rows:
+                row = dict(row)
+                # partition values live in the directory names, not in the files
+                partitions[(row.pop("scenario"), row.pop("week"))].append(row)
+            for (scenario, week), part in partitions.items():
+                try:
+                    self._write(pyarrow, table, scenario, week, part)
+                except Exception as e:
+                    print(f"Warning: could not export {len(part)} {table} rows: {str(e)}")
+
+    def _write(self, pyarrow, table: str, scenario: str, week: int, rows: List[Dict[str, Any]]) -> None:
+        directory = os.path.join(self.root, table, f"scenario={scenario}", f"week={week}")
+        os.makedirs(directory, exist_ok=True)
+        name = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        if pyarrow is not None:
+            pyarrow.parquet.write_table(
+                pyarrow.Table.from_pylist(rows, schema=_schema(pyarrow, table)),
+                os.path.join(directory, f"{name}.parquet")
+            )
+            return
+        with open(os.path.join(directory, f"{name}.jsonl"), 'w') as f:
+            for row in rows:
+                f.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        """Stop the writer and write what is left, called on shutdown"""
+        self._closed = True
+        self._wakeup.set()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+
+
+def create_analytics_exporter(target: Optional[str] = None) -> Optional[AnalyticsExporter]:
+    """Build the exporter for a dataset directory, or None when analytics export is off"""
+    target = target or os.getenv("SIMULATION_ANALYTICS_DIR")
+    if not target:
+        return None
+    return AnalyticsExporter(
+        target,
+        batch_rows=int(os.getenv("SIMULATION_ANALYTICS_BATCH_ROWS", "5000")),
+        flush_interval=float(os.getenv("SIMULATION_ANALYTICS_FLUSH_SECONDS", "10"))
+    )
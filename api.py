@@ -1,12 +1,198 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from typing import Dict, List, Any, Optional, Literal
 from pydantic import BaseModel
+import asyncio
+import hashlib
+import json
+import os
+from contextlib import asynccontextmanager
+from copy import deepcopy
+from functools import partial
 import uvicorn
-from simulation_manager import SimulationManager
+from simulation_manager import SimulationManager, preload_agent_modules
+from metrics_manager import MAX_SEED, valid_seed
+from session_store import create_session_store, SessionLockTimeout, RedisSessionStore, valid_session_id
+from job_queue import InvalidCallback, JobQueue, JobQueueFull, RedisJobRecords
+from scenario_catalog import DEFAULT_SCENARIO, UnknownScenario, get_catalog
+from recommendation_tracker import merge_recommendations
+from recommendation_versions import RecommendationVersions
+from analytics_export import create_analytics_exporter
+from reports import EXTENSIONS, FORMATS, iter_report, session_sections
+from serialization import SerializedRoute, dumps, encode_response
 
-app = FastAPI(title="Business Simulation API", version="1.0.0")
+DEFAULT_SESSION_ID = "default"
+MAX_BATCH_ITEMS = 500
 
-simulation = SimulationManager()
+# session resources are revalidated on every use: their URLs stay the same when a new game starts
+REVALIDATE = "private, no-cache"
+
+def warmup() -> None:
+    """Pay the agent framework import and agent construction cost before taking traffic"""
+    try:
+        preload_agent_modules()
+        simulations.setdefault(DEFAULT_SESSION_ID, get_simulation(DEFAULT_SESSION_ID)).agents
+    except Exception as e:
+        print(f"Warning: warmup failed, agents will be built on first use: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # workers accept traffic right away unless warmup is requested explicitly
+    if os.getenv("SIMULATION_WARMUP", "0") == "1":
+        await asyncio.to_thread(warmup)
+    yield
+    if analytics is not None:
+        await asyncio.to_thread(analytics.close)
+
+app = FastAPI(title="Business Simulation API", version="1.0.0", lifespan=lifespan)
+# routes below encode their trusted dicts once, as json or msgpack, see serialization.py
+app.router.route_class = SerializedRoute
+# action and status responses repeat the full metrics and challenge, json shrinks well;
+# level 6 keeps most of the ratio of the default 9 at a fraction of the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
+
+# compile and validate the default scenario at startup so malformed data never reaches a request
+get_catalog().get(DEFAULT_SCENARIO)
+
+# the store is the source of truth, simulations below are only a per-worker cache
+session_store = create_session_store()
+# committed weeks of every session, written in batches for cross-game analysis when configured
+analytics = create_analytics_exporter()
+simulations: Dict[str, SimulationManager] = {}
+# sessions with a locked operation running on this worker, see get_simulation
+busy_sessions: Dict[str, int] = {}
+
+# long-running analyses can run in the background, job records are shared through redis when available
+job_queue = JobQueue(
+    workers=int(os.getenv("SIMULATION_JOB_WORKERS", "4")),
+    records=RedisJobRecords(session_store.client) if isinstance(session_store, RedisSessionStore) else None,
+    # comma-separated hosts allowed to receive callbacks; without it any public http(s) host is
+    callback_hosts=[host.strip() for host in os.getenv("SIMULATION_CALLBACK_HOSTS", "").split(",") if host.strip()]
+)
+
+def check_session_id(session_id: str) -> None:
+    if not valid_session_id(session_id):
+        raise HTTPException(status_code=422, detail="session_id must be 1 to 64 letters, digits, '_' or '-'")
+
+def new_simulation(session_id: str) -> SimulationManager:
+    return SimulationManager(session_id=session_id, session_store=session_store, analytics=analytics)
+
+def load_simulation(session_id: str) -> SimulationManager:
+    """A separate simulation restored from the last saved state of a session"""
+    simulation = new_simulation(session_id)
+    state = session_store.load(session_id)
+    if state:
+        simulation.restore_state(state)
+    return simulation
+
+def get_simulation(session_id: str = DEFAULT_SESSION_ID, locked: bool = False) -> SimulationManager:
+    """Return the simulation for a session, refreshed from the session store.
+
+    Handlers holding the session lock pass `locked=True` and get the cached
+    instance, which they change and save. Read-only handlers never refresh an
+    instance a locked handler on this worker is still using: they get a
+    separate copy of the last saved state instead. Only locked handlers add
+    sessions to the cache, and a session a read-only request names that was
+    never saved is answered from a throwaway fresh simulation.
+    """
+    check_session_id(session_id)
+    simulation = simulations.get(session_id)
+    if not locked and busy_sessions.get(session_id):
+        return load_simulation(session_id)
+    # comparing stamps keeps polls of an unchanged session from reading and decoding the snapshot
+    stamp = session_store.load_stamp(session_id)
+    if simulation is None:
+        simulation = new_simulation(session_id)
+        if stamp is None and not locked:
+            return simulation
+        simulations[session_id] = simulation
+    if stamp is not None and stamp != simulation.stamp:
+        state = session_store.load(session_id)
+        if state:
+            simulation.restore_state(state)
+    return simulation
+
+@asynccontextmanager
+async def session_lock(session_id: str):
+    """Serialize mutating requests on one session across all workers"""
+    check_session_id(session_id)
+    async with session_store.lock(session_id):
+        busy_sessions[session_id] = busy_sessions.get(session_id, 0) + 1
+        try:
+            yield
+        except BaseException:
+            # a failed request may have changed the cached instance without saving, reload it next time
+            simulations.pop(session_id, None)
+            raise
+        finally:
+            busy_sessions[session_id] -= 1
+            if not busy_sessions[session_id]:
+                del busy_sessions[session_id]
+
+def request_fingerprint(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+def replay_response(simulation: SimulationManager, key: Optional[str], fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Return the stored response for a retried request instead of running it again"""
+    if not key:
+        return None
+    try:
+        return simulation.get_idempotent_response(key, fingerprint)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def session_etag(simulation: SimulationManager, *parts: Any) -> str:
+    """Validator of a session resource: changes with every saved change and every new game"""
+    tag = "-".join(str(part) for part in (simulation.game_id, simulation.revision, simulation.scenario.digest, *parts))
+    return f'W/"{tag}"'
+
+def not_modified(request: Request, etag: str) -> bool:
+    candidates = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    # If-None-Match uses weak comparison, W/"x" and "x" are the same version
+    return "*" in candidates or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in candidates}
+
+def conditional_response(request: Request, etag: str, cache_control: str, build) -> Response:
+    """Answer 304 when the client already holds this version, otherwise build and send the body"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return encode_response(build(), headers=headers)
+
+def pending_analysis(simulation: SimulationManager) -> Dict[str, Any]:
+    """Return the analysis of the decision awaiting action, empty if there is none"""
+    decision = next((d for d in simulation.user_decisions if d["id"] == simulation.current_decision_id), None)
+    return (decision or {}).get("analysis") or {}
+
+def pending_recommendations(simulation: SimulationManager) -> Dict[str, Dict[str, float]]:
+    """Return each agent's metric changes for the decision awaiting action"""
+    return pending_analysis(simulation).get("recommendations") or {}
+
+async def enqueue_job(
+    session_id: str,
+    kind: str,
+    run,
+    priority: int,
+    callback_url: Optional[str],
+    idempotency_key: Optional[str]
+) -> JSONResponse:
+    check_session_id(session_id)
+    dedupe_key = f"{session_id}:{idempotency_key}" if idempotency_key else None
+    try:
+        job = await job_queue.submit(session_id, kind, run, priority, callback_url, dedupe_key)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except InvalidCallback as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return JSONResponse(status_code=202, content={
+        "job_id": job.id,
+        "status": job.status,
+        "poll_url": f"/api/jobs/{job.id}"
+    })
+
+@app.exception_handler(SessionLockTimeout)
+async def session_lock_timeout_handler(request, exc):
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
 
 class Decision(BaseModel):
     content: str
@@ -33,6 +219,29 @@ class AnalysisResponse(BaseModel):
 class MetricsResponse(BaseModel):
     metrics: Dict[str, Any]
 
+class BatchDecisionItem(BaseModel):
+    session_id: str
+    content: str
+    idempotency_key: Optional[str] = None
+
+class BatchDecisionRequest(BaseModel):
+    items: List[BatchDecisionItem]
+
+class ValidateChangesRequest(BaseModel):
+    changes: Dict[str, float]
+    clamp: bool = False  # also return the nearest change set that passes
+
+class WhatIfRequest(BaseModel):
+    candidates: List[Dict[str, float]] = []  # change sets like {"core.revenue": 5}; empty uses the pending recommendations
+    labels: Optional[List[str]] = None
+    weights: Optional[Dict[str, float]] = None  # per-metric weight for ranking, default 1
+
+class TrajectoryRequest(BaseModel):
+    changes: Optional[Dict[str, float]] = None  # weekly policy; default is the mean of the pending recommendations
+    paths: int = 1000
+    seed: Optional[int] = None  # default is the session seed
+    include_paths: bool = False
+
 class DecisionResponse(BaseModel):
     decision_id: str
     content: str
@@ -46,6 +255,7 @@ class ActionResponse(BaseModel):
     next_challenge: Optional[Dict[str, Any]] = None
     metrics: Optional[Dict[str, Any]] = None
     analysis: Optional[Dict[str, Any]] = None
+    events: Optional[List[Dict[str, Any]]] = None
 
 class DiscussionFeedback(BaseModel):
     feedback: str
@@ -60,74 +270,188 @@ class Action(BaseModel):
 async def root():
     return {"message": "Business Simulation API"}
 
+@app.get("/api/scenarios")
+async def list_scenarios():
+    return {"scenarios": get_catalog().names()}
+
 @app.post("/api/simulation/start")
-async def start_simulation():
-    global simulation
-    if not hasattr(simulation, 'is_running'):
-        simulation.is_running = False
-    
-    if simulation.is_running:
-        raise HTTPException(status_code=400, detail="Simulation is already running")
-    
-    simulation.is_running = True
-    week_key = f"week{simulation.current_week + 1}"
-    current_challenge = simulation.simulation_data["weekly_challenges"][week_key]
-    
-    return {
-        "message": "Simulation started successfully",
-        "current_week": simulation.current_week + 1,
-        "department": simulation.current_department,
-        "challenge": current_challenge
-    }
+async def start_simulation(
+    session_id: str = DEFAULT_SESSION_ID,
+    scenario: str = DEFAULT_SCENARIO,
+    seed: Optional[int] = None
+):
+    async with session_lock(session_id):
+        simulation = get_simulation(session_id, locked=True)
+        if not hasattr(simulation, 'is_running'):
+            simulation.is_running = False
+        
+        if simulation.is_running:
+            raise HTTPException(status_code=400, detail="Simulation is already running")
+        
+        if seed is not None and not valid_seed(seed):
+            # SeedSequence rejects negative seeds, the session could never commit a week
+            raise HTTPException(status_code=422, detail=f"seed must be an integer from 0 to {MAX_SEED - 1}")
+        
+        # every start begins a fresh game on the requested scenario pack
+        try:
+            simulation = SimulationManager(
+                session_id=session_id,
+                session_store=session_store,
+                scenario=scenario,
+                seed=seed,
+                analytics=analytics
+            )
+        except UnknownScenario:
+            raise HTTPException(status_code=404, detail=f"Scenario not found: {scenario}")
+        simulations[session_id] = simulation
+        simulation.is_running = True
+        simulation.save_snapshot()
+        
+        return {
+            "message": "Simulation started successfully",
+            "session_id": session_id,
+            "scenario": simulation.scenario_name,
+            "seed": simulation.seed,
+            "current_week": simulation.current_week + 1,
+            "department": simulation.current_department,
+            "challenge": simulation.get_current_challenge()
+        }
 
 @app.get("/api/simulation/status", response_model=SimulationStatus)
-async def get_simulation_status():
+async def get_simulation_status(request: Request, session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
     if not hasattr(simulation, 'is_running'):
         simulation.is_running = False
     if not hasattr(simulation, 'awaiting_action'):
         simulation.awaiting_action = False
     if not hasattr(simulation, 'current_decision_id'):
         simulation.current_decision_id = None
-        
-    week_key = f"week{simulation.current_week + 1}"
-    current_challenge = simulation.simulation_data["weekly_challenges"][week_key]
     
-    return {
+    return conditional_response(request, session_etag(simulation, "status"), REVALIDATE, lambda: {
         "current_week": simulation.current_week,
         "current_department": simulation.current_department,
         "discussion_started": simulation.discussion_started,
         "is_running": simulation.is_running,
         "awaiting_action": simulation.awaiting_action,
         "current_decision_id": simulation.current_decision_id,
-        "challenge": current_challenge
-    }
+        "challenge": simulation.get_current_challenge()
+    })
 
 @app.post("/api/simulation/reset")
-async def reset_simulation():
-    global simulation
-    simulation = SimulationManager()
+async def reset_simulation(session_id: str = DEFAULT_SESSION_ID):
+    async with session_lock(session_id):
+        simulation = SimulationManager(session_id=session_id, session_store=session_store, analytics=analytics)
+        simulations[session_id] = simulation
+        # store the fresh state so other workers drop their copy of the old game
+        simulation.save_snapshot()
     return {"message": "Simulation reset successfully"}
 
 @app.get("/api/simulation/week/{week_number}")
-async def get_week_challenge(week_number: int):
-    if week_number < 1 or week_number > len(simulation.simulation_data["weekly_challenges"]):
+async def get_week_challenge(request: Request, week_number: int, session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
+    scenario = simulation.scenario
+    challenge = scenario.challenge(week_number)
+    if challenge is None:
         raise HTTPException(status_code=404, detail="Week not found")
-    
-    week_key = f"week{week_number}"
-    return simulation.simulation_data["weekly_challenges"][week_key]
+    # the tag names the scenario and its content, a session that switches scenario or a reload changes it
+    etag = f'W/"{scenario.name}-{scenario.digest}-{week_number}"'
+    return conditional_response(request, etag, REVALIDATE, challenge.to_dict)
 
 @app.get("/api/metrics/current", response_model=MetricsResponse)
-async def get_current_metrics():
-    return {"metrics": simulation.get_current_metrics()}
+async def get_current_metrics(request: Request, session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
+    return conditional_response(
+        request,
+        session_etag(simulation, "metrics"),
+        REVALIDATE,
+        lambda: {"metrics": simulation.get_current_metrics()}
+    )
 
 @app.get("/api/metrics/week/{week_number}", response_model=MetricsResponse)
-async def get_week_metrics(week_number: int):
+async def get_week_metrics(request: Request, week_number: int, session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
     if week_number < 1 or week_number > simulation.current_week + 1:
         raise HTTPException(status_code=404, detail="Week metrics not found")
-    return {"metrics": simulation.metrics_manager.get_week_metrics(week_number)}
+    build = lambda: {"metrics": simulation.metrics_manager.get_week_metrics(week_number)}
+    if week_number <= simulation.current_week:
+        # a finished week is fixed for the rest of the game, its tag only names the game
+        return conditional_response(request, f'W/"{simulation.game_id}-week-{week_number}"', REVALIDATE, build)
+    return conditional_response(request, session_etag(simulation, "metrics", week_number), REVALIDATE, build)
 
-@app.post("/api/decisions/submit", response_model=AnalysisResponse)
-async def submit_decision(decision: Decision):
+@app.post("/api/metrics/validate")
+async def validate_changes(request: ValidateChangesRequest, session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
+    department = simulation.current_department
+    violations = simulation.metrics_manager.check_changes(request.changes, department)
+    response = {
+        "department": department,
+        "valid": not violations,
+        "violations": violations
+    }
+    if request.clamp:
+        response["clamped"] = simulation.metrics_manager.clamp_changes(request.changes, department)
+    return response
+
+@app.post("/api/metrics/what-if")
+async def compare_what_if(request: WhatIfRequest, session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
+    candidates = request.candidates
+    labels = request.labels
+    if not candidates:
+        # compare each agent's recommendations for the pending decision
+        recommendations = pending_recommendations(simulation)
+        if not recommendations:
+            raise HTTPException(status_code=400, detail="No candidates given and no pending recommendations to compare")
+        labels = list(recommendations.keys())
+        candidates = list(recommendations.values())
+    if labels is not None and len(labels) != len(candidates):
+        raise HTTPException(status_code=400, detail="labels must have one entry per candidate")
+    
+    week = simulation.current_week + 1
+    results = simulation.metrics_manager.compare_candidates(
+        week, simulation.current_department, candidates, request.weights
+    )
+    if labels is not None:
+        for result in results:
+            result["label"] = labels[result["index"]]
+    return {
+        "week": week,
+        "department": simulation.current_department,
+        "candidates": results
+    }
+
+@app.post("/api/metrics/trajectory")
+async def project_trajectory(request: TrajectoryRequest, session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
+    changes = request.changes
+    if changes is None:
+        # the policy the team is converging on
+        analysis = pending_analysis(simulation)
+        changes = analysis.get("consensus")
+        if changes is None:
+            changes = merge_recommendations(analysis.get("recommendations") or {})
+    
+    from trajectory import TrajectoryProjection
+    try:
+        projection = TrajectoryProjection.from_metrics(
+            simulation.metrics_manager,
+            simulation.current_week + 1,
+            simulation.total_weeks,
+            changes,
+            paths=request.paths,
+            seed=request.seed
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # plain iterator, starlette drains it in a worker thread so sampling never blocks the event loop
+    return StreamingResponse(projection.iter_ndjson(request.include_paths), media_type="application/x-ndjson")
+
+async def _submit_decision(
+    simulation: SimulationManager,
+    decision: Decision,
+    analysis_cache: Optional[Dict[str, Any]] = None,
+    reuse: bool = True
+) -> Dict[str, Any]:
     if not decision.content.strip():
         raise HTTPException(status_code=400, detail="Decision content cannot be empty")
     
@@ -141,20 +465,27 @@ async def submit_decision(decision: Decision):
         )
     
     # analyze the decision using the simulation manager's API-specific method
-    analysis_result = await simulation.analyze_user_decision_api(decision.content)
+    analysis_result = await simulation.analyze_user_decision_api(
+        decision.content,
+        analysis_cache=analysis_cache,
+        reuse_similar=reuse
+    )
     
     if "error" in analysis_result:
         raise HTTPException(status_code=400, detail=analysis_result["error"])
     
     # store the decision
     decision_id = f"decision_{simulation.current_week + 1}"
-    simulation.user_decisions.append({
+    entry = {
         "id": decision_id,
         "content": decision.content,
         "week": simulation.current_week + 1,
         "analysis": analysis_result,
         "status": "pending_action"
-    })
+    }
+    entry["recommendations_version"] = RecommendationVersions(entry).add(analysis_result, "submit")
+    simulation.record_analysis(entry["week"], analysis_result, entry["recommendations_version"])
+    simulation.user_decisions.append(entry)
     
     # set simulation state to await action
     simulation.awaiting_action = True
@@ -171,26 +502,157 @@ async def submit_decision(decision: Decision):
         ]
     }
 
+async def _run_submit(
+    session_id: str,
+    decision: Decision,
+    idempotency_key: Optional[str],
+    analysis_cache: Optional[Dict[str, Any]] = None,
+    reuse: bool = True
+) -> Dict[str, Any]:
+    async with session_lock(session_id):
+        simulation = get_simulation(session_id, locked=True)
+        fingerprint = request_fingerprint("submit", decision.content)
+        cached = replay_response(simulation, idempotency_key, fingerprint)
+        if cached is not None:
+            return cached
+        
+        response = await _submit_decision(simulation, decision, analysis_cache, reuse)
+        if idempotency_key:
+            simulation.remember_response(idempotency_key, fingerprint, response)
+        simulation.save_snapshot()
+        return response
+
+@app.post("/api/decisions/submit", response_model=AnalysisResponse)
+async def submit_decision(
+    decision: Decision,
+    session_id: str = DEFAULT_SESSION_ID,
+    run_async: bool = False,
+    priority: int = 1,
+    callback_url: Optional[str] = None,
+    reuse: bool = True,
+    idempotency_key: Optional[str] = Header(None)
+):
+    if run_async:
+        return await enqueue_job(
+            session_id,
+            "submit",
+            lambda: _run_submit(session_id, decision, idempotency_key, reuse=reuse),
+            priority,
+            callback_url,
+            idempotency_key
+        )
+    return await _run_submit(session_id, decision, idempotency_key, reuse=reuse)
+
+@app.post("/api/decisions/batch")
+async def submit_decision_batch(request: BatchDecisionRequest, priority: int = 1):
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch has no items")
+    if len(request.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {MAX_BATCH_ITEMS} items")
+    
+    # identical decisions on the same scenario week share one agent run
+    analysis_cache: Dict[str, Any] = {}
+    queued: Dict[Any, Any] = {}
+    accepted = []
+    rejected = []
+    for index, item in enumerate(request.items):
+        if not valid_session_id(item.session_id):
+            rejected.append({"index": index, "session_id": item.session_id, "status_code": 422, "error": "Invalid session_id"})
+            continue
+        key = (item.session_id, item.content)
+        job = queued.get(key)
+        if job is None:
+            try:
+                job = await job_queue.submit(
+                    item.session_id,
+                    "submit",
+                    partial(_run_submit, item.session_id, Decision(content=item.content), item.idempotency_key, analysis_cache),
+                    priority,
+                    dedupe_key=f"{item.session_id}:{item.idempotency_key}" if item.idempotency_key else None
+                )
+            except JobQueueFull as e:
+                rejected.append({"index": index, "session_id": item.session_id, "status_code": 503, "error": str(e)})
+                continue
+            queued[key] = job
+        accepted.append((index, job))
+    
+    async def wait_for(index: int, job):
+        await job_queue.wait(job)
+        return index, job
+    
+    async def results():
+        # job ids first, so a client that drops the stream can still poll /api/jobs
+        yield dumps({
+            "type": "accepted",
+            "items": [{"index": index, "session_id": job.session_id, "job_id": job.id} for index, job in accepted],
+            "rejected": rejected
+        }) + b"\n"
+        for finished in asyncio.as_completed([wait_for(index, job) for index, job in accepted]):
+            index, job = await finished
+            yield dumps({"type": "result", "index": index, **job.to_dict()}) + b"\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @app.get("/api/decisions/history")
-async def get_decision_history():
+async def get_decision_history(session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
     return {"decisions": simulation.user_decisions}
 
+@app.get("/api/reports/session")
+async def download_session_report(session_id: str = DEFAULT_SESSION_ID, format: str = "text"):
+    """Stream the session's decisions, recommendations, applied changes, metrics and discussions"""
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown report format: {format}, expected one of {', '.join(FORMATS)}")
+    simulation = get_simulation(session_id)
+    filename = f"report-{session_id}-week{simulation.current_week + 1}.{EXTENSIONS[format]}"
+    return StreamingResponse(
+        iter_report(session_sections(simulation), format),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.get("/api/resources/available")
-async def get_available_resources():
-    week_key = f"week{simulation.current_week + 1}"
-    return {
-        "resources": simulation.simulation_data["weekly_challenges"][week_key]["available_resources"]
-    }
+async def get_available_resources(session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
+    if simulation.get_week_challenge() is None:
+        raise HTTPException(status_code=404, detail="No challenge for the current week")
+    return {"resources": simulation.get_available_resources()}
 
 @app.get("/api/resources/constraints")
-async def get_constraints():
-    week_key = f"week{simulation.current_week + 1}"
-    return {
-        "constraints": simulation.simulation_data["weekly_challenges"][week_key]["constraints"]
-    }
+async def get_constraints(session_id: str = DEFAULT_SESSION_ID):
+    challenge = get_simulation(session_id).get_week_challenge()
+    if challenge is None:
+        raise HTTPException(status_code=404, detail="No challenge for the current week")
+    return {"constraints": challenge.constraints}
 
-@app.post("/api/decisions/{decision_id}/action", response_model=ActionResponse)
-async def handle_decision_action(decision_id: str, action: Action):
+async def _reanalyze_decision(
+    simulation: SimulationManager,
+    decision: Dict[str, Any],
+    action: Action,
+    specific_recommendations: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Ask the agents again, the decision keeps its analysis and version unless the new analysis succeeds"""
+    previous = deepcopy(simulation.weekly_decisions.get(decision["week"]))
+    new_analysis = await simulation.analyze_user_decision_api(
+        decision["content"],
+        feedback=action.feedback if action.feedback else None,
+        specific_recommendations=specific_recommendations
+    )
+    if "error" in new_analysis:
+        if previous is None:
+            simulation.weekly_decisions.pop(decision["week"], None)
+        else:
+            simulation.weekly_decisions[decision["week"]] = previous
+        raise HTTPException(status_code=400, detail=new_analysis["error"])
+    
+    decision["analysis"] = new_analysis
+    decision["recommendations_version"] = RecommendationVersions(decision).add(
+        new_analysis, action.action, action.feedback
+    )
+    simulation.record_analysis(decision["week"], new_analysis, decision["recommendations_version"])
+    return new_analysis
+
+async def _handle_decision_action(simulation: SimulationManager, decision_id: str, action: Action) -> Dict[str, Any]:
     if not simulation.is_running:
         raise HTTPException(status_code=400, detail="Simulation is not running")
         
@@ -211,6 +673,8 @@ async def handle_decision_action(decision_id: str, action: Action):
         next_week_state = simulation.advance_week()
         
         if "error" in next_week_state:
+            # the commit rolled back, the decision is still waiting for an action
+            simulation.awaiting_action = True
             raise HTTPException(status_code=400, detail=next_week_state["error"])
         response = {
             "status": next_week_state["status"],
@@ -219,6 +683,7 @@ async def handle_decision_action(decision_id: str, action: Action):
             "metrics": next_week_state.get("metrics", next_week_state.get("final_metrics", {}))
         }
         
+        response["events"] = next_week_state["events"]
         if next_week_state["status"] == "in_progress":
             response["next_challenge"] = next_week_state["next_challenge"]
             
@@ -238,14 +703,7 @@ async def handle_decision_action(decision_id: str, action: Action):
             )
             
         # get new analysis based on specific feedback
-        new_analysis = await simulation.analyze_user_decision_api(
-            decision["content"],
-            feedback=action.feedback,
-            specific_recommendations=action.specific_recommendations
-        )
-        
-        decision["analysis"] = new_analysis
-        decision["recommendations_version"] = simulation.current_recommendations_version
+        new_analysis = await _reanalyze_decision(simulation, decision, action, action.specific_recommendations)
         
         return {
             "status": "discussing",
@@ -257,17 +715,11 @@ async def handle_decision_action(decision_id: str, action: Action):
         }
         
     elif action.action == "request_new":
-        new_analysis = await simulation.analyze_user_decision_api(
-            decision["content"],
-            feedback=action.feedback if action.feedback else None
-        )
-        
-        decision["analysis"] = new_analysis
-        decision["recommendations_version"] = simulation.current_recommendations_version
+        new_analysis = await _reanalyze_decision(simulation, decision, action)
         
         return {
             "status": "new_recommendations",
-            "message": f"New recommendations generated (version {simulation.current_recommendations_version})",
+            "message": f"New recommendations generated (version {decision.get('recommendations_version', 1)})",
             "current_week": simulation.current_week + 1,
             "metrics": simulation.get_current_metrics(),
             "next_challenge": simulation.get_current_challenge(),
@@ -285,8 +737,58 @@ async def handle_decision_action(decision_id: str, action: Action):
     
     raise HTTPException(status_code=400, detail="Invalid action")
 
+async def _run_action(
+    session_id: str,
+    decision_id: str,
+    action: Action,
+    idempotency_key: Optional[str]
+) -> Dict[str, Any]:
+    async with session_lock(session_id):
+        simulation = get_simulation(session_id, locked=True)
+        fingerprint = request_fingerprint(
+            "action", decision_id, action.action, action.feedback, action.specific_recommendations
+        )
+        cached = replay_response(simulation, idempotency_key, fingerprint)
+        if cached is not None:
+            return cached
+        
+        response = await _handle_decision_action(simulation, decision_id, action)
+        if idempotency_key:
+            simulation.remember_response(idempotency_key, fingerprint, response)
+        simulation.save_snapshot()
+        return response
+
+@app.post("/api/decisions/{decision_id}/action", response_model=ActionResponse)
+async def handle_decision_action(
+    decision_id: str,
+    action: Action,
+    session_id: str = DEFAULT_SESSION_ID,
+    run_async: bool = False,
+    priority: int = 1,
+    callback_url: Optional[str] = None,
+    idempotency_key: Optional[str] = Header(None)
+):
+    if run_async:
+        return await enqueue_job(
+            session_id,
+            f"action:{action.action}",
+            lambda: _run_action(session_id, decision_id, action, idempotency_key),
+            priority,
+            callback_url,
+            idempotency_key
+        )
+    return await _run_action(session_id, decision_id, action, idempotency_key)
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.get("/api/decisions/{decision_id}/recommendations")
-async def get_recommendations(decision_id: str):
+async def get_recommendations(decision_id: str, session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
     decision = next((d for d in simulation.user_decisions if d["id"] == decision_id), None)
     if not decision:
         raise HTTPException(status_code=404, detail="Decision not found")
@@ -296,8 +798,80 @@ async def get_recommendations(decision_id: str):
         "recommendations": decision["analysis"].get("implementation_strategy", {}).get("steps", [])
     }
 
+def find_decision(simulation: SimulationManager, decision_id: str) -> Dict[str, Any]:
+    decision = next((d for d in simulation.user_decisions if d["id"] == decision_id), None)
+    if not decision:
+        raise HTTPException(status_code=404, detail="Decision not found")
+    return decision
+
+@app.get("/api/decisions/{decision_id}/versions")
+async def list_recommendation_versions(decision_id: str, session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
+    decision = find_decision(simulation, decision_id)
+    return {
+        "decision_id": decision_id,
+        "current_version": decision.get("recommendations_version", 1),
+        "versions": RecommendationVersions(decision).list()
+    }
+
+@app.get("/api/decisions/{decision_id}/versions/diff")
+async def diff_recommendation_versions(
+    decision_id: str,
+    from_version: int,
+    to_version: int,
+    session_id: str = DEFAULT_SESSION_ID
+):
+    simulation = get_simulation(session_id)
+    diff = RecommendationVersions(find_decision(simulation, decision_id)).diff(from_version, to_version)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return {"decision_id": decision_id, **diff}
+
+@app.get("/api/decisions/{decision_id}/versions/{version}")
+async def get_recommendation_version(decision_id: str, version: int, session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
+    versions = RecommendationVersions(find_decision(simulation, decision_id))
+    analysis = versions.analysis(version)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return {"decision_id": decision_id, **versions.entry(version), "analysis": analysis}
+
+@app.post("/api/decisions/{decision_id}/versions/{version}/accept")
+async def accept_recommendation_version(
+    decision_id: str,
+    version: int,
+    commit: bool = True,
+    session_id: str = DEFAULT_SESSION_ID
+):
+    """Restore a stored version as the pending analysis, and by default commit it like accept_all"""
+    async with session_lock(session_id):
+        simulation = get_simulation(session_id, locked=True)
+        if not simulation.awaiting_action or decision_id != simulation.current_decision_id:
+            raise HTTPException(status_code=400, detail="Decision is not awaiting an action")
+        decision = find_decision(simulation, decision_id)
+        analysis = RecommendationVersions(decision).analysis(version)
+        if analysis is None:
+            raise HTTPException(status_code=404, detail="Version not found")
+
+        # stored analyses already carry their recommendations, no agent is asked again
+        decision["analysis"] = analysis
+        decision["recommendations_version"] = version
+        simulation.record_analysis(decision["week"], analysis, version)
+        if commit:
+            response = await _handle_decision_action(simulation, decision_id, Action(action="accept_all"))
+        else:
+            response = {
+                "status": "restored",
+                "message": f"Recommendations version {version} restored",
+                "current_week": simulation.current_week + 1,
+                "analysis": analysis
+            }
+        simulation.save_snapshot()
+        return response
+
 @app.get("/api/simulation/status")
-async def get_simulation_status():
+async def get_simulation_status(session_id: str = DEFAULT_SESSION_ID):
+    simulation = get_simulation(session_id)
     if not simulation.is_running:
         return {
             "status": "not_running",
@@ -0,0 +1,67 @@
+"""Measure how long a fresh worker needs before it can serve requests.
+
+Usage: python benchmarks/import_time.py [--module api] [--runs 5] [--budget 1.0]
+
+Each run starts a new interpreter, imports the module and builds a
+SimulationManager, the same work a new uvicorn worker does before its first
+request. Exits with status 1 when the median exceeds the budget.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(module: str) -> float:
+    code = f"import {module}; from simulation_manager import SimulationManager; SimulationManager()"
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def slowest_imports(module: str, limit: int = 10):
+    """Return the top-level imports with the largest cumulative import time in microseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # nested imports are indented, only keep the ones the module pulls in directly
+        if name.startswith("   ") and not name.startswith("    "):
+            entries.append((int(cumulative), name.strip()))
+    return sorted(entries, reverse=True)[:limit]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="api")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds")
+    args = parser.parse_args()
+
+    timings = [run_once(args.module) for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(f"cold start of '{args.module}' over {args.runs} runs: "
+          f"median {median * 1000:.0f} ms, min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms")
+
+    print("\nslowest imports (cumulative):")
+    for cumulative, name in slowest_imports(args.module):
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if median > args.budget:
+        print(f"\nFAIL: median cold start above budget of {args.budget:.2f} s")
+        return 1
+    print(f"\nOK: within budget of {args.budget:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Measure the encode cost of typical API responses.
+
+Usage: python benchmarks/serialization.py [--number 2000] [--decisions 4]
+
+Each payload is encoded the way FastAPI does by default (validate against
+the response model, jsonable_encoder, json.dumps) and through
+serialization.py (orjson or compact json, and MessagePack when installed).
+Reports microseconds per response and the encoded size.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import serialization
+from api import ActionResponse, AnalysisResponse, SimulationStatus
+from recommendation_tracker import RecommendationAggregate
+from simulation_manager import SimulationManager
+
+
+def sample_analysis(agents=("CEO", "CFO", "CTO", "CMO"), turns: int = 3):
+    """An analysis shaped like _run_analysis output, with a full agent discussion"""
+    paragraph = "Increase the marketing budget in digital channels while keeping the profit margin above target. " * 8
+    aggregate = RecommendationAggregate()
+    for turn in range(turns):
+        for agent in agents:
+            aggregate.add(agent, {"core.revenue": 4.0 + turn, "core.profit_margin": -1.0, "department.market_share": 2.0})
+    return {
+        "discussion": [
+            {"agent": agent, "content": f"{agent} turn {turn}: {paragraph}"}
+            for turn in range(turns) for agent in agents
+        ],
+        "recommendations": {agent: {"core.revenue": 4.5, "core.profit_margin": -1.0, "department.market_share": 2.0} for agent in agents},
+        "consensus": {"core.revenue": 4.5, "core.profit_margin": -1.0, "department.market_share": 2.0},
+        "metric_stats": aggregate.summary(),
+        "implementation_strategy": {"steps": ["Update metrics"] * 3, "risks": ["Resistance to change"] * 3}
+    }
+
+
+def payloads(decisions: int):
+    simulation = SimulationManager()
+    status = {
+        "current_week": simulation.current_week,
+        "current_department": simulation.current_department,
+        "discussion_started": False,
+        "is_running": True,
+        "awaiting_action": True,
+        "current_decision_id": "decision_1",
+        "challenge": simulation.get_current_challenge()
+    }
+    action = {
+        "status": "discussing",
+        "message": "Discussing specific recommendations (version 2)",
+        "current_week": 1,
+        "metrics": simulation.get_current_metrics(),
+        "next_challenge": simulation.get_current_challenge(),
+        "analysis": sample_analysis()
+    }
+    submit = {"decision_id": "decision_1", "analysis": sample_analysis(), "available_actions": ["accept_all", "request_new"]}
+    history = {"decisions": [
+        {"id": f"decision_{week}", "content": "Launch", "week": week, "analysis": sample_analysis(), "status": "accepted"}
+        for week in range(1, decisions + 1)
+    ]}
+    return [
+        ("status", status, SimulationStatus),
+        ("action", action, ActionResponse),
+        ("submit", submit, AnalysisResponse),
+        (f"history ({decisions} decisions)", history, None)
+    ]
+
+
+def fastapi_default(payload, adapter):
+    """What FastAPI does for a dict returned from an endpoint, then JSONResponse.render"""
+    if adapter is not None:
+        payload = adapter.dump_python(adapter.validate_python(payload), mode="json")
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="encodes per measurement")
+    parser.add_argument("--decisions", type=int, default=4, help="decisions in the history payload")
+    args = parser.parse_args()
+
+    encoders = [("fastapi default", None), ("orjson" if serialization.orjson else "compact json", serialization.dumps)]
+    if serialization.msgpack is not None:
+        encoders.append(("msgpack", serialization.packb))
+
+    print(f"{'payload':<24} {'encoder':<16} {'us/response':>12} {'bytes':>8}")
+    for name, payload, model in payloads(args.decisions):
+        adapter = TypeAdapter(model) if model is not None else None
+        for label, encode in encoders:
+            run = (lambda: fastapi_default(payload, adapter)) if encode is None else (lambda: encode(payload))
+            seconds = min(timeit.repeat(run, number=args.number, repeat=3))
+            print(f"{name:<24} {label:<16} {seconds / args.number * 1e6:12.1f} {len(run()):8d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+CORE = ""  # department slot of core metrics, which apply to every department
+
+
+class ConstraintTable:
+    """Metric constraints compiled into flat arrays indexed by metric ID.
+
+    metrics_definitions is read once: every core metric and every
+    department metric gets an integer ID, a (department, "category.metric")
+    key maps to it, and min_change, max_change and uncertainty_range live in
+    NumPy arrays. Checking a change set is one dict lookup per metric and a
+    single vectorized comparison, and reports every violation at once.
+    """
+
+    def __init__(self, metrics_data: Dict[str, Any]):
+        definitions = metrics_data.get("metrics_definitions", {})
+        self.ids: Dict[Tuple[str, str], int] = {}
+        self.names: List[str] = []
+        rows = []
+
+        for metric, limits in definitions.get("core", {}).items():
+            self.ids[(CORE, f"core.{metric}")] = len(rows)
+            self.names.append(f"core.{metric}")
+            rows.append(limits)
+        for department, metrics in definitions.get("department", {}).items():
+            for metric, limits in metrics.items():
+                self.ids[(department.upper(), f"department.{metric}")] = len(rows)
+                self.names.append(f"department.{metric}")
+                rows.append(limits)
+
+        self.min_change = np.array([float(row["min_change"]) for row in rows])
+        self.max_change = np.array([float(row["max_change"]) for row in rows])
+        self.uncertainty = np.array([float(row.get("uncertainty_range", 0)) for row in rows])
+
+    def lookup(self, metric: str, department: Optional[str]) -> Optional[int]:
+        if metric.startswith("core."):
+            return self.ids.get((CORE, metric))
+        return self.ids.get(((department or "").upper(), metric))
+
+    def resolve(self, changes: Dict[str, float], department: Optional[str]) -> Tuple[List[str], np.ndarray, np.ndarray, List[str]]:
+        """Split a change set into known metrics (names, IDs, values) and unknown metric names"""
+        known, ids, values, unknown = [], [], [], []
+        for metric, change in changes.items():
+            metric_id = self.lookup(metric, department)
+            if metric_id is None:
+                unknown.append(metric)
+            else:
+                known.append(metric)
+                ids.append(metric_id)
+                values.append(change)
+        return known, np.array(ids, dtype=int), np.array(values, dtype=float), unknown
+
+    def check(self, changes: Dict[str, float], department: Optional[str]) -> List[Dict[str, Any]]:
+        """Return every violation in the change set; an empty list means it is valid.
+
+        A change is allowed when its whole uncertainty band, change ± uncertainty,
+        stays within [min_change, max_change].
+        """
+        known, ids, values, unknown = self.resolve(changes, department)
+        violations = [{"metric": metric, "reason": "unknown_metric"} for metric in unknown]
+
+        uncertainty = self.uncertainty[ids]
+        low = self.min_change[ids]
+        high = self.max_change[ids]
+        outside = (values - uncertainty < low) | (values + uncertainty > high)
+        for i in np.flatnonzero(outside):
+            violations.append({
+                "metric": known[i],
+                "reason": "out_of_range",
+                "change": float(values[i]),
+                "uncertainty": float(uncertainty[i]),
+                "min_change": float(low[i]),
+                "max_change": float(high[i])
+            })
+        return violations
+
+    def clamp(self, changes: Dict[str, float], department: Optional[str]) -> Dict[str, float]:
+        """Return the nearest feasible change set: unknown metrics dropped, others clipped into range.
+
+        Changes are clipped to [min_change + uncertainty, max_change - uncertainty]
+        so the clamped set passes check(); if the band is wider than the range
+        the midpoint is used.
+        """
+        known, ids, values, _ = self.resolve(changes, department)
+        low = self.min_change[ids] + self.uncertainty[ids]
+        high = self.max_change[ids] - self.uncertainty[ids]
+        midpoint = (self.min_change[ids] + self.max_change[ids]) / 2
+        clamped = np.where(low <= high, np.clip(values, low, np.maximum(low, high)), midpoint)
+        return {metric: float(value) for metric, value in zip(known, clamped)}
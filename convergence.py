@@ -0,0 +1,124 @@
+import asyncio
+from typing import Dict, Any, Iterable, Optional, Sequence
+
+from autogen_agentchat.base import TerminatedException, TerminationCondition
+from autogen_agentchat.messages import StopMessage
+
+from recommendation_tracker import RecommendationTracker
+
+
+class ConvergenceTermination(TerminationCondition):
+    """Stop a round once the agents' recommendations have settled.
+
+    Every agent message is passed to the tracker as it arrives, so extraction
+    happens here instead of after the round. A reply is stable when it
+    contributed recommendations and the consensus change set afterwards
+    proposes the same metrics as after the previous contributing reply, with
+    no value moving by more than `tolerance` percentage points. The round
+    stops after `stable_replies` stable replies in a row once the consensus
+    covers at least `min_coverage` of the allowed metrics. A reply with
+    nothing extractable, or a failed extraction, leaves the consensus as it
+    was and is not evidence of agreement, so it never ends the round.
+    Combine with ApprovalTermination so a CEO approval also ends the round.
+    """
+
+    def __init__(
+        self,
+        tracker: RecommendationTracker,
+        allowed_metrics: Iterable[str],
+        participants: Iterable[str],
+        min_coverage: float = 0.5,
+        tolerance: float = 1.0,
+        stable_replies: int = 1
+    ):
+        self.tracker = tracker
+        self.allowed_metrics = set(allowed_metrics)
+        self.participants = set(participants)
+        self.min_coverage = min_coverage
+        self.tolerance = tolerance
+        self.stable_replies = stable_replies
+        self._previous: Optional[Dict[str, float]] = None
+        self._stable = 0
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    def converged(self, current: Dict[str, float]) -> bool:
+        if self._previous is None or set(current) != set(self._previous):
+            return False
+        if not self.allowed_metrics:
+            return False
+        coverage = len(self.allowed_metrics & set(current)) / len(self.allowed_metrics)
+        if coverage < self.min_coverage:
+            return False
+        return all(abs(current[metric] - self._previous[metric]) <= self.tolerance for metric in current)
+
+    async def __call__(self, messages: Sequence[Any]) -> Optional[StopMessage]:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            source = getattr(message, "source", None)
+            content = getattr(message, "content", None)
+            # only agent replies carry recommendations, not the task or tool events
+            if source not in self.participants or not isinstance(content, str):
+                continue
+            # extraction is a blocking gpt call
+            contributed = await asyncio.to_thread(self.tracker.process_message, source, content)
+            if not contributed:
+                continue
+            current = self.tracker.consensus()
+            self._stable = self._stable + 1 if self.converged(current) else 0
+            self._previous = current
+            if self._stable >= self.stable_replies:
+                self._terminated = True
+                return StopMessage(
+                    content=f"Recommendations converged on {len(current)} metrics",
+                    source="ConvergenceTermination"
+                )
+        return None
+
+    async def reset(self) -> None:
+        self._previous = None
+        self._stable = 0
+        self._terminated = False
+
+
+class ApprovalTermination(TerminationCondition):
+    """Stop a round when the approver's reply contains the approval keyword.
+
+    Only the approver's own replies count, never the task, so a decision or
+    feedback text mentioning the keyword cannot end the round before anyone
+    speaks. An approval also only counts once every other participant has
+    replied, so the approver cannot close the round on its opening turn.
+    """
+
+    def __init__(self, approver: str, participants: Iterable[str], keyword: str = "APPROVE"):
+        self.approver = approver
+        self.others = set(participants) - {approver}
+        self.keyword = keyword
+        self._replied = set()
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence[Any]) -> Optional[StopMessage]:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            source = getattr(message, "source", None)
+            content = getattr(message, "content", None)
+            if source in self.others:
+                self._replied.add(source)
+            elif source == self.approver and isinstance(content, str) and self.keyword in content:
+                if self._replied >= self.others:
+                    self._terminated = True
+                    return StopMessage(content=f"{self.approver} approved", source="ApprovalTermination")
+        return None
+
+    async def reset(self) -> None:
+        self._replied = set()
+        self._terminated = False
@@ -1,9 +1,13 @@
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, TYPE_CHECKING
 from copy import deepcopy
-import pandas as pd
 from datetime import datetime
 
+from reports import Section, iter_report, write_report
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 class DataManager:
     def __init__(self, initial_data_file: str):
         with open(initial_data_file, 'r') as file:
@@ -77,9 +81,8 @@ class DataManager:
         
         return impact
     
-    def get_agent_contributions(self) -> pd.DataFrame:
-        contributions = []
-        
+    def iter_agent_contributions(self) -> Iterator[Dict[str, Any]]:
+        """Yield each change's effect on the current metrics, one history entry at a time"""
         for change in self.history:
             metrics_impact = {}
             prev = change['previous_state']['current_metrics']
@@ -92,39 +95,63 @@ class DataManager:
                     metrics_impact[f'{metric}_change'] = absolute_change
                     metrics_impact[f'{metric}_change_pct'] = percentage_change
             
-            contribution = {
+            yield {
                 'timestamp': change['timestamp'],
                 'agent': change['agent'],
                 **metrics_impact
             }
-            contributions.append(contribution)
-        
-        return pd.DataFrame(contributions)
     
-    def save_final_report(self, filename: str) -> None:
-        impact = self.calculate_impact()
+    def get_agent_contributions(self) -> "pd.DataFrame":
+        # pandas is only needed for reports, so it is imported here instead of at startup
+        import pandas as pd
+        return pd.DataFrame(list(self.iter_agent_contributions()))
+    
+    def report_sections(self) -> List[Section]:
+        metrics = [m for m, v in self.initial_data['current_metrics'].items() if isinstance(v, (int, float))]
+        columns = ['timestamp', 'agent'] + [f'{m}{suffix}' for m in metrics for suffix in ('_change', '_change_pct')]
         
-        report = []
-        report.append("Company Growth Strategy Impact Report")
-        report.append("=================================\n")
-        report.append("Overall Impact:")
-        report.append("--------------")
-        for metric, changes in impact.items():
-            report.append(f"{metric}:")
-            report.append(f"  Initial Value: {changes['initial_value']}")
-            report.append(f"  Final Value: {changes['final_value']}")
-            report.append(f"  Absolute Change: {changes['absolute_change']:.2f}")
-            report.append(f"  Percentage Change: {changes['percentage_change']:.2f}%\n")
+        def impact_text(row) -> str:
+            metric, initial, final, absolute, percentage = row
+            return (f"{metric}:\n  Initial Value: {initial}\n  Final Value: {final}\n"
+                    f"  Absolute Change: {absolute:.2f}\n  Percentage Change: {percentage:.2f}%\n")
         
-        report.append("Agent Contributions:")
-        report.append("------------------")
-        contributions_df = self.get_agent_contributions()
-        report.append(contributions_df.to_string())
-        with open(filename, 'w') as f:
-            f.write('\n'.join(report))
+        def contribution_text(row) -> str:
+            return "  ".join(f"{value:.2f}" if isinstance(value, float) else str(value) for value in row)
         
-        with open('final_company_data.json', 'w') as f:
-            json.dump(self.current_data, f, indent=2)
+        return [
+            Section(
+                "Overall Impact",
+                ('metric', 'initial_value', 'final_value', 'absolute_change', 'percentage_change'),
+                ((metric, c['initial_value'], c['final_value'], c['absolute_change'], c['percentage_change'])
+                 for metric, c in self.calculate_impact().items()),
+                text_row=impact_text
+            ),
+            Section(
+                "Agent Contributions",
+                columns,
+                (tuple(contribution.get(column) for column in columns) for contribution in self.iter_agent_contributions()),
+                text_row=contribution_text,
+                text_header=True
+            )
+        ]
+    
+    def iter_report(self, fmt: str = "text") -> Iterator[str]:
+        """Stream the impact report section by section, see reports.iter_report for the formats"""
+        if fmt == "text":
+            yield "Company Growth Strategy Impact Report\n=================================\n\n"
+        yield from iter_report(self.report_sections(), fmt)
+    
+    def save_final_report(
+        self,
+        filename: str,
+        fmt: str = "text",
+        data_file: Optional[str] = 'final_company_data.json'
+    ) -> None:
+        """Write the impact report and, unless data_file is None, the final company data next to it"""
+        write_report(self.iter_report(fmt), filename)
+        if data_file:
+            with open(data_file, 'w') as f:
+                json.dump(self.current_data, f, indent=2)
 
     def save_metrics(self):
         try:
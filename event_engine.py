@@ -0,0 +1,160 @@
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+from scenario import Scenario, ScenarioError
+from similarity_index import NEGATION_PATTERN
+
+_WORD = re.compile(r"[a-z0-9]+")
+# a negation only rules out its own clause: "not hire contractors; postpone other projects" still postpones
+CLAUSE_PATTERN = re.compile(r"[.;,:!?\n]|\b(?:and|but|then|while|whereas)\b")
+_SUFFIXES = ("ations", "ation", "ional", "ions", "ing", "ion", "al", "ed", "es", "s", "e")
+
+
+def stem(word: str) -> str:
+    """Crude suffix stripping so "hiring", "hired" and "hire" meet at the same token"""
+    changed = True
+    while changed:
+        changed = False
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                changed = True
+                break
+    return word
+
+
+def tokenize(text: str) -> set:
+    return {stem(word) for word in _WORD.findall(text.lower())}
+
+
+def parse_impact(value: Any) -> Optional[Tuple[str, float]]:
+    """Read an impact value as ("percent", x) or ("absolute", x); None for non-numeric impacts like "+1 week"."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return ("absolute", float(value))
+    if isinstance(value, str):
+        text = value.strip().replace(" ", "")
+        try:
+            if text.endswith("%"):
+                return ("percent", float(text[:-1]))
+            return ("absolute", float(text))
+        except ValueError:
+            return None
+    return None
+
+
+class CompiledEvent:
+    __slots__ = (
+        "week",
+        "position",
+        "trigger",
+        "tokens",
+        "event",
+        "target_week",
+        "target_department",
+        "metric_changes",
+        "resource_changes",
+        "effects"
+    )
+
+    def __init__(self, week: int, position: int, data: Dict[str, Any]):
+        self.week = week
+        self.position = position
+        self.trigger = data["trigger"]
+        self.tokens = frozenset(tokenize(self.trigger.replace("_", " ")))
+        self.event = data["event"]
+        self.target_week = week
+        self.target_department = ""
+        self.metric_changes: Dict[str, float] = {}
+        self.resource_changes: Dict[str, float] = {}
+        self.effects: Dict[str, Any] = dict(data.get("effects", {}))
+
+
+class EventEngine:
+    """Fire a scenario's unexpected events when an accepted decision matches their trigger.
+
+    Triggers are compiled once into an inverted index keyed by one token of
+    each trigger, so matching a decision costs one dict lookup per word of the
+    decision no matter how many events the scenario defines. An event fires
+    when every token of its trigger appears in one clause of the decision and
+    that clause has no negation (the NEGATION_PATTERN the precomputed matcher
+    uses), so "We will not hire contractors" fires nothing.
+
+    Impacts are resolved when the scenario is compiled, against the event's
+    target: `target_week` (default the next week, or the week itself in the
+    last week) and `target_department` (default that week's department).
+    Every numeric impact must name a core metric, a metric of the target
+    department or a resource of the target week exactly, otherwise the
+    scenario is rejected. Non-numeric impacts such as "+1 week" and the
+    event's `effects` are informational. Evaluation is deterministic and has
+    no side effects; callers apply the compiled changes.
+    """
+
+    def __init__(self, scenario: Scenario, metrics_data: Dict[str, Any]):
+        self.scenario = scenario
+        definitions = metrics_data.get("metrics_definitions", {})
+        self._index: Dict[int, Dict[str, List[CompiledEvent]]] = {}
+        for challenge in scenario.weeks:
+            week_index: Dict[str, List[CompiledEvent]] = {}
+            for position, data in enumerate(challenge.unexpected_events):
+                event = CompiledEvent(challenge.week, position, data)
+                self._resolve(event, data, definitions)
+                if event.tokens:
+                    week_index.setdefault(min(event.tokens), []).append(event)
+            self._index[challenge.week] = week_index
+
+    def _resolve(self, event: CompiledEvent, data: Dict[str, Any], definitions: Dict[str, Any]) -> None:
+        """Compile an event's impact into metric and resource changes of its target"""
+        where = f"weekly_challenges.week{event.week}.unexpected_events[{event.position}]"
+        total_weeks = self.scenario.total_weeks
+        target_week = data.get("target_week", min(event.week + 1, total_weeks))
+        if not event.week <= target_week <= total_weeks:
+            raise ScenarioError(f"{where}: target_week must be from {event.week} to {total_weeks}, got {target_week}")
+        challenge = self.scenario.challenge(target_week)
+        department = data.get("target_department", challenge.department)
+        department_metrics = definitions.get("department", {}).get(department.upper())
+        if department_metrics is None:
+            raise ScenarioError(f"{where}: target_department {department} has no metrics")
+
+        event.target_week = target_week
+        event.target_department = department
+        for key, value in data["impact"].items():
+            parsed = parse_impact(value)
+            if parsed is None:
+                event.effects[key] = value
+                continue
+            kind, amount = parsed
+
+            category = "core" if key in definitions.get("core", {}) else "department" if key in department_metrics else None
+            if category is not None:
+                # metric impacts are percentages: "+10%" is 10 and plain numbers below 1 are fractions, -0.01 is -1
+                if kind == "absolute" and abs(amount) < 1:
+                    amount *= 100
+                event.metric_changes[f"{category}.{key}"] = amount
+                continue
+
+            resource = challenge.available_resources.get(key)
+            if isinstance(resource, (int, float)) and not isinstance(resource, bool):
+                event.resource_changes[key] = resource * amount / 100 if kind == "percent" else amount
+                continue
+            raise ScenarioError(
+                f"{where}: impact '{key}' is neither a metric of {department} nor a resource of week {target_week}"
+            )
+
+    def match(self, week: int, text: str) -> List[CompiledEvent]:
+        week_index = self._index.get(week)
+        if not week_index:
+            return []
+        fired = {}
+        for clause in CLAUSE_PATTERN.split(text.lower()):
+            # "we will not hire contractors" names the trigger without taking it
+            if NEGATION_PATTERN.search(clause):
+                continue
+            tokens = tokenize(clause)
+            for token in tokens:
+                for event in week_index.get(token, ()):
+                    if event.tokens <= tokens:
+                        fired[event.position] = event
+        # keep scenario order regardless of set iteration order
+        return [fired[position] for position in sorted(fired)]
@@ -0,0 +1,311 @@
+import asyncio
+import heapq
+import ipaddress
+import itertools
+import json
+import socket
+import time
+import urllib.request
+import uuid
+from collections import deque, OrderedDict
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Callable, Awaitable, Iterable, Tuple
+from urllib.parse import urlsplit
+
+from serialization import dumps
+
+# clients pick a priority, the server keeps it in this range so nobody can jump every queue
+MIN_PRIORITY = 0
+MAX_PRIORITY = 9
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds its maximum number of pending jobs"""
+
+
+class InvalidCallback(ValueError):
+    """Raised for a callback URL the server refuses to post results to"""
+
+
+def check_callback_url(url: str, allowed_hosts: Optional[Iterable[str]] = None) -> None:
+    """Refuse callbacks that could reach internal services.
+
+    With an allowlist only its hosts are accepted. Without one the URL must be
+    http(s) and every address its host resolves to must be public, so results
+    are never posted to loopback, private, link-local or reserved networks.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise InvalidCallback("callback_url must be an absolute http or https URL")
+    host = parts.hostname.lower()
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise InvalidCallback(f"callback host {host} is not in the allowed callback hosts")
+        return
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)}
+    except (socket.gaierror, ValueError) as e:
+        raise InvalidCallback(f"callback host {host} cannot be resolved: {str(e)}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if ip.version == 6 and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise InvalidCallback(f"callback host {host} resolves to a non-public address")
+
+
+class _NoRedirects(urllib.request.HTTPRedirectHandler):
+    # a checked public URL must not bounce the post to an internal one
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Job:
+    def __init__(
+        self,
+        session_id: str,
+        kind: str,
+        run: Callable[[], Awaitable[Dict[str, Any]]],
+        priority: int = 1,
+        callback_url: Optional[str] = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.kind = kind
+        self.run = run
+        self.priority = priority
+        self.callback_url = callback_url
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.status_code = None
+        self.progress = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.finished = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "session_id": self.session_id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "result": self.result,
+            "error": self.error,
+            "status_code": self.status_code,
+            "progress": self.progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+_current_job: ContextVar[Optional[Tuple["JobQueue", "Job"]]] = ContextVar("current_job", default=None)
+
+
+def report_progress(progress: Dict[str, Any]) -> None:
+    """Publish partial results of the job running in this context; a no-op outside jobs"""
+    current = _current_job.get()
+    if current is not None:
+        queue, job = current
+        job.progress = progress
+        # other workers answer polls from the shared records
+        queue._record(job)
+
+
+class RedisJobRecords:
+    """Mirror job records into Redis so any worker can answer status polls.
+
+    This shares job status only: a job runs on the worker that accepted it,
+    there is no broker handing queued jobs to other workers.
+    """
+
+    def __init__(self, client: Any, prefix: str = "simulation:", ttl: int = 86400):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def save(self, job: Dict[str, Any]) -> None:
+        self.client.set(f"{self.prefix}job:{job['job_id']}", dumps(job), ex=self.ttl)
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        data = self.client.get(f"{self.prefix}job:{job_id}")
+        return json.loads(data) if data else None
+
+
+class JobQueue:
+    """Bounded worker pool for long-running analyses.
+
+    Jobs of one session run strictly in submission order and never two at a
+    time. Across sessions the next job is picked by priority (lower runs
+    first, clamped to MIN_PRIORITY..MAX_PRIORITY) and then round-robin, so one
+    busy session cannot starve the rest. Callbacks are posted from their own
+    tasks and never hold a worker.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_pending: int = 1000,
+        max_finished: int = 1000,
+        records: Optional[RedisJobRecords] = None,
+        callback_hosts: Optional[Iterable[str]] = None
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.records = records
+        self.callback_hosts = frozenset(host.lower() for host in callback_hosts or ())
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._dedupe: Dict[str, str] = {}
+        self._queues: Dict[str, deque] = {}
+        self._ready = []  # heap of (priority, sequence, session_id)
+        self._scheduled = set()  # sessions in the heap or with a running job
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._wakeup = None
+        self._tasks = []
+        self._callbacks = set()  # running callback posts, referenced until they finish
+
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Semaphore(0)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _schedule(self, session_id: str) -> None:
+        priority = self._queues[session_id][0].priority
+        heapq.heappush(self._ready, (priority, next(self._sequence), session_id))
+        self._scheduled.add(session_id)
+        self._wakeup.release()
+
+    async def submit(
+        self,
+        session_id: str,
+        kind: str,
+        run: Callable[[], Awaitable[Dict[str, Any]]],
+        priority: int = 1,
+        callback_url: Optional[str] = None,
+        dedupe_key: Optional[str] = None
+    ) -> Job:
+        """Queue `run` for a session; a repeated dedupe_key returns the existing job.
+
+        Raises InvalidCallback for a callback_url check_callback_url refuses.
+        """
+        if dedupe_key and dedupe_key in self._dedupe:
+            job = self._jobs.get(self._dedupe[dedupe_key])
+            if job is not None:
+                return job
+        if self._pending >= self.max_pending:
+            raise JobQueueFull("Too many pending jobs, try again later")
+        if callback_url:
+            # resolving the host can block, keep it off the event loop
+            await asyncio.to_thread(check_callback_url, callback_url, self.callback_hosts)
+
+        self._ensure_started()
+        priority = min(max(int(priority), MIN_PRIORITY), MAX_PRIORITY)
+        job = Job(session_id, kind, run, priority, callback_url)
+        self._jobs[job.id] = job
+        if dedupe_key:
+            self._dedupe[dedupe_key] = job.id
+        self._pending += 1
+        self._queues.setdefault(session_id, deque()).append(job)
+        if session_id not in self._scheduled:
+            self._schedule(session_id)
+        self._record(job)
+        return job
+
+    async def wait(self, job: Job) -> Job:
+        """Wait until a job submitted to this queue has completed or failed"""
+        await job.finished.wait()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.records is not None:
+            return self.records.load(job_id)
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            await self._wakeup.acquire()
+            _, _, session_id = heapq.heappop(self._ready)
+            queue = self._queues[session_id]
+            job = queue.popleft()
+            self._pending -= 1
+            await self._run(job)
+
+            if queue:
+                # requeue behind sessions already waiting at the same priority
+                self._schedule(session_id)
+            else:
+                del self._queues[session_id]
+                self._scheduled.discard(session_id)
+            self._trim()
+
+    async def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        self._record(job)
+        token = _current_job.set((self, job))
+        try:
+            job.result = await job.run()
+            job.status = "completed"
+        except Exception as e:
+            job.status = "failed"
+            job.error = getattr(e, "detail", None) or str(e)
+            job.status_code = getattr(e, "status_code", 500)
+        finally:
+            _current_job.reset(token)
+        job.finished_at = time.time()
+        job.run = None
+        self._record(job)
+        job.finished.set()
+        if job.callback_url:
+            # a slow receiver must not delay the session's next job
+            task = asyncio.get_running_loop().create_task(self._notify(job))
+            self._callbacks.add(task)
+            task.add_done_callback(self._callbacks.discard)
+
+    def _record(self, job: Job) -> None:
+        if self.records is None:
+            return
+        try:
+            self.records.save(job.to_dict())
+        except Exception as e:
+            print(f"Warning: failed to record job {job.id}: {str(e)}")
+
+    async def _notify(self, job: Job) -> None:
+        try:
+            await asyncio.to_thread(self._post_callback, job.callback_url, job.to_dict())
+        except Exception as e:
+            print(f"Warning: callback for job {job.id} to {job.callback_url} failed: {str(e)}")
+
+    def _post_callback(self, url: str, payload: Dict[str, Any]) -> None:
+        # checked again at send time, the host may resolve differently than at submit
+        check_callback_url(url, self.callback_hosts)
+        request = urllib.request.Request(
+            url,
+            data=dumps(payload),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.build_opener(_NoRedirects).open(request, timeout=10) as response:
+            response.read()
+
+    def _trim(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+        if len(self._dedupe) > self.max_finished:
+            self._dedupe = {key: job_id for key, job_id in self._dedupe.items() if job_id in self._jobs}
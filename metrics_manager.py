@@ -1,12 +1,38 @@
 import json
 import os
-import random
-from typing import Dict, Any, Optional, Tuple
+import secrets
+from copy import deepcopy
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+
+from constraint_table import ConstraintTable
+
+# 63 bits keeps the seed a plain signed integer in json and msgpack snapshots and int64 columns
+MAX_SEED = 2 ** 63
+
+def new_seed() -> int:
+    return secrets.randbits(63)
+
+def valid_seed(seed: Any) -> bool:
+    return isinstance(seed, int) and not isinstance(seed, bool) and 0 <= seed < MAX_SEED
 
 class MetricsManager:
-    def __init__(self, metrics_file: str = "metrics_data.json"):
+    def __init__(
+        self,
+        metrics_file: str = "metrics_data.json",
+        metrics_data: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+        constraints: Optional[ConstraintTable] = None
+    ):
         self.metrics_file = metrics_file
-        self.metrics_data = self._load_metrics_data()
+        # shared scenario packs pass their parsed data in, see save_metrics_data for writing a session out
+        self.metrics_data = metrics_data if metrics_data is not None else self._load_metrics_data()
+        self.constraints = constraints if constraints is not None else ConstraintTable(self.metrics_data)
+        self.weekly_metrics: Dict[str, Any] = {}  # weeks this session changed, copied on first write
+        if seed is not None and not valid_seed(seed):
+            raise ValueError(f"seed must be an integer from 0 to {MAX_SEED - 1}")
+        self.seed = seed if seed is not None else new_seed()
+        self.draws: Dict[str, int] = {}  # uncertainty batches drawn per week
         
     def _load_metrics_data(self) -> Dict[str, Any]:
         try:
@@ -18,13 +44,36 @@ class MetricsManager:
             print(f"Error loading metrics data: {str(e)}")
             return {}
             
-    def _save_metrics_data(self) -> None:
+    def save_metrics_data(self, path: Optional[str] = None) -> None:
+        """Write the definitions and this session's weekly metrics, by default over metrics_file"""
         try:
-            with open(self.metrics_file, 'w') as f:
-                json.dump(self.metrics_data, f, indent=4)
+            data = dict(self.metrics_data)
+            data["weekly_metrics"] = {**self.metrics_data.get("weekly_metrics", {}), **self.weekly_metrics}
+            with open(path or self.metrics_file, 'w') as f:
+                json.dump(data, f, indent=4)
         except Exception as e:
             print(f"Error saving metrics data: {str(e)}")
             
+    def get_state(self) -> Dict[str, Any]:
+        """Return the mutable per-session part of the metrics data"""
+        return {"weekly_metrics": self.weekly_metrics, "seed": self.seed, "draws": self.draws}
+        
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        self.weekly_metrics = state.get("weekly_metrics", {})
+        self.seed = state.get("seed", self.seed)
+        self.draws = state.get("draws", {})
+        
+    def get_rng(self, week: int) -> np.random.Generator:
+        """Return the generator for the next uncertainty batch of a week.
+
+        Every (week, batch) pair gets its own stream spawned from the session
+        seed, so a replay with the same seed and decisions draws the same values.
+        """
+        week_key = f"week{week}"
+        batch = self.draws.get(week_key, 0)
+        self.draws[week_key] = batch + 1
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(week, batch)))
+            
     def get_metric_constraints(self, metric_type: str, department: Optional[str] = None) -> Dict[str, Dict[str, float]]:
         if metric_type == "core":
             return self.metrics_data.get("metrics_definitions", {}).get("core", {})
@@ -33,34 +82,63 @@ class MetricsManager:
         return {}
         
     def get_week_metrics(self, week: int) -> Dict[str, Any]:
-        return self.metrics_data.get("weekly_metrics", {}).get(f"week{week}", {})
+        week_key = f"week{week}"
+        if week_key in self.weekly_metrics:
+            return self.weekly_metrics[week_key]
+        return self.metrics_data.get("weekly_metrics", {}).get(week_key, {})
         
-    def apply_uncertainty(self, change: float, uncertainty: float) -> Tuple[float, float]:
-        actual_change = random.uniform(change - uncertainty, change + uncertainty)
+    def get_week_metrics_for_update(self, week: int, department: Optional[str] = None) -> Dict[str, Any]:
+        """Return this session's own copy of a week's metrics, creating it on first use"""
+        week_key = f"week{week}"
+        department = department.upper() if department else department
+        if week_key not in self.weekly_metrics:
+            initial = self.metrics_data.get("weekly_metrics", {}).get(week_key)
+            if initial is not None:
+                self.weekly_metrics[week_key] = deepcopy(initial)
+            else:
+                prev_week = self.get_week_metrics(week - 1) if week > 1 else {}
+                self.weekly_metrics[week_key] = {
+                    "core": deepcopy(prev_week.get("core", {})),
+                    "department": {
+                        department: deepcopy(prev_week.get("department", {}).get(department, {}))
+                    } if department else {},
+                    "changes": {}
+                }
+        return self.weekly_metrics[week_key]
+        
+    def apply_uncertainty(
+        self,
+        change: float,
+        uncertainty: float,
+        rng: Optional[np.random.Generator] = None
+    ) -> Tuple[float, float]:
+        # ad-hoc draws outside a week use the week 0 stream
+        rng = rng if rng is not None else self.get_rng(0)
+        actual_change = float(rng.uniform(change - uncertainty, change + uncertainty))
         return actual_change, uncertainty
         
-    def update_week_metrics(self, week: int, department: str, changes: Dict[str, float]) -> Dict[str, Dict[str, Tuple[float, float]]]:
-        week_key = f"week{week}"
+    def update_week_metrics(
+        self,
+        week: int,
+        department: str,
+        changes: Dict[str, float]
+    ) -> Dict[str, Dict[str, Tuple[float, float]]]:
         actual_changes = {"core": {}, "department": {}}
+        # metrics_data keys departments in upper case, scenarios spell them "Product"
+        department = department.upper()
         
-        if week_key not in self.metrics_data.get("weekly_metrics", {}):
-            prev_week = self.get_week_metrics(week - 1) if week > 1 else {}
-            self.metrics_data.setdefault("weekly_metrics", {})[week_key] = {
-                "core": prev_week.get("core", {}),
-                "department": {
-                    department: prev_week.get("department", {}).get(department, {})
-                },
-                "changes": {}
-            }
-            
-        week_data = self.metrics_data["weekly_metrics"][week_key]
-        for metric, change in changes.items():
+        week_data = self.get_week_metrics_for_update(week, department)
+        metrics, ids, requested, unknown = self.constraints.resolve(changes, department)
+        for metric in unknown:
+            print(f"Warning: Unknown metric {metric} not applied")
+        
+        # one batched draw for the whole change set from this week's stream
+        uncertainties = self.constraints.uncertainty[ids]
+        sampled = self.get_rng(week).uniform(requested - uncertainties, requested + uncertainties) if metrics else []
+        
+        for metric, uncertainty_used, actual_change in zip(metrics, uncertainties.tolist(), sampled):
             category, metric_name = metric.split('.')
-            constraints = self.get_metric_constraints(category, department if category == "department" else None)
-            uncertainty = constraints[metric_name].get("uncertainty_range", 0)
-            
-            actual_change, uncertainty_used = self.apply_uncertainty(change, uncertainty)
-            
+            actual_change = float(actual_change)
             if category == "core":
                 current = week_data["core"].get(metric_name, 0)
                 week_data["core"][metric_name] = current * (1 + actual_change/100)
@@ -73,28 +151,127 @@ class MetricsManager:
                 actual_changes["department"][metric_name] = (actual_change, uncertainty_used)
                 
         week_data["changes"] = actual_changes
-        self._save_metrics_data()
         return actual_changes
         
-    def validate_changes(self, changes: Dict[str, float], department: str) -> bool:
+    def apply_impacts(self, week: int, department: str, changes: Dict[str, float]) -> Dict[str, float]:
+        """Apply exact percentage changes without uncertainty, used for scenario events.
+
+        A department metric the week does not track yet starts from its latest
+        value in an earlier week; one never tracked is reported and skipped.
+        """
+        department = department.upper()
+        week_data = self.get_week_metrics_for_update(week, department)
+        applied = {}
         for metric, change in changes.items():
             category, metric_name = metric.split('.')
-            constraints = self.get_metric_constraints(category, department if category == "department" else None)
-            
-            if metric_name in constraints:
-                min_change = constraints[metric_name]["min_change"]
-                max_change = constraints[metric_name]["max_change"]
-                uncertainty = constraints[metric_name].get("uncertainty_range", 0)
-                
-                if not (min_change <= change - uncertainty and change + uncertainty <= max_change):
-                    print(f"Warning: Change for {metric} ({change}% ± {uncertainty}%) outside allowed range [{min_change}%, {max_change}%]")
-                    return False
+            if category == "core":
+                values = week_data["core"]
             else:
-                print(f"Warning: Unknown metric {metric}")
-                return False
-                
-        return True
+                values = week_data["department"].setdefault(department, {})
+                if metric_name not in values:
+                    earlier = (
+                        self.get_week_metrics(previous).get("department", {}).get(department, {}).get(metric_name)
+                        for previous in range(week - 1, 0, -1)
+                    )
+                    latest = next((value for value in earlier if value is not None), None)
+                    if latest is not None:
+                        values[metric_name] = latest
+            if metric_name in values:
+                values[metric_name] = values[metric_name] * (1 + change/100)
+                applied[metric] = change
+            else:
+                print(f"Warning: {department} {metric} has no value in week {week} or before, impact not applied")
+        return applied
+        
+    def check_changes(self, changes: Dict[str, float], department: str) -> List[Dict[str, Any]]:
+        """Return every constraint violation in a change set, empty when it is valid"""
+        return self.constraints.check(changes, department)
         
+    def clamp_changes(self, changes: Dict[str, float], department: str) -> Dict[str, float]:
+        """Return the change set clipped into its allowed ranges, unknown metrics dropped"""
+        return self.constraints.clamp(changes, department)
+        
+    def validate_changes(self, changes: Dict[str, float], department: str) -> bool:
+        violations = self.check_changes(changes, department)
+        for violation in violations:
+            if violation["reason"] == "unknown_metric":
+                print(f"Warning: Unknown metric {violation['metric']}")
+            else:
+                print(f"Warning: Change for {violation['metric']} ({violation['change']}% ± {violation['uncertainty']}%) "
+                      f"outside allowed range [{violation['min_change']}%, {violation['max_change']}%]")
+        return not violations
+        
+    def compare_candidates(
+        self,
+        week: int,
+        department: str,
+        candidates: List[Dict[str, float]],
+        weights: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """Project a week's metrics under K candidate change sets and rank them.
+
+        All candidates are evaluated in one pass over a K x M matrix of
+        percentage changes, using the same multiplicative update as
+        update_week_metrics with the uncertainty range as low/high bounds.
+        Nothing is drawn or stored. Candidates are ranked valid first, then by
+        weighted mean expected change across all metrics, then by lower risk.
+        """
+        department = department.upper()
+        allowed = self.get_allowed_metrics(department)
+        week_data = self.get_week_metrics(week)
+        current = {
+            "core": week_data.get("core", {}),
+            "department": week_data.get("department", {}).get(department, {})
+        }
+        metric_ids = [f"{category}.{name}" for category in ("core", "department") for name in allowed[category]]
+        column = {metric: i for i, metric in enumerate(metric_ids)}
+
+        base = np.array([float(current[m.split('.')[0]].get(m.split('.')[1], 0)) for m in metric_ids])
+        uncertainty = self.constraints.uncertainty[[self.constraints.lookup(m, department) for m in metric_ids]]
+        weight = np.array([float((weights or {}).get(m, 1.0)) for m in metric_ids])
+
+        requested = np.zeros((len(candidates), len(metric_ids)))
+        touched = np.zeros((len(candidates), len(metric_ids)), dtype=bool)
+        violations = []
+        for row, changes in enumerate(candidates):
+            for metric, change in changes.items():
+                if metric in column:
+                    requested[row, column[metric]] = change
+                    touched[row, column[metric]] = True
+            violations.append(self.check_changes(changes, department))
+        valid = [not found for found in violations]
+
+        spread = uncertainty * touched
+        expected = base * (1 + requested / 100)
+        low = base * (1 + (requested - spread) / 100)
+        high = base * (1 + (requested + spread) / 100)
+        total_weight = weight.sum() or 1.0
+        scores = (requested * weight).sum(axis=1) / total_weight
+        risks = (spread * weight).sum(axis=1) / total_weight
+
+        order = sorted(range(len(candidates)), key=lambda row: (not valid[row], -scores[row], risks[row]))
+        results = []
+        for rank, row in enumerate(order, start=1):
+            results.append({
+                "rank": rank,
+                "index": row,
+                "changes": candidates[row],
+                "valid": valid[row],
+                "violations": violations[row],
+                "score": round(float(scores[row]), 4),
+                "risk": round(float(risks[row]), 4),
+                "projected": {
+                    metric: {
+                        "current": float(base[col]),
+                        "expected": float(expected[row, col]),
+                        "low": float(low[row, col]),
+                        "high": float(high[row, col])
+                    }
+                    for metric, col in column.items() if touched[row, col]
+                }
+            })
+        return results
+
     def get_allowed_metrics(self, department: str) -> Dict[str, Dict[str, Dict[str, float]]]:
         return {
             "core": self.get_metric_constraints("core"),
@@ -0,0 +1,113 @@
+import math
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+
+from similarity_index import features
+
+ALIGNMENT_KEYS = (
+    "strategic_alignment",
+    "initiative_coverage",
+    "risk_assessment",
+    "resource_allocation",
+    "timeline_feasibility"
+)
+RISK_TERMS = set(features("risk mitigate mitigation contingency fallback backup buffer monitor rollback"))
+TIME_TERMS = set(features("week month quarter phase timeline milestone deadline schedule day"))
+# overall scores in this band are where the local scorer is least sure, see borderline()
+BORDERLINE = (0.4, 0.6)
+
+
+class PlanAlignmentScorer:
+    """Score how well user plans follow the CEO's execution plan, without a model call.
+
+    The CEO plan is compiled once per scenario: every key initiative and
+    timeline milestone becomes an IDF-weighted term vector over a small
+    vocabulary (the plan's own hashed terms plus risk and timing words), and
+    the resource allocation becomes a vector of budget targets. Scoring a
+    batch of plans is one presence matrix and a few matrix products:
+
+    - initiative_coverage: mean share of each initiative's weighted terms the plan mentions
+    - timeline_feasibility: milestone coverage plus whether the plan talks about timing at all
+    - risk_assessment: how many risk and mitigation terms appear, saturating at three
+    - resource_allocation: each budget mentioned in the plan against its target;
+      within 50-100% of the target scores 1, overspending drops to 0 at twice the target,
+      a budget the plan does not mention scores 0.5
+    - strategic_alignment: a blend of the three plan-specific scores above
+    """
+
+    def __init__(self, ceo_plan: Dict[str, Any], scenario=None):
+        self.scenario = scenario
+        objectives = ceo_plan.get("quarterly_objectives", ceo_plan)
+        initiatives = [str(item) for item in objectives.get("key_initiatives", [])]
+        milestones = [str(item.get("milestone", "")) for item in objectives.get("timeline_milestones", [])]
+        self.budget_targets = {
+            name: float(value) for name, value in objectives.get("resource_allocation", {}).items()
+            if isinstance(value, (int, float)) and value > 0
+        }
+
+        documents = [set(features(text)) for text in initiatives + milestones]
+        vocabulary = sorted(set().union(*documents, RISK_TERMS, TIME_TERMS))
+        self.columns = {bucket: index for index, bucket in enumerate(vocabulary)}
+        frequency = {bucket: sum(bucket in terms for terms in documents) for bucket in vocabulary}
+        idf = np.array([math.log((1 + len(documents)) / (1 + frequency[bucket])) + 1 for bucket in vocabulary])
+
+        self.initiatives = self._weights(documents[:len(initiatives)], idf)
+        self.milestones = self._weights(documents[len(initiatives):], idf)
+        self.risk = self._mask(RISK_TERMS)
+        self.timing = self._mask(TIME_TERMS)
+        self.targets = np.array(list(self.budget_targets.values()))
+
+    def _weights(self, documents: List[set], idf: np.ndarray) -> np.ndarray:
+        """Rows of IDF weights per document, normalized so a row sums to 1"""
+        weights = np.zeros((len(documents), len(self.columns)))
+        for row, terms in enumerate(documents):
+            for bucket in terms:
+                weights[row, self.columns[bucket]] = idf[self.columns[bucket]]
+        totals = weights.sum(axis=1, keepdims=True)
+        return np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+    def _mask(self, terms: set) -> np.ndarray:
+        mask = np.zeros(len(self.columns))
+        mask[[self.columns[bucket] for bucket in terms]] = 1
+        return mask
+
+    def presence(self, plans: Sequence[str]) -> np.ndarray:
+        """(plans, vocabulary) matrix of which vocabulary terms each plan mentions"""
+        matrix = np.zeros((len(plans), len(self.columns)))
+        for row, plan in enumerate(plans):
+            for bucket in features(plan):
+                column = self.columns.get(bucket)
+                if column is not None:
+                    matrix[row, column] = 1
+        return matrix
+
+    def budget_scores(self, budgets: Sequence[Dict[str, float]]) -> np.ndarray:
+        if not len(self.targets):
+            return np.full(len(budgets), 0.5)
+        amounts = np.array([[float(b.get(name) or 0) for name in self.budget_targets] for b in budgets]).reshape(len(budgets), -1)
+        ratio = amounts / self.targets
+        scores = np.where(ratio > 1, np.clip(2 - ratio, 0, 1), np.where(ratio >= 0.5, 1.0, 0.5 + ratio))
+        return np.where(amounts > 0, scores, 0.5).mean(axis=1)
+
+    def score_batch(self, plans: Sequence[str], budgets: Optional[Sequence[Dict[str, float]]] = None) -> np.ndarray:
+        """Return a (plans, 5) array of scores in [0, 1], columns in ALIGNMENT_KEYS order"""
+        present = self.presence(plans)
+        initiative = (present @ self.initiatives.T).mean(axis=1) if len(self.initiatives) else np.full(len(plans), 0.5)
+        milestone = (present @ self.milestones.T).mean(axis=1) if len(self.milestones) else np.full(len(plans), 0.5)
+        timing = np.minimum(1, present @ self.timing / 2)
+        risk = np.minimum(1, present @ self.risk / 3)
+        resources = self.budget_scores(budgets if budgets is not None else [{}] * len(plans))
+        timeline = 0.5 * milestone + 0.5 * timing
+        strategic = 0.5 * initiative + 0.25 * milestone + 0.25 * resources
+        return np.clip(np.column_stack([strategic, initiative, risk, resources, timeline]), 0, 1)
+
+    def score(self, plan: str, budgets: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        row = self.score_batch([plan], [budgets or {}])[0]
+        return {key: round(float(value), 3) for key, value in zip(ALIGNMENT_KEYS, row)}
+
+    @staticmethod
+    def borderline(scores: np.ndarray) -> np.ndarray:
+        """Which rows have an overall score the local scorer cannot call either way"""
+        overall = np.atleast_2d(scores).mean(axis=1)
+        return (overall >= BORDERLINE[0]) & (overall <= BORDERLINE[1])
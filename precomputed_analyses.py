@@ -0,0 +1,215 @@
+"""Precomputed agent analyses of every scenario week's possible_approaches.
+
+Usage: python precomputed_analyses.py [--scenario default] [--max-combination 2] [--concurrency 2]
+
+The build runs the department's agents once for each approach of each week
+and for every combination of up to --max-combination approaches, then writes
+the analyses to precomputed_analyses.json next to the pack's
+simulation_data.json. The artifact records the scenario digest; after an edit
+to the scenario it is ignored until it is built again.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+from itertools import combinations
+from typing import Dict, List, Any, Optional, Tuple
+
+from similarity_index import NEGATION_PATTERN, features
+
+ARTIFACT_NAME = "precomputed_analyses.json"
+ARTIFACT_VERSION = 1
+DEFAULT_THRESHOLD = 0.8
+MIN_COVERAGE = 0.8  # share of an entry's weighted terms the decision has to mention
+
+
+def artifact_path(scenario_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(scenario_path)), ARTIFACT_NAME)
+
+
+def approach_decisions(approaches, max_combination: int = 2) -> List[Tuple[Tuple[str, ...], str]]:
+    """Every approach and combination of approaches with the decision text that stands for it"""
+    decisions = []
+    for size in range(1, min(max_combination, len(approaches)) + 1):
+        for combination in combinations(approaches, size):
+            text = combination[0] + "".join(f" and {approach[:1].lower()}{approach[1:]}" for approach in combination[1:])
+            decisions.append((combination, text))
+    return decisions
+
+
+class PrecomputedEntry:
+    __slots__ = ("approaches", "decision", "weights", "norm", "analysis")
+
+    def __init__(self, approaches: Tuple[str, ...], decision: str, weights: Dict[int, float], analysis: Dict[str, Any]):
+        self.approaches = approaches
+        self.decision = decision
+        self.weights = weights
+        self.norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        self.analysis = analysis
+
+
+class PrecomputedAnalyses:
+    """Match incoming decisions to the analyses of a pack's possible approaches.
+
+    Entries are grouped by week and department. Term weights use inverse
+    document frequency within the week, so the words that tell its approaches
+    apart count most, and words none of them use weigh like the rarest. A
+    decision matches an entry when it mentions at least MIN_COVERAGE of the
+    entry's weighted terms; of those, the entry with the highest cosine
+    similarity wins if it reaches the threshold. This prefers "Hire
+    contractors and reduce feature scope" over "Hire contractors" alone when
+    the decision names both.
+
+    Serving the analysis of the wrong decision is far worse than running the
+    agents, so matching is deliberately strict. Against the default scenario's
+    week 1, "Hiring contractors" and "We will hire contractors" match at 1.0,
+    while "Hire more contractors" (0.6), "We should hire contractors to hit
+    the deadline" (0.4) and "fire all contractors and postpone hiring" (0.44)
+    fall below the default threshold of 0.8 and run the agents. Decisions with
+    a negation ("Do not hire contractors", "don't reduce feature scope") are
+    never matched.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], threshold: float = DEFAULT_THRESHOLD, scenario=None, mtime: float = 0.0):
+        self.threshold = threshold
+        self.scenario = scenario
+        self.mtime = mtime
+        grouped: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+        for entry in entries:
+            grouped.setdefault((entry["week"], entry["department"].upper()), []).append(entry)
+
+        self._idf: Dict[Tuple[int, str], Dict[int, float]] = {}
+        self._unseen_idf: Dict[Tuple[int, str], float] = {}
+        self._entries: Dict[Tuple[int, str], List[PrecomputedEntry]] = {}
+        for key, group in grouped.items():
+            terms = [features(entry["decision"]) for entry in group]
+            frequency: Dict[int, int] = {}
+            for counts in terms:
+                for bucket in counts:
+                    frequency[bucket] = frequency.get(bucket, 0) + 1
+            idf = self._idf[key] = {
+                bucket: math.log((1 + len(group)) / (1 + count)) + 1 for bucket, count in frequency.items()
+            }
+            self._unseen_idf[key] = math.log(1 + len(group)) + 1
+            self._entries[key] = [
+                PrecomputedEntry(
+                    tuple(entry["approaches"]),
+                    entry["decision"],
+                    {bucket: count * idf[bucket] for bucket, count in counts.items()},
+                    entry["analysis"]
+                )
+                for entry, counts in zip(group, terms)
+            ]
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    @classmethod
+    def load(cls, path: str, scenario, threshold: Optional[float] = None) -> "PrecomputedAnalyses":
+        """Read an artifact, or return an empty matcher when it is missing or was built for other content"""
+        if threshold is None:
+            threshold = float(os.getenv("SIMULATION_PRECOMPUTED_THRESHOLD", str(DEFAULT_THRESHOLD)))
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return cls([], threshold, scenario)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: cannot read precomputed analyses {path}: {str(e)}")
+            return cls([], threshold, scenario, mtime)
+        if data.get("version") != ARTIFACT_VERSION or data.get("scenario_digest") != scenario.digest:
+            print(f"Warning: {path} was built for other scenario content, rebuild it with precomputed_analyses.py")
+            return cls([], threshold, scenario, mtime)
+        return cls(data.get("entries", []), threshold, scenario, mtime)
+
+    def match(self, week: int, department: str, decision: str) -> Optional[Tuple[float, PrecomputedEntry]]:
+        """Return the similarity and entry standing for a decision, or None"""
+        key = (week, department.upper())
+        entries = self._entries.get(key)
+        counts = features(decision)
+        if not entries or not counts or NEGATION_PATTERN.search(decision.lower()):
+            return None
+        idf = self._idf[key]
+        # a word no approach of the week uses weighs as much as the rarest approach word,
+        # so every extra action or qualifier in the decision pulls the similarity down
+        unseen = self._unseen_idf[key]
+        query = {bucket: count * idf.get(bucket, unseen) for bucket, count in counts.items()}
+        query_norm = math.sqrt(sum(weight * weight for weight in query.values()))
+        best = None
+        for entry in entries:
+            covered = sum(weight for bucket, weight in entry.weights.items() if bucket in query)
+            if not entry.norm or covered < MIN_COVERAGE * sum(entry.weights.values()):
+                continue
+            similarity = sum(weight * entry.weights.get(bucket, 0.0) for bucket, weight in query.items()) / (query_norm * entry.norm)
+            if best is None or similarity > best[0]:
+                best = (similarity, entry)
+        if best is not None and best[0] >= self.threshold:
+            return best
+        return None
+
+
+async def build(scenario: str, max_combination: int = 2, concurrency: int = 2, output: Optional[str] = None) -> str:
+    """Run the agents on every approach and combination of the pack and write the artifact"""
+    from scenario_catalog import get_catalog
+    from simulation_manager import SimulationManager
+
+    pack = get_catalog().get(scenario)
+    semaphore = asyncio.Semaphore(concurrency)
+    output = output or artifact_path(pack.scenario_path)
+
+    async def analyse(challenge, approaches, decision):
+        async with semaphore:
+            print(f"Week {challenge.week} ({challenge.department}): {decision}")
+            # agents keep their whole conversation as model context, every approach gets new ones
+            # so no stored analysis carries the discussion of another
+            simulation = SimulationManager(scenario=scenario)
+            analysis = await simulation._run_analysis(challenge.week, decision, challenge.department)
+        if "error" in analysis:
+            print(f"Warning: skipped week {challenge.week} '{decision}': {analysis['error']}")
+            return None
+        return {
+            "week": challenge.week,
+            "department": challenge.department.upper(),
+            "approaches": list(approaches),
+            "decision": decision,
+            "analysis": analysis
+        }
+
+    content = pack.scenario
+    results = await asyncio.gather(*(
+        analyse(challenge, approaches, decision)
+        for challenge in content.weeks
+        for approaches, decision in approach_decisions(challenge.possible_approaches, max_combination)
+    ))
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "scenario": scenario,
+        "scenario_digest": content.digest,
+        "max_combination": max_combination,
+        "entries": [entry for entry in results if entry is not None]
+    }
+    # write next to the final name first, a running server never reads a half-written artifact
+    with open(f"{output}.tmp", 'w') as f:
+        json.dump(artifact, f, indent=2)
+    os.replace(f"{output}.tmp", output)
+    return output
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", default="default", help="scenario pack to build")
+    parser.add_argument("--max-combination", type=int, default=2, help="largest number of approaches analysed together")
+    parser.add_argument("--concurrency", type=int, default=2, help="agent discussions running at once")
+    parser.add_argument("--output", help=f"artifact path (default: {ARTIFACT_NAME} next to the scenario file)")
+    args = parser.parse_args()
+    path = asyncio.run(build(args.scenario, args.max_combination, args.concurrency, args.output))
+    print(f"Wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
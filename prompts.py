@@ -0,0 +1,126 @@
+from typing import Dict, List, Any, Optional, Tuple
+
+from scenario import Scenario, WeeklyChallenge
+
+# Identical for every analysis in every session, so it always comes first:
+# providers cache prompts by prefix and this part is paid for once.
+ANALYSIS_INSTRUCTIONS = """You are advising on a business decision for one week of a company simulation.
+The week's situation, resources, constraints and the metrics you may adjust are given below,
+followed by the user's decision. Use the given numbers instead of asking for them.
+
+Focus on:
+1. Impact on core metrics (revenue, profit margin, satisfaction)
+2. Impact on department metrics
+3. Implementation steps and timeline within the resources and constraints
+
+Format your response with:
+FEEDBACK RESPONSE: (only when the user gave feedback)
+- [Point-by-point response to user's concerns]
+
+UPDATED RECOMMENDATIONS: (only when the user gave feedback)
+- [Modified recommendations]
+
+METRIC ADJUSTMENTS:
+- [category.metric_name]: [+/-X%] (with justification)
+Only use metrics from the allowed list and keep each change inside its range.
+
+IMPLEMENTATION STEPS:
+1. [Step 1]
+2. [Step 2]
+...
+
+RISKS AND MITIGATION:
+- [Risk]: [Mitigation Strategy]
+"""
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def format_allowed_metrics(definitions: Dict[str, Any], department: str) -> List[str]:
+    lines = []
+    groups = (
+        ("core", definitions.get("core", {})),
+        ("department", definitions.get("department", {}).get(department.upper(), {}))
+    )
+    for category, metrics in groups:
+        for metric, limits in metrics.items():
+            lines.append(
+                f"- {category}.{metric}: {limits['min_change']:+g}% to {limits['max_change']:+g}% "
+                f"(outcome varies by ±{limits.get('uncertainty_range', 0):g}%)"
+            )
+    return lines
+
+
+def context_block(challenge: WeeklyChallenge, department: str, definitions: Dict[str, Any]) -> str:
+    """Render the shared context of one week: challenge, resources, constraints and allowed metrics"""
+    lines = [
+        f"WEEK {challenge.week} - {department.upper()}",
+        f"Situation: {challenge.situation}",
+        "",
+        "Available resources:"
+    ]
+    lines += [f"- {name}: {_format_value(value)}" for name, value in challenge.available_resources.items()]
+    lines += ["", "Constraints:"]
+    lines += [f"- {name}: {_format_value(value)}" for name, value in challenge.constraints.items()]
+    lines += ["", "Allowed metric adjustments:"]
+    lines += format_allowed_metrics(definitions, department)
+    return "\n".join(lines)
+
+
+class PromptTemplates:
+    """Analysis prompts assembled from blocks compiled once per scenario pack.
+
+    Every prompt is laid out from most to least shared: the fixed
+    instructions, then the week's context block (the same for every session
+    playing that week), then the session's own decision and feedback. Week
+    blocks are rendered when the pack loads, so building a prompt per request
+    is a dict lookup and a join.
+    """
+
+    def __init__(self, scenario: Scenario, metrics_data: Dict[str, Any]):
+        self.scenario = scenario
+        self.definitions = metrics_data.get("metrics_definitions", {})
+        self._blocks: Dict[Tuple[int, str], str] = {}
+        for challenge in scenario.weeks:
+            self._blocks[(challenge.week, challenge.department.upper())] = context_block(
+                challenge, challenge.department, self.definitions
+            )
+
+    def week_context(self, week: int, department: str) -> str:
+        key = (week, department.upper())
+        block = self._blocks.get(key)
+        if block is None:
+            challenge = self.scenario.challenge(week)
+            if challenge is None:
+                return f"Department: {department}\nAllowed metric adjustments:\n" + "\n".join(
+                    format_allowed_metrics(self.definitions, department)
+                )
+            # a department other than the week's own, rendered once on first use
+            block = self._blocks[key] = context_block(challenge, department, self.definitions)
+        return block
+
+    def analysis_task(
+        self,
+        week: int,
+        department: str,
+        decision: str,
+        feedback: Optional[str] = None,
+        specific_recommendations: Optional[List[str]] = None,
+        resource_changes: Optional[Dict[str, float]] = None
+    ) -> str:
+        parts = [ANALYSIS_INSTRUCTIONS, self.week_context(week, department), ""]
+        if resource_changes:
+            parts.append("Resource changes from earlier events:")
+            parts += [f"- {name}: {delta:+g}" for name, delta in resource_changes.items()]
+            parts.append("")
+        parts.append(f"User's Decision: {decision}")
+        if feedback:
+            parts += ["", "User's Feedback on Previous Recommendations:", feedback]
+        if specific_recommendations:
+            parts += ["", "Specific Recommendations to Address:"]
+            parts += [f"- {rec}" for rec in specific_recommendations]
+        return "\n".join(parts)
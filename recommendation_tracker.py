@@ -1,25 +1,127 @@
+import hashlib
 import json
+import math
 import re
-from typing import Dict, Any
-from openai import OpenAI
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Iterable, Optional
 from dotenv import load_dotenv
 import os
 
+from reports import Section, iter_report, write_report
+
+# agents repeat themselves across sessions analysing the same decision, and
+# extraction runs at temperature 0, so identical messages are extracted once
+MAX_CACHED_EXTRACTIONS = 1024
+_extractions: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+_extractions_lock = threading.Lock()
+
+def merge_recommendations(decisions: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+    """Merge per-agent change sets into one: the mean change per metric over the agents
+    that proposed it, so the result does not depend on speaking order"""
+    proposals: Dict[str, list] = {}
+    for recommendations in decisions.values():
+        for metric, value in (recommendations or {}).items():
+            try:
+                proposals.setdefault(metric, []).append(float(value))
+            except (TypeError, ValueError):
+                continue
+    return {metric: sum(values) / len(values) for metric, values in proposals.items()}
+
+class MetricStats:
+    """Running weighted mean and spread of one metric's proposed changes"""
+    
+    __slots__ = ("count", "weight", "mean", "m2", "agents")
+    
+    def __init__(self):
+        self.count = 0
+        self.weight = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.agents = set()
+        
+    def add(self, agent: str, value: float, weight: float = 1.0) -> None:
+        # weighted Welford update, stable and O(1) per proposal
+        self.count += 1
+        self.weight += weight
+        delta = value - self.mean
+        self.mean += delta * weight / self.weight
+        self.m2 += weight * delta * (value - self.mean)
+        self.agents.add(agent)
+        
+    @property
+    def spread(self) -> float:
+        """Weighted standard deviation of the proposals, how much the agents disagree"""
+        return math.sqrt(self.m2 / self.weight) if self.weight else 0.0
+        
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mean": self.mean,
+            "count": self.count,
+            "agents": sorted(self.agents),
+            "spread": self.spread
+        }
+
+class RecommendationAggregate:
+    """Consensus over every proposal of every agent and turn, updated as messages arrive.
+
+    Each extracted change counts with its agent's weight (default 1), so an
+    agent that revises its numbers moves the consensus instead of replacing
+    its earlier view, and reading the consensus never rescans the discussion.
+    """
+    
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = weights or {}
+        self.stats: Dict[str, MetricStats] = {}
+        self.changes: Dict[str, float] = {}
+        
+    def add(self, agent: str, recommendations: Dict[str, Any]) -> None:
+        weight = self.weights.get(agent, 1.0)
+        for metric, value in recommendations.items():
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+            stats = self.stats.get(metric)
+            if stats is None:
+                stats = self.stats[metric] = MetricStats()
+            stats.add(agent, value, weight)
+            self.changes[metric] = stats.mean
+            
+    def consensus(self) -> Dict[str, float]:
+        return dict(self.changes)
+        
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {metric: stats.to_dict() for metric, stats in self.stats.items()}
+
 class RecommendationTracker:
     """Track and manage recommendations from AI agents"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        on_update: Optional[Callable[["RecommendationTracker"], None]] = None,
+        metrics: Optional[Dict[str, Iterable[str]]] = None
+    ):
         self.messages = []
-        self.decisions = {}
+        self.decisions = {}  # each agent's latest recommendations
+        self.aggregate = RecommendationAggregate(weights)
+        self.on_update = on_update
         load_dotenv()
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self._openai_client = None
         
-        # define available metrics
-        self.metrics = {
-            "core": ["revenue", "profit_margin", "customer_satisfaction", "employee_satisfaction"],
-            "department": ["sales_growth", "operational_efficiency", "innovation_index", "market_share"],
-            "research_and_development": ["research_budget", "development_speed", "innovation_rate"]
-        }
+        # metrics the extractor may emit, category -> names; pass the department's
+        # allowed metrics so every extracted change is one the commit can apply
+        if metrics is None:
+            metrics = {"core": ["revenue", "profit_margin", "customer_satisfaction", "employee_satisfaction"]}
+        self.metrics = {category: list(names) for category, names in metrics.items()}
+
+    @property
+    def openai_client(self):
+        if self._openai_client is None:
+            from openai import OpenAI
+            self._openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._openai_client
 
     def extract_recommendations_with_gpt(self, content: str) -> Dict[str, float]:
         """Use GPT to extract metric recommendations from agent message"""
@@ -27,6 +129,17 @@ class RecommendationTracker:
         for category, metrics in self.metrics.items():
             for metric in metrics:
                 metric_list.append(f"{category}.{metric}")
+        # the same message extracts differently against another department's metrics
+        key = hashlib.sha256(json.dumps([content, metric_list]).encode("utf-8")).hexdigest()
+        with _extractions_lock:
+            if key in _extractions:
+                _extractions.move_to_end(key)
+                return dict(_extractions[key])
+        if not metric_list:
+            return {}
+        # a core and a department metric when there are both, so the model sees each naming
+        examples = dict.fromkeys((metric_list[0], metric_list[-1]))
+        example = ",\n            ".join(f'"{metric}": {value}' for metric, value in zip(examples, (15, -5)))
         
         prompt = f"""
         Extract numerical recommendations from the following message. 
@@ -43,8 +156,7 @@ class RecommendationTracker:
         
         Example format:
         {{
-            "core.revenue": 15,
-            "department.operational_efficiency": -5
+            {example}
         }}
         """
         
@@ -57,17 +169,28 @@ class RecommendationTracker:
             
             recommendations_str = response.choices[0].message.content.strip()
             try:
-                return json.loads(recommendations_str)
+                recommendations = json.loads(recommendations_str)
             except json.JSONDecodeError:
                 print(f"Error parsing GPT response: {recommendations_str}")
                 return {}
+            if not isinstance(recommendations, dict):
+                print(f"Unexpected GPT response: {recommendations_str}")
+                return {}
+            allowed = set(metric_list)
+            recommendations = {metric: value for metric, value in recommendations.items() if metric in allowed}
                 
         except Exception as e:
             print(f"Error calling GPT API: {str(e)}")
             return {}
+        
+        with _extractions_lock:
+            _extractions[key] = recommendations
+            while len(_extractions) > MAX_CACHED_EXTRACTIONS:
+                _extractions.popitem(last=False)
+        return dict(recommendations)
 
-    def process_message(self, sender: str, content: str):
-        """Process a message and extract metric recommendations using GPT"""
+    def process_message(self, sender: str, content: str) -> Dict[str, float]:
+        """Process a message and extract metric recommendations using GPT, returns what it contributed"""
         self.messages.append({
             "agent": sender,
             "content": content
@@ -78,21 +201,46 @@ class RecommendationTracker:
         # store recommendations for this agent
         if recommendations:
             self.decisions[sender] = recommendations
+            self.aggregate.add(sender, recommendations)
+        if self.on_update is not None:
+            self.on_update(self)
+        return recommendations
     
-    def save_conversation(self, filename: str):
+    def consensus(self) -> Dict[str, float]:
+        """The change set the agents currently agree on, see RecommendationAggregate"""
+        return self.aggregate.consensus()
+    
+    def conversation_section(self) -> Section:
+        return Section(
+            "Conversation",
+            ("agent", "content"),
+            ((msg['agent'], msg['content']) for msg in self.messages),
+            text_row=lambda row: f"\n{row[0]}:\n{row[1]}\n" + "-" * 50
+        )
+
+    def recommendations_section(self) -> Section:
+        last_agent = [None]
+
+        def text_row(row) -> str:
+            agent, metric, value = row
+            line = f"    - {metric}: {value}%"
+            if agent != last_agent[0]:
+                last_agent[0] = agent
+                line = f"\n{agent}'s Approved Recommendations:\n" + line
+            return line
+
+        return Section(
+            "Final Implementation Report",
+            ("agent", "metric", "change"),
+            ((agent, metric, value) for agent, recommendations in self.decisions.items()
+             for metric, value in (recommendations or {}).items()),
+            text_row=text_row
+        )
+
+    def save_conversation(self, filename: str, fmt: str = "text"):
         """Save the entire conversation to a file"""
-        with open(filename, 'w') as f:
-            for msg in self.messages:
-                f.write(f"\n{msg['agent']}:\n{msg['content']}\n")  
-                f.write("-" * 50 + "\n")
+        write_report(iter_report([self.conversation_section()], fmt), filename)
     
-    def save_final_report(self, filename: str):
+    def save_final_report(self, filename: str, fmt: str = "text"):
         """Save the final recommendations to a report file"""
-        with open(filename, 'w') as f:
-            f.write("=== Final Implementation Report ===\n\n")
-            for agent, recommendations in self.decisions.items():
-                if recommendations:
-                    f.write(f"\n{agent}'s Approved Recommendations:\n")
-                    for metric, value in recommendations.items():
-                        f.write(f"    - {metric}: {value}%\n")
-            f.write("\n" + "=" * 50 + "\n")
+        write_report(iter_report([self.recommendations_section()], fmt), filename)
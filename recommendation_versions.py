@@ -0,0 +1,84 @@
+import hashlib
+import json
+import time
+from typing import Dict, List, Any, Optional
+
+from recommendation_tracker import merge_recommendations
+
+
+def analysis_digest(analysis: Dict[str, Any]) -> str:
+    encoded = json.dumps(analysis, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def consensus_of(analysis: Dict[str, Any]) -> Dict[str, float]:
+    consensus = analysis.get("consensus")
+    if consensus is None:
+        consensus = merge_recommendations(analysis.get("recommendations") or {})
+    return consensus
+
+
+class RecommendationVersions:
+    """Every analysis of one decision, kept so earlier recommendations can be restored for free.
+
+    Versions live inside the decision dict, so they travel with the session
+    snapshot. Analyses are stored once per content digest and the history
+    only holds small entries pointing at them, so re-running into an
+    identical analysis or switching back and forth costs no extra space.
+    """
+
+    def __init__(self, decision: Dict[str, Any]):
+        self.data = decision.setdefault("versions", {"analyses": {}, "history": []})
+
+    def __len__(self) -> int:
+        return len(self.data["history"])
+
+    def add(self, analysis: Dict[str, Any], source: str, feedback: Optional[str] = None) -> int:
+        digest = analysis_digest(analysis)
+        self.data["analyses"].setdefault(digest, analysis)
+        version = len(self.data["history"]) + 1
+        self.data["history"].append({
+            "version": version,
+            "digest": digest,
+            "source": source,
+            "feedback": feedback,
+            "created_at": time.time()
+        })
+        return version
+
+    def entry(self, version: int) -> Optional[Dict[str, Any]]:
+        if 1 <= version <= len(self.data["history"]):
+            return self.data["history"][version - 1]
+        return None
+
+    def analysis(self, version: int) -> Optional[Dict[str, Any]]:
+        entry = self.entry(version)
+        return self.data["analyses"][entry["digest"]] if entry is not None else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {**entry, "consensus": consensus_of(self.data["analyses"][entry["digest"]])}
+            for entry in self.data["history"]
+        ]
+
+    def diff(self, from_version: int, to_version: int) -> Optional[Dict[str, Any]]:
+        """Compare the consensus change sets of two versions metric by metric"""
+        before = self.analysis(from_version)
+        after = self.analysis(to_version)
+        if before is None or after is None:
+            return None
+        old, new = consensus_of(before), consensus_of(after)
+        changed = {
+            metric: {"from": old[metric], "to": new[metric], "delta": new[metric] - old[metric]}
+            for metric in old.keys() & new.keys() if old[metric] != new[metric]
+        }
+        return {
+            "from_version": from_version,
+            "to_version": to_version,
+            "added": {metric: new[metric] for metric in new.keys() - old.keys()},
+            "removed": {metric: old[metric] for metric in old.keys() - new.keys()},
+            "changed": changed,
+            "unchanged": sorted(metric for metric in old.keys() & new.keys() if old[metric] == new[metric]),
+            "agents_added": sorted(set(after.get("recommendations") or {}) - set(before.get("recommendations") or {})),
+            "agents_removed": sorted(set(before.get("recommendations") or {}) - set(after.get("recommendations") or {}))
+        }
@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+from copy import deepcopy
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+FORMATS = {"text": "text/plain", "csv": "text/csv", "jsonl": "application/x-ndjson"}
+EXTENSIONS = {"text": "txt", "csv": "csv", "jsonl": "jsonl"}
+WRITE_BUFFER = 64 * 1024
+
+
+class Section:
+    """One part of a report: a title, column names and rows produced on demand.
+
+    `rows` is any iterable of tuples in column order, usually a generator, so
+    a section is never held in memory as a whole. `text_row` renders one row
+    for the text format; without it a row is shown as `column: value` pairs.
+    `text_header` prints the column names first, for table-like text rows.
+    """
+
+    def __init__(
+        self,
+        title: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        text_row: Optional[Callable[[Sequence[Any]], str]] = None,
+        text_header: bool = False
+    ):
+        self.title = title
+        self.columns = tuple(columns)
+        self.rows = rows
+        self.text_row = text_row
+        self.text_header = text_header
+
+
+def _text(sections: Iterable[Section]) -> Iterator[str]:
+    for section in sections:
+        yield f"{section.title}\n{'-' * len(section.title)}\n"
+        if section.text_header:
+            yield "  ".join(section.columns) + "\n"
+        for row in section.rows:
+            if section.text_row is not None:
+                yield section.text_row(row) + "\n"
+            else:
+                yield "  ".join(f"{column}: {value}" for column, value in zip(section.columns, row)) + "\n"
+        yield "\n"
+
+
+def _csv(sections: Iterable[Section]) -> Iterator[str]:
+    # one block per section, each with its own header row and a blank line in between
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for index, section in enumerate(sections):
+        if index:
+            yield "\n"
+        writer.writerow(("section", *section.columns))
+        for row in section.rows:
+            writer.writerow((section.title, *row))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _jsonl(sections: Iterable[Section]) -> Iterator[str]:
+    for section in sections:
+        for row in section.rows:
+            yield json.dumps({"section": section.title, **dict(zip(section.columns, row))}, default=str) + "\n"
+
+
+_RENDERERS = {"text": _text, "csv": _csv, "jsonl": _jsonl}
+
+
+def iter_report(sections: Iterable[Section], fmt: str = "text") -> Iterator[str]:
+    """Render sections as text, CSV or JSON lines, one small chunk at a time"""
+    if fmt not in _RENDERERS:
+        raise ValueError(f"Unknown report format: {fmt}, expected one of {', '.join(FORMATS)}")
+    return _RENDERERS[fmt](sections)
+
+
+def write_report(chunks: Iterable[str], filename: str, buffering: int = WRITE_BUFFER) -> None:
+    """Write rendered chunks to a file through a fixed-size buffer"""
+    with open(filename, 'w', buffering=buffering) as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def session_sections(simulation) -> List[Section]:
+    """Report of one API session: decisions, recommendations, applied changes, metrics and the discussions"""
+    # the report streams after the endpoint returns while other requests keep changing
+    # the session in place, so it reads a copy of the state taken now
+    decisions = deepcopy(simulation.user_decisions)
+    weekly = deepcopy(simulation.weekly_decisions)
+    week_metrics = [
+        deepcopy(simulation.metrics_manager.get_week_metrics(week)) for week in range(1, simulation.current_week + 2)
+    ]
+
+    def decision_rows():
+        for decision in decisions:
+            yield decision["week"], decision["id"], decision.get("status"), decision.get("recommendations_version", 1), decision["content"]
+
+    def recommendation_rows():
+        for decision in decisions:
+            for agent, changes in ((decision.get("analysis") or {}).get("recommendations") or {}).items():
+                for metric, change in changes.items():
+                    yield decision["week"], agent, metric, change
+
+    def applied_rows():
+        for week in sorted(weekly):
+            applied = weekly[week].get("applied_changes") or {}
+            for category, changes in (weekly[week].get("actual_changes") or {}).items():
+                for metric, (actual, uncertainty) in changes.items():
+                    yield week, f"{category}.{metric}", applied.get(f"{category}.{metric}"), actual, uncertainty
+
+    def metric_rows():
+        for week, metrics in enumerate(week_metrics, start=1):
+            for metric, value in metrics.get("core", {}).items():
+                yield week, "", f"core.{metric}", value
+            for department, values in metrics.get("department", {}).items():
+                for metric, value in values.items():
+                    yield week, department, f"department.{metric}", value
+
+    def discussion_rows():
+        for decision in decisions:
+            for message in (decision.get("analysis") or {}).get("discussion") or []:
+                yield decision["week"], message["agent"], message["content"]
+
+    return [
+        Section("decisions", ("week", "decision_id", "status", "recommendations_version", "content"), decision_rows()),
+        Section("recommendations", ("week", "agent", "metric", "change"), recommendation_rows()),
+        Section("applied_changes", ("week", "metric", "requested", "actual", "uncertainty"), applied_rows()),
+        Section("metrics", ("week", "department", "metric", "value"), metric_rows()),
+        Section(
+            "discussion",
+            ("week", "agent", "content"),
+            discussion_rows(),
+            text_row=lambda row: f"\nWeek {row[0]} - {row[1]}:\n{row[2]}\n" + "-" * 50
+        )
+    ]
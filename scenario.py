@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+
+class ScenarioError(ValueError):
+    """Raised when scenario data does not match the expected schema"""
+
+
+def _require(data: Dict[str, Any], key: str, expected: type, where: str) -> Any:
+    if key not in data:
+        raise ScenarioError(f"{where}: missing '{key}'")
+    value = data[key]
+    if not isinstance(value, expected):
+        raise ScenarioError(f"{where}: '{key}' must be a {expected.__name__}, got {type(value).__name__}")
+    return value
+
+
+class WeeklyChallenge:
+    """One validated week of a scenario"""
+
+    __slots__ = (
+        "week",
+        "department",
+        "situation",
+        "available_resources",
+        "constraints",
+        "possible_approaches",
+        "unexpected_events",
+        "data"
+    )
+
+    def __init__(self, week: int, data: Dict[str, Any]):
+        where = f"weekly_challenges.week{week}"
+        department = _require(data, "department", str, where)
+        if not department.strip():
+            raise ScenarioError(f"{where}: 'department' must not be empty")
+
+        self.week = week
+        self.department = department
+        self.situation = _require(data, "situation", str, where)
+        self.available_resources = _require(data, "available_resources", dict, where)
+        self.constraints = _require(data, "constraints", dict, where)
+        self.possible_approaches = tuple(_require(data, "possible_approaches", list, where))
+        self.unexpected_events = tuple(data.get("unexpected_events", []))
+
+        for approach in self.possible_approaches:
+            if not isinstance(approach, str):
+                raise ScenarioError(f"{where}: possible_approaches must be strings")
+        for i, event in enumerate(self.unexpected_events):
+            if not isinstance(event, dict):
+                raise ScenarioError(f"{where}.unexpected_events[{i}]: must be an object")
+            _require(event, "trigger", str, f"{where}.unexpected_events[{i}]")
+            _require(event, "event", str, f"{where}.unexpected_events[{i}]")
+            _require(event, "impact", dict, f"{where}.unexpected_events[{i}]")
+            for key, expected in (("target_week", int), ("target_department", str), ("effects", dict)):
+                if key in event:
+                    _require(event, key, expected, f"{where}.unexpected_events[{i}]")
+
+        # the validated source dict, returned as-is by the API so nothing is rebuilt per request
+        self.data = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.data
+
+
+class Scenario:
+    """A compiled scenario pack: challenges indexed by week and by department"""
+
+    __slots__ = ("name", "weeks", "by_department", "total_weeks", "ceo_execution_plan", "agent_personalities", "data", "digest")
+
+    def __init__(self, name: str, data: Dict[str, Any]):
+        if not isinstance(data, dict):
+            raise ScenarioError("Scenario data must be a JSON object")
+        challenges = _require(data, "weekly_challenges", dict, "scenario")
+        if not challenges:
+            raise ScenarioError("scenario: 'weekly_challenges' must not be empty")
+
+        weeks = []
+        for week in range(1, len(challenges) + 1):
+            week_data = challenges.get(f"week{week}")
+            if week_data is None:
+                raise ScenarioError(f"scenario: weeks must be numbered week1..week{len(challenges)}, missing week{week}")
+            if not isinstance(week_data, dict):
+                raise ScenarioError(f"weekly_challenges.week{week}: must be an object")
+            weeks.append(WeeklyChallenge(week, week_data))
+
+        by_department: Dict[str, List[WeeklyChallenge]] = {}
+        for challenge in weeks:
+            by_department.setdefault(challenge.department.upper(), []).append(challenge)
+
+        self.name = name
+        self.weeks: Tuple[WeeklyChallenge, ...] = tuple(weeks)
+        self.by_department = {dept: tuple(items) for dept, items in by_department.items()}
+        self.total_weeks = len(weeks)
+        self.ceo_execution_plan = data.get("ceo_execution_plan", {})
+        self.agent_personalities = data.get("agent_personalities", {})
+        self.data = data
+        # changes whenever the content does, used as the HTTP validator of scenario resources
+        self.digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    def challenge(self, week: int) -> Optional[WeeklyChallenge]:
+        """Return the challenge for a 1-based week number, or None past the last week"""
+        if 1 <= week <= self.total_weeks:
+            return self.weeks[week - 1]
+        return None
+
+    def challenges_for(self, department: str) -> Tuple[WeeklyChallenge, ...]:
+        return self.by_department.get(department.upper(), ())
+
+
+def load_scenario(path: str, name: Optional[str] = None) -> Scenario:
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return Scenario(name or os.path.splitext(os.path.basename(path))[0], data)
+
+
+class ScenarioLoader:
+    """Compile a scenario file once and recompile it when the file changes on disk.
+
+    `on_load` is called with every newly loaded scenario before it is served;
+    a ValueError from it rejects that version like a schema error does.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        name: Optional[str] = None,
+        check_interval: float = 2.0,
+        on_load: Optional[Callable[[Scenario], None]] = None
+    ):
+        self.path = path
+        self.name = name
+        self.check_interval = check_interval
+        self.on_load = on_load
+        self._mtime = os.path.getmtime(path)
+        self._checked_at = time.monotonic()
+        # fail fast at startup instead of at request time
+        self._scenario = self._load()
+
+    def _load(self) -> Scenario:
+        scenario = load_scenario(self.path, self.name)
+        if self.on_load is not None:
+            self.on_load(scenario)
+        return scenario
+
+    def get(self) -> Scenario:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self.reload_if_changed()
+        return self._scenario
+
+    def reload_if_changed(self) -> bool:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            print(f"Warning: cannot stat scenario {self.path}: {str(e)}")
+            return False
+        if mtime == self._mtime:
+            return False
+        try:
+            self._scenario = self._load()
+        except (OSError, ValueError) as e:
+            # keep serving the last good version while the file is being edited
+            print(f"Warning: scenario {self.path} not reloaded: {str(e)}")
+            return False
+        self._mtime = mtime
+        print(f"Reloaded scenario {self.path}")
+        return True
+
@@ -0,0 +1,142 @@
+import json
+import os
+from typing import Dict, List, Any, Optional
+
+from scenario import Scenario, ScenarioLoader
+from metrics_manager import MetricsManager
+from constraint_table import ConstraintTable
+from event_engine import EventEngine
+from prompts import PromptTemplates
+from plan_alignment import PlanAlignmentScorer
+from precomputed_analyses import PrecomputedAnalyses, artifact_path
+
+DEFAULT_SCENARIO = "default"
+
+
+class UnknownScenario(KeyError):
+    """Raised when a scenario pack name is not in the catalog"""
+
+
+class ScenarioPack:
+    """Immutable content of one scenario, parsed once and shared by every session using it"""
+
+    def __init__(self, name: str, scenario_path: str, metrics_path: str):
+        self.name = name
+        self.scenario_path = scenario_path
+        self.metrics_path = metrics_path
+        with open(metrics_path, 'r') as f:
+            self.metrics_data: Dict[str, Any] = json.load(f)
+        self.constraints = ConstraintTable(self.metrics_data)
+        self._event_engine: Optional[EventEngine] = None
+        # events are compiled with each scenario version, an event without a valid target rejects it
+        self.loader = ScenarioLoader(scenario_path, name, on_load=self._compile_events)
+        self._prompts: Optional[PromptTemplates] = None
+        self._alignment: Optional[PlanAlignmentScorer] = None
+        self._precomputed: Optional[PrecomputedAnalyses] = None
+
+    @property
+    def scenario(self) -> Scenario:
+        return self.loader.get()
+
+    def _compile_events(self, scenario: Scenario) -> None:
+        self._event_engine = EventEngine(scenario, self.metrics_data)
+
+    @property
+    def event_engine(self) -> EventEngine:
+        scenario = self.scenario
+        if self._event_engine is None or self._event_engine.scenario is not scenario:
+            self._compile_events(scenario)
+        return self._event_engine
+
+    @property
+    def prompts(self) -> PromptTemplates:
+        scenario = self.scenario
+        if self._prompts is None or self._prompts.scenario is not scenario:
+            self._prompts = PromptTemplates(scenario, self.metrics_data)
+        return self._prompts
+
+    @property
+    def alignment(self) -> PlanAlignmentScorer:
+        scenario = self.scenario
+        if self._alignment is None or self._alignment.scenario is not scenario:
+            self._alignment = PlanAlignmentScorer(scenario.ceo_execution_plan, scenario=scenario)
+        return self._alignment
+
+    @property
+    def precomputed(self) -> PrecomputedAnalyses:
+        scenario = self.scenario
+        path = artifact_path(self.scenario_path)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = 0.0
+        # pick up a rebuilt artifact, and drop one built for content that was hot-reloaded since
+        if self._precomputed is None or self._precomputed.scenario is not scenario or self._precomputed.mtime != mtime:
+            self._precomputed = PrecomputedAnalyses.load(path, scenario)
+        return self._precomputed
+
+    def create_metrics_manager(self, seed: Optional[int] = None) -> MetricsManager:
+        # sessions only keep the weeks they change, definitions and initial weeks stay shared
+        return MetricsManager(self.metrics_path, metrics_data=self.metrics_data, seed=seed, constraints=self.constraints)
+
+
+class ScenarioCatalog:
+    """Discover scenario packs and load each at most once per process.
+
+    The default pack is simulation_data.json and metrics_data.json in the
+    working directory. Additional packs live in `<scenario_dir>/<name>/` with
+    their own simulation_data.json and, optionally, metrics_data.json.
+    """
+
+    def __init__(self, root: str = ".", scenario_dir: Optional[str] = None):
+        self.root = root
+        self.scenario_dir = scenario_dir or os.getenv("SIMULATION_SCENARIO_DIR", os.path.join(root, "scenarios"))
+        self._packs: Dict[str, ScenarioPack] = {}
+
+    def _paths(self, name: str) -> Optional[Dict[str, str]]:
+        default_metrics = os.path.join(self.root, "metrics_data.json")
+        if name == DEFAULT_SCENARIO:
+            return {
+                "scenario": os.path.join(self.root, "simulation_data.json"),
+                "metrics": default_metrics
+            }
+        # names come from query strings, never let them walk out of the scenario directory
+        if not name or os.path.basename(name) != name or name.startswith("."):
+            return None
+        pack_dir = os.path.join(self.scenario_dir, name)
+        scenario_path = os.path.join(pack_dir, "simulation_data.json")
+        if not os.path.isfile(scenario_path):
+            return None
+        metrics_path = os.path.join(pack_dir, "metrics_data.json")
+        return {
+            "scenario": scenario_path,
+            "metrics": metrics_path if os.path.isfile(metrics_path) else default_metrics
+        }
+
+    def names(self) -> List[str]:
+        names = [DEFAULT_SCENARIO]
+        if os.path.isdir(self.scenario_dir):
+            for entry in sorted(os.listdir(self.scenario_dir)):
+                if entry != DEFAULT_SCENARIO and self._paths(entry) is not None:
+                    names.append(entry)
+        return names
+
+    def get(self, name: str = DEFAULT_SCENARIO) -> ScenarioPack:
+        pack = self._packs.get(name)
+        if pack is None:
+            paths = self._paths(name)
+            if paths is None:
+                raise UnknownScenario(f"Unknown scenario: {name}")
+            pack = self._packs[name] = ScenarioPack(name, paths["scenario"], paths["metrics"])
+        return pack
+
+
+_catalog: Optional[ScenarioCatalog] = None
+
+
+def get_catalog() -> ScenarioCatalog:
+    """Return the process-wide scenario catalog"""
+    global _catalog
+    if _catalog is None:
+        _catalog = ScenarioCatalog()
+    return _catalog
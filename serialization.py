@@ -0,0 +1,114 @@
+import asyncio
+import json
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, responses fall back to compact json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, clients asking for it get json
+    msgpack = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Accept header of the request being served, read by the endpoint wrapper below
+_accept: ContextVar[str] = ContextVar("accept", default="")
+
+
+def _default(value: Any) -> Any:
+    """Fallback for values the encoders do not know: models, numpy values and arrays, everything else FastAPI handles"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Encode to compact JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_default, use_bin_type=True)
+
+
+def wants_msgpack(accept: str) -> bool:
+    return msgpack is not None and any(media_type in accept for media_type in MSGPACK_TYPES)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def encode_response(
+    content: Any,
+    accept: Optional[str] = None,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Encode a payload as MessagePack when the client accepts it, JSON otherwise"""
+    headers = {**(headers or {}), "Vary": "Accept"}
+    accept = _accept.get() if accept is None else accept
+    response_class = MsgPackResponse if wants_msgpack(accept) else FastJSONResponse
+    return response_class(content=content, status_code=status_code, headers=headers)
+
+
+def _serialized(endpoint: Callable) -> Callable:
+    @wraps(endpoint)
+    async def serialized_endpoint(*args, **kwargs):
+        content = await endpoint(*args, **kwargs)
+        if isinstance(content, Response):
+            return content
+        return encode_response(content)
+    return serialized_endpoint
+
+
+class SerializedRoute(APIRoute):
+    """Route that sends endpoint results straight to the serializer.
+
+    Payloads are built from session state the server already trusts, so
+    validating them against response_model and running jsonable_encoder on
+    every request only costs time. The endpoint's dict is encoded once, with
+    orjson or as MessagePack depending on the Accept header; response_model
+    still documents the schema in OpenAPI.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        if asyncio.iscoroutinefunction(endpoint):
+            endpoint = _serialized(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            token = _accept.set(request.headers.get("accept", ""))
+            try:
+                return await handler(request)
+            finally:
+                _accept.reset(token)
+
+        return route_handler
@@ -0,0 +1,41 @@
+import json
+from typing import Dict, Any
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, snapshots fall back to compact json
+    msgpack = None
+
+SNAPSHOT_VERSION = 1
+
+# every snapshot starts with a short header naming its encoding
+_MSGPACK_HEADER = b"SMP"
+_JSON_HEADER = b"SJS"
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot cannot be decoded or has an unsupported version"""
+
+
+def encode_snapshot(state: Dict[str, Any]) -> bytes:
+    payload = {"version": SNAPSHOT_VERSION, "state": state}
+    if msgpack is not None:
+        return _MSGPACK_HEADER + msgpack.packb(payload, use_bin_type=True)
+    return _JSON_HEADER + json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def decode_snapshot(data: bytes) -> Dict[str, Any]:
+    header, body = data[:3], data[3:]
+    if header == _MSGPACK_HEADER:
+        if msgpack is None:
+            raise SnapshotError("Snapshot was written with msgpack, which is not installed")
+        payload = msgpack.unpackb(body, raw=False, strict_map_key=False)
+    elif header == _JSON_HEADER:
+        payload = json.loads(body.decode("utf-8"))
+    else:
+        raise SnapshotError("Unrecognized snapshot format")
+
+    version = payload.get("version")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version: {version}")
+    return payload["state"]
@@ -0,0 +1,248 @@
+import asyncio
+import os
+import re
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+from session_snapshot import encode_snapshot, decode_snapshot
+
+# session ids come from query strings and name files and redis keys
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def valid_session_id(session_id: str) -> bool:
+    return isinstance(session_id, str) and SESSION_ID_PATTERN.fullmatch(session_id) is not None
+
+
+def snapshot_stamp(game_id: str, revision: int) -> str:
+    """Names one saved state: a new game or any saved change gives a new stamp"""
+    return f"{game_id}:{revision}"
+
+
+class SessionLockTimeout(Exception):
+    """Raised when a session lock could not be acquired in time"""
+
+
+class SessionStore(ABC):
+    """Interface for externalized session state.
+
+    Stores keep one encoded snapshot per session id and serialize work on a
+    session through `lock`. The default lock only covers the current process;
+    stores shared between workers override it. Next to each snapshot they keep
+    its stamp, so a worker can tell whether its copy is current without
+    reading and decoding the snapshot.
+    """
+
+    def __init__(self, lock_wait: float = 30.0):
+        self.lock_wait = lock_wait
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @abstractmethod
+    def load_bytes(self, session_id: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def save_bytes(self, session_id: str, data: bytes, stamp: str) -> None:
+        ...
+
+    @abstractmethod
+    def load_stamp(self, session_id: str) -> Optional[str]:
+        """Return the stamp of the stored snapshot, "" when it is unknown, None when there is no snapshot"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        data = self.load_bytes(session_id)
+        if data is None:
+            return None
+        try:
+            return decode_snapshot(data)
+        except Exception as e:
+            print(f"Error loading snapshot for session {session_id}: {str(e)}")
+            return None
+
+    def save(self, session_id: str, state: Dict[str, Any]) -> None:
+        try:
+            stamp = snapshot_stamp(state.get("game_id", ""), state.get("revision", 0))
+            self.save_bytes(session_id, encode_snapshot(state), stamp)
+        except Exception as e:
+            print(f"Error saving snapshot for session {session_id}: {str(e)}")
+
+    @asynccontextmanager
+    async def lock(self, session_id: str):
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout=self.lock_wait)
+        except asyncio.TimeoutError:
+            raise SessionLockTimeout(f"Session {session_id} is busy")
+        try:
+            yield
+        finally:
+            lock.release()
+
+
+class InMemorySessionStore(SessionStore):
+    """Keep snapshots in process memory, for single-worker deployments and tests"""
+
+    def __init__(self, lock_wait: float = 30.0):
+        super().__init__(lock_wait)
+        self._data: Dict[str, bytes] = {}
+        self._stamps: Dict[str, str] = {}
+
+    def load_bytes(self, session_id: str) -> Optional[bytes]:
+        return self._data.get(session_id)
+
+    def save_bytes(self, session_id: str, data: bytes, stamp: str) -> None:
+        self._data[session_id] = data
+        self._stamps[session_id] = stamp
+
+    def load_stamp(self, session_id: str) -> Optional[str]:
+        return self._stamps.get(session_id)
+
+    def delete(self, session_id: str) -> None:
+        self._data.pop(session_id, None)
+        self._stamps.pop(session_id, None)
+
+
+class FileSessionStore(SessionStore):
+    """Store snapshots as one binary file per session"""
+
+    def __init__(self, directory: str = "snapshots", lock_wait: float = 30.0):
+        super().__init__(lock_wait)
+        self.directory = directory
+
+    def _path(self, session_id: str) -> str:
+        if not valid_session_id(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return os.path.join(self.directory, f"{session_id}.snapshot")
+
+    def load_bytes(self, session_id: str) -> Optional[bytes]:
+        path = self._path(session_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def save_bytes(self, session_id: str, data: bytes, stamp: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(session_id)
+        # atomic renames so a crash mid-write never leaves a torn snapshot;
+        # the stamp goes last, a stale stamp only costs one extra reload
+        for target, content in ((path, data), (f"{path}.stamp", stamp.encode("utf-8"))):
+            with open(f"{target}.tmp", 'wb') as f:
+                f.write(content)
+            os.replace(f"{target}.tmp", target)
+
+    def load_stamp(self, session_id: str) -> Optional[str]:
+        path = self._path(session_id)
+        try:
+            with open(f"{path}.stamp", 'rb') as f:
+                return f.read().decode("utf-8")
+        except FileNotFoundError:
+            # snapshots written before stamps existed are always reloaded
+            return "" if os.path.exists(path) else None
+
+    def delete(self, session_id: str) -> None:
+        path = self._path(session_id)
+        for target in (path, f"{path}.stamp"):
+            if os.path.exists(target):
+                os.remove(target)
+
+
+class RedisSessionStore(SessionStore):
+    """Share snapshots and session locks between workers through a Redis server.
+
+    Any client speaking the redis-py interface works, so tests can pass a
+    `fakeredis.FakeRedis()` instance instead of a real server.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "simulation:",
+        lock_ttl: float = 600.0,
+        lock_wait: float = 30.0
+    ):
+        super().__init__(lock_wait)
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("RedisSessionStore requires the 'redis' package")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        # the lock outlives a full multi-agent run so it never expires mid-analysis
+        self.lock_ttl = lock_ttl
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}session:{session_id}"
+
+    def _stamp_key(self, session_id: str) -> str:
+        return f"{self.prefix}stamp:{session_id}"
+
+    def _lock_key(self, session_id: str) -> str:
+        return f"{self.prefix}lock:{session_id}"
+
+    def load_bytes(self, session_id: str) -> Optional[bytes]:
+        return self.client.get(self._key(session_id))
+
+    def save_bytes(self, session_id: str, data: bytes, stamp: str) -> None:
+        with self.client.pipeline() as pipe:
+            pipe.set(self._key(session_id), data)
+            pipe.set(self._stamp_key(session_id), stamp)
+            pipe.execute()
+
+    def load_stamp(self, session_id: str) -> Optional[str]:
+        stamp = self.client.get(self._stamp_key(session_id))
+        if stamp is not None:
+            return stamp.decode()
+        return "" if self.client.exists(self._key(session_id)) else None
+
+    def delete(self, session_id: str) -> None:
+        self.client.delete(self._key(session_id), self._stamp_key(session_id))
+
+    def _release(self, key: str, token: str) -> None:
+        # only delete the lock if we still own it, a stale holder must not free someone else's lock
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.get(key)
+                if current is not None and current.decode() == token:
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+            except Exception as e:
+                print(f"Warning: failed to release session lock {key}: {str(e)}")
+
+    @asynccontextmanager
+    async def lock(self, session_id: str):
+        key = self._lock_key(session_id)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_wait
+        while not self.client.set(key, token, nx=True, px=int(self.lock_ttl * 1000)):
+            if time.monotonic() >= deadline:
+                raise SessionLockTimeout(f"Session {session_id} is busy")
+            await asyncio.sleep(0.05)
+        try:
+            yield
+        finally:
+            self._release(key, token)
+
+
+def create_session_store(target: Optional[str] = None) -> SessionStore:
+    """Build a store from a target string: "memory", a redis:// url or a snapshot directory"""
+    target = target or os.getenv("SIMULATION_SESSION_STORE") or os.getenv("SIMULATION_SNAPSHOT_DIR", "snapshots")
+    if target == "memory":
+        return InMemorySessionStore()
+    if target.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessionStore(url=target)
+    return FileSessionStore(target)
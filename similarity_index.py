@@ -0,0 +1,146 @@
+import math
+import os
+import re
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it its of on or our so that the their them then this to "
+    "we will with us".split()
+)
+# words that rule an action out: text with one never stands for doing what it names
+NEGATION_PATTERN = re.compile(
+    r"\b(?:not|no|never|dont|without|avoid|stop|cancel|instead|neither|nor|refuse|reject|against)\b|n['\u2019]t\b"
+)
+DIMENSIONS = 1 << 20  # hashed feature space, collisions are rare at decision length
+DEFAULT_THRESHOLD = 0.85
+MAX_ENTRIES_PER_SCOPE = 256
+
+
+def normalize_token(token: str) -> str:
+    """Crude suffix stripping so "fixing", "fixed" and "fix" or "bugs" and "bug" meet"""
+    for suffix in ("ing", "ed", "es", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    return token[:-1] if token.endswith("e") and len(token) > 3 else token
+
+
+def features(text: str) -> Counter:
+    """Term counts of a text, keyed by hashed bucket"""
+    tokens = (normalize_token(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS)
+    return Counter(zlib.crc32(token.encode("utf-8")) % DIMENSIONS for token in tokens)
+
+
+def negated(text: str) -> bool:
+    return NEGATION_PATTERN.search(text.lower()) is not None
+
+
+class IndexEntry:
+    __slots__ = ("decision", "terms", "negated", "analysis")
+
+    def __init__(self, decision: str, terms: Counter, analysis: Dict[str, Any]):
+        self.decision = decision
+        self.terms = terms
+        self.negated = negated(decision)
+        self.analysis = analysis
+
+
+class IndexScope:
+    """Entries of one scope with the document frequencies of their terms"""
+
+    __slots__ = ("entries", "document_frequency")
+
+    def __init__(self):
+        self.entries: "OrderedDict[Tuple[int, ...], IndexEntry]" = OrderedDict()
+        self.document_frequency: Counter = Counter()
+
+    def idf(self, bucket: int) -> float:
+        return math.log((1 + len(self.entries)) / (1 + self.document_frequency[bucket])) + 1
+
+    def weights(self, terms: Counter) -> Dict[int, float]:
+        return {bucket: count * self.idf(bucket) for bucket, count in terms.items()}
+
+
+class AnalysisIndex:
+    """Hashed TF-IDF index of past analyses for finding near-duplicate decisions.
+
+    Decisions are tokenized, lightly stemmed and hashed into a fixed feature
+    space, so the index needs no vocabulary and no dependencies. Entries are
+    grouped by scope (scenario, week, department and resource state): only an
+    analysis of the same situation can stand in for a new one. Lookups weight
+    terms by inverse document frequency within the scope, so how common a word
+    is in other weeks or scenarios never changes a match, and return the most
+    similar entry by cosine similarity when it reaches the threshold. A
+    decision that rules an action out ("do not hire contractors") never
+    matches one that does not, however close the wording.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = MAX_ENTRIES_PER_SCOPE):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._scopes: Dict[str, IndexScope] = {}
+
+    def __len__(self) -> int:
+        return sum(len(scope.entries) for scope in self._scopes.values())
+
+    def add(self, scope: str, decision: str, analysis: Dict[str, Any]) -> None:
+        terms = features(decision)
+        if not terms:
+            return
+        indexed = self._scopes.setdefault(scope, IndexScope())
+        entries = indexed.entries
+        # the same wording after normalization keeps one entry, the newest analysis;
+        # negation is part of the key, "not" and its kin may be the only difference
+        key = (negated(decision), *sorted(terms.elements()))
+        if key in entries:
+            entries[key].analysis = analysis
+            entries.move_to_end(key)
+            return
+        entries[key] = IndexEntry(decision, terms, analysis)
+        indexed.document_frequency.update(terms.keys())
+        while len(entries) > self.max_entries:
+            _, evicted = entries.popitem(last=False)
+            indexed.document_frequency.subtract(evicted.terms.keys())
+
+    def search(self, scope: str, decision: str, limit: int = 3) -> List[Tuple[float, IndexEntry]]:
+        """Return the most similar entries of a scope with their cosine similarity, best first"""
+        indexed = self._scopes.get(scope)
+        terms = features(decision)
+        if indexed is None or not terms:
+            return []
+        query = indexed.weights(terms)
+        query_norm = math.sqrt(sum(weight * weight for weight in query.values()))
+        scored = []
+        for entry in indexed.entries.values():
+            weights = indexed.weights(entry.terms)
+            dot = sum(weight * weights.get(bucket, 0.0) for bucket, weight in query.items())
+            if dot:
+                norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+                scored.append((dot / (query_norm * norm), entry))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:limit]
+
+    def lookup(self, scope: str, decision: str) -> Optional[Tuple[float, IndexEntry]]:
+        """Return the best match when it is similar enough to reuse, otherwise None"""
+        is_negated = negated(decision)
+        for similarity, entry in self.search(scope, decision, limit=self.max_entries):
+            if similarity < self.threshold:
+                break
+            # the analysis of doing something cannot stand in for not doing it, or the reverse
+            if entry.negated == is_negated:
+                return similarity, entry
+        return None
+
+
+_index: Optional[AnalysisIndex] = None
+
+
+def get_analysis_index() -> AnalysisIndex:
+    """Return the process-wide index of past analyses"""
+    global _index
+    if _index is None:
+        _index = AnalysisIndex(threshold=float(os.getenv("SIMULATION_REUSE_THRESHOLD", str(DEFAULT_THRESHOLD))))
+    return _index
@@ -1,63 +1,180 @@
 from typing import Dict, List, Any, Optional
+import asyncio
+import contextvars
 import json
 import re
 import os
+import uuid
 from dotenv import load_dotenv
 from datetime import datetime
-import numpy as np
-import openai
-from autogen_agentchat.agents import AssistantAgent, UserProxyAgent
-from autogen_agentchat.conditions import TextMentionTermination
-from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.ui import Console
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-from recommendation_tracker import RecommendationTracker
-from metrics_manager import MetricsManager
+from copy import deepcopy
+from recommendation_tracker import RecommendationTracker, merge_recommendations
+from session_store import SessionStore, snapshot_stamp
+from analytics_export import AnalyticsExporter
+from similarity_index import get_analysis_index
+from plan_alignment import ALIGNMENT_KEYS
+from scenario import Scenario, WeeklyChallenge
+from scenario_catalog import DEFAULT_SCENARIO, get_catalog
+
+# responses kept per session for replaying retried requests
+MAX_IDEMPOTENT_RESPONSES = 32
+
+def preload_agent_modules() -> None:
+    """Import the agent framework ahead of the first request, see the API lifespan hook"""
+    import openai
+    import autogen_agentchat.agents
+    import autogen_agentchat.teams
+    import autogen_ext.models.openai
 
 class SimulationManager:
-    def __init__(self):
-        
-        self.metrics_manager = MetricsManager("metrics_data.json")
-        self.current_metrics = self.metrics_manager.get_week_metrics(1)
+    def __init__(
+        self,
+        session_id: str = "default",
+        session_store: Optional[SessionStore] = None,
+        scenario: str = DEFAULT_SCENARIO,
+        seed: Optional[int] = None,
+        analytics: Optional[AnalyticsExporter] = None,
+        metrics_file: Optional[str] = None
+    ):
+        self.session_id = session_id
+        self.session_store = session_store
+        self.analytics = analytics
+        # the console game writes its metrics here after every change, API sessions live in snapshots
+        self.metrics_file = metrics_file
+        self._use_scenario(scenario, seed)
+        self.current_metrics = self.metrics_manager.get_week_metrics_for_update(1)
         
-        with open('simulation_data.json', 'r') as f:
-            self.simulation_data = json.load(f)
         self.current_week = 0
         self.user_decisions = []
         self.weekly_decisions = {}
         self.number_pattern = re.compile(r'(?:[\$£€])?(?:\d{1,3}(?:,\d{3})*|\d+)(?:\.\d+)?(?:k|K|m|M|b|B)?(?:\s*%)?')
         load_dotenv()
-        self.openai_client = None
-        self._setup_openai()
-        self._setup_agents()
+        # the openai client and the agents are built on first use, which keeps workers fast to start
+        self._openai_client = None
+        self._openai_ready = False
+        self._agents = None
         self.conversation_history = []
         self.discussion_started = False
-        self.current_department = self.simulation_data["weekly_challenges"]["week1"]["department"]
-        self.is_running = True
+        self.current_department = self.scenario.challenge(1).department
+        self.is_running = False  # set by /api/simulation/start
         self.awaiting_action = False
-        self.total_weeks = len(self.simulation_data["weekly_challenges"])
-        self.current_recommendations_version = 1  # track versions of recommendations
+        self.current_decision_id = None
+        self.idempotent_responses = {}  # idempotency key -> fingerprint and original response
+        self.fired_events = []  # unexpected events triggered by accepted decisions
+        self.resource_adjustments = {}  # week -> resource -> delta from fired events
+        self.game_id = uuid.uuid4().hex[:12]  # new for every game played under a session ID
+        self.revision = 0  # bumped by every saved change, see save_snapshot
+
+    def _use_scenario(self, name: str, seed: Optional[int] = None) -> None:
+        # scenario content is shared per process, only the metrics manager holds session data
+        self.scenario_pack = get_catalog().get(name)
+        self.metrics_manager = self.scenario_pack.create_metrics_manager(seed)
+
+    @property
+    def scenario_name(self) -> str:
+        return self.scenario_pack.name
+
+    @property
+    def scenario(self) -> Scenario:
+        return self.scenario_pack.scenario
+
+    @property
+    def simulation_data(self) -> Dict[str, Any]:
+        """Raw scenario data, kept for the console scripts"""
+        return self.scenario.data
+
+    @property
+    def seed(self) -> int:
+        return self.metrics_manager.seed
+
+    @property
+    def total_weeks(self) -> int:
+        return self.scenario.total_weeks
 
     def get_current_metrics(self) -> Dict[str, Any]:
         return self.metrics_manager.get_week_metrics(self.current_week + 1)
 
-    def update_metrics(self, changes: Dict[str, Any]) -> None:
-        department = self.current_department
-        week = self.current_week + 1
-        
-        if self.metrics_manager.validate_changes(changes, department):
-            actual_changes = self.metrics_manager.update_week_metrics(week, department, changes)
-            
-            if week in self.weekly_decisions:
-                self.weekly_decisions[week]["actual_changes"] = actual_changes
-            
-            self.current_metrics = self.metrics_manager.get_week_metrics(week)
-            print("\nActual changes with uncertainty:")
-            for category, metrics in actual_changes.items():
-                print(f"\n{category.upper()} Metrics:")
-                for metric, (change, uncertainty) in metrics.items():
-                    print(f"  - {metric}: {change:+.1f}% ± {uncertainty}%")
-                    
+    def get_state(self) -> Dict[str, Any]:
+        """Return everything needed to resume this session in another process"""
+        return {
+            "session_id": self.session_id,
+            "game_id": self.game_id,
+            "revision": self.revision,
+            "scenario": self.scenario_name,
+            "current_week": self.current_week,
+            "current_department": self.current_department,
+            "user_decisions": self.user_decisions,
+            "weekly_decisions": self.weekly_decisions,
+            "discussion_started": self.discussion_started,
+            "is_running": self.is_running,
+            "awaiting_action": self.awaiting_action,
+            "current_decision_id": self.current_decision_id,
+            "idempotent_responses": self.idempotent_responses,
+            "fired_events": self.fired_events,
+            "resource_adjustments": self.resource_adjustments,
+            "metrics": self.metrics_manager.get_state()
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        self.session_id = state.get("session_id", self.session_id)
+        self.game_id = state.get("game_id", self.game_id)
+        self.revision = state.get("revision", 0)
+        scenario = state.get("scenario", DEFAULT_SCENARIO)
+        if scenario != self.scenario_name:
+            self._use_scenario(scenario)
+        self.current_week = state["current_week"]
+        self.current_department = state["current_department"]
+        self.user_decisions = state["user_decisions"]
+        # week numbers are int keys, json snapshots turn them into strings
+        self.weekly_decisions = {int(week): data for week, data in state["weekly_decisions"].items()}
+        self.discussion_started = state["discussion_started"]
+        self.is_running = state["is_running"]
+        self.awaiting_action = state["awaiting_action"]
+        self.current_decision_id = state.get("current_decision_id")
+        self.idempotent_responses = state.get("idempotent_responses", {})
+        self.fired_events = state.get("fired_events", [])
+        self.resource_adjustments = {int(week): data for week, data in state.get("resource_adjustments", {}).items()}
+        self.metrics_manager.restore_state(state.get("metrics", {}))
+        self.current_metrics = self.metrics_manager.get_week_metrics_for_update(self.current_week + 1)
+
+    def get_idempotent_response(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the response of an earlier request with this key, if any"""
+        entry = self.idempotent_responses.get(key)
+        if entry is None:
+            return None
+        if entry["fingerprint"] != fingerprint:
+            raise ValueError("Idempotency key was already used for a different request")
+        return entry["response"]
+
+    def remember_response(self, key: str, fingerprint: str, response: Dict[str, Any]) -> None:
+        self.idempotent_responses[key] = {"fingerprint": fingerprint, "response": response}
+        # dicts keep insertion order, so the first keys are the oldest
+        while len(self.idempotent_responses) > MAX_IDEMPOTENT_RESPONSES:
+            del self.idempotent_responses[next(iter(self.idempotent_responses))]
+
+    @property
+    def stamp(self) -> str:
+        """Stamp of the saved state this instance holds, see SessionStore.load_stamp"""
+        return snapshot_stamp(self.game_id, self.revision)
+
+    def save_snapshot(self) -> None:
+        self.revision += 1
+        if self.session_store is not None:
+            self.session_store.save(self.session_id, self.get_state())
+
+    @property
+    def openai_client(self):
+        if not self._openai_ready:
+            self._openai_ready = True
+            self._setup_openai()
+        return self._openai_client
+
+    @property
+    def agents(self) -> Dict[str, Any]:
+        if self._agents is None:
+            self._setup_agents()
+        return self._agents
+
     def _setup_openai(self):
         try:
             api_key = os.getenv('OPENAI_API_KEY')
@@ -65,14 +182,18 @@ class SimulationManager:
                 print("Warning: OPENAI_API_KEY not found in environment variables")
                 return
             
-            self.openai_client = openai.OpenAI(api_key=api_key)
+            import openai
+            self._openai_client = openai.OpenAI(api_key=api_key)
         except Exception as e:
             print(f"Error setting up OpenAI client: {str(e)}")
             
     def _setup_agents(self):
+        from autogen_agentchat.agents import AssistantAgent, UserProxyAgent
+        from autogen_ext.models.openai import OpenAIChatCompletionClient
+
         model_client = OpenAIChatCompletionClient(model="gpt-4")
         
-        self.agents = {
+        self._agents = {
             "CEO": AssistantAgent(
                 name="CEO",
                 model_client=model_client,
@@ -80,7 +201,9 @@ class SimulationManager:
                 Analyze decisions based on:
                 1. Strategic alignment with company goals
                 2. Long-term market positioning
-                3. Resource allocation efficiency"""
+                3. Resource allocation efficiency
+                Never approve in your opening reply. Once the other agents have replied and
+                the team's recommendations are final, end your reply with APPROVE."""
             ),
             "CTO": AssistantAgent(
                 name="CTO",
@@ -159,7 +282,6 @@ class SimulationManager:
         self.user_proxy = UserProxyAgent(
             name="user_proxy"
         )
-        self.termination = TextMentionTermination("APPROVE")
 
     def _is_gpt_available(self) -> bool:
         return self.openai_client is not None
@@ -257,15 +379,28 @@ class SimulationManager:
         
         return metrics
 
-    def _analyze_plan_alignment_gpt(self, user_plan: str, ceo_plan: Dict) -> Dict[str, float]:
+    def analyze_plan_alignment(self, user_plans: List[str], refine_borderline: bool = False) -> List[Dict[str, float]]:
+        """Score plans against the CEO execution plan locally, in one batch.
+
+        With refine_borderline, plans whose local scores are inconclusive get
+        a second opinion from GPT when it is configured.
+        """
+        scorer = self.scenario_pack.alignment
+        scores = scorer.score_batch(user_plans, [self._extract_metrics_regex(plan) for plan in user_plans])
+        results = [{key: round(float(value), 3) for key, value in zip(ALIGNMENT_KEYS, row)} for row in scores]
+        if refine_borderline and user_plans and self._is_gpt_available():
+            for index, borderline in enumerate(scorer.borderline(scores)):
+                if borderline:
+                    results[index] = self._analyze_plan_alignment_gpt(
+                        user_plans[index], self.scenario.ceo_execution_plan, fallback=results[index]
+                    )
+        return results
+
+    def _analyze_plan_alignment_gpt(self, user_plan: str, ceo_plan: Dict, fallback: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        if fallback is None:
+            fallback = self.analyze_plan_alignment([user_plan])[0]
         if not self._is_gpt_available():
-            return {
-                'strategic_alignment': 0.7,
-                'initiative_coverage': 0.7,
-                'risk_assessment': 0.7,
-                'resource_allocation': 0.7,
-                'timeline_feasibility': 0.7
-            }
+            return fallback
             
         try:
             prompt = f"""Analyze how well the user's execution plan aligns with the CEO's objectives.
@@ -295,26 +430,35 @@ class SimulationManager:
             )
             
             alignment_scores = json.loads(response.choices[0].message.content)
-            return alignment_scores
-            
-        except Exception as e:
-            print(f"Warning: GPT API error in alignment analysis: {str(e)}")
+            # keep the local score for anything the model left out or got wrong
             return {
-                'strategic_alignment': 0.7,
-                'initiative_coverage': 0.7,
-                'risk_assessment': 0.7,
-                'resource_allocation': 0.7,
-                'timeline_feasibility': 0.7
+                key: min(1.0, max(0.0, float(alignment_scores[key])))
+                if isinstance(alignment_scores.get(key), (int, float)) else fallback[key]
+                for key in ALIGNMENT_KEYS
             }
+            
+        except Exception as e:
+            print(f"Warning: GPT API error in alignment analysis, using local scores: {str(e)}")
+            return fallback
 
     async def analyze_user_decision_api(
         self, 
         decision: str, 
         department: str = None,
         feedback: str = None,
-        specific_recommendations: List[str] = None
+        specific_recommendations: List[str] = None,
+        analysis_cache: Optional[Dict[str, "asyncio.Future"]] = None,
+        reuse_similar: bool = False
     ) -> Dict[str, Any]:
-        """API-specific version that returns analysis without waiting for user input"""
+        """API-specific version that returns analysis without waiting for user input.
+
+        Sessions sharing an `analysis_cache` (one bulk submission) run the agents
+        once for identical decisions on the same scenario week and reuse the result.
+        With `reuse_similar`, a decision matching one of the week's precomputed
+        possible approaches, or worded almost like one already analysed for the
+        same situation, is served from those results, marked with `reused_from`,
+        without running the agents.
+        """
         try:
             if not decision.strip():
                 return {"error": "No decision provided"}
@@ -325,129 +469,176 @@ class SimulationManager:
                 return {"error": "Department not specified"}
             
             week_num = self.current_week + 1
-            self.current_recommendations_version += 1  # increment version for new analysis
-            
+            # the version is the decision's RecommendationVersions index, set by record_analysis
             self.weekly_decisions[week_num] = {
                 "decision": decision, 
                 "recommendations": None,
-                "recommendations_version": self.current_recommendations_version,
                 "feedback": feedback,
                 "specific_recommendations": specific_recommendations
             }
             
-            tracker = RecommendationTracker()
-            
-            dept_to_agent = {
-                "PRODUCT": ["CTO", "COO"],
-                "SALES": ["Sales", "COO"],
-                "MARKETING": ["Marketing", "COO"],
-                "HR": ["HR", "COO"],
-                "FINANCE": ["CFO", "COO"]
-            }
+            # feedback and specific recommendations ask for a new discussion, never reuse for those
+            reuse_similar = reuse_similar and not feedback and not specific_recommendations
+            scope = json.dumps([
+                self.scenario_name,
+                week_num,
+                department.upper(),
+                self.resource_adjustments.get(week_num)
+            ], sort_keys=True)
+            if reuse_similar and self.resource_adjustments.get(week_num) is None:
+                # analyses built offline for the week's possible approaches, see precomputed_analyses.py
+                precomputed = self.scenario_pack.precomputed.match(week_num, department, decision)
+                if precomputed is not None:
+                    similarity, entry = precomputed
+                    analysis = deepcopy(entry.analysis)
+                    analysis["reused_from"] = {
+                        "decision": entry.decision,
+                        "similarity": round(similarity, 3),
+                        "approaches": list(entry.approaches)
+                    }
+                    self.record_analysis(week_num, analysis)
+                    return analysis
+            if reuse_similar:
+                match = get_analysis_index().lookup(scope, decision)
+                if match is not None:
+                    similarity, entry = match
+                    analysis = deepcopy(entry.analysis)
+                    analysis["reused_from"] = {"decision": entry.decision, "similarity": round(similarity, 3)}
+                    self.record_analysis(week_num, analysis)
+                    return analysis
             
-            relevant_agents = [self.agents["CEO"]]
-            for agent_name in dept_to_agent.get(department.upper(), []):
-                if agent_name in self.agents:
-                    relevant_agents.append(self.agents[agent_name])
-            
-            if not relevant_agents:
-                return {"error": f"No agents found for department: {department}"}
-            
-            if feedback and specific_recommendations:
-                initial_prompt = f"""
-                Department: {department}
-                User's Decision: {decision}
-                
-                User's Feedback on Previous Recommendations:
-                {feedback}
-                
-                Specific Recommendations to Address:
-                {chr(10).join(f'- {rec}' for rec in specific_recommendations)}
-                
-                Provide updated analysis focusing on these specific points. Consider:
-                1. How to address the user's feedback
-                2. Impact on core metrics (revenue, profit margin, satisfaction)
-                3. Impact on department metrics (efficiency, growth, innovation)
-                4. Modified implementation steps
-                
-                Format your response with:
-                FEEDBACK RESPONSE:
-                - [Point-by-point response to user's concerns]
-                
-                UPDATED RECOMMENDATIONS:
-                - [Modified recommendations]
-                
-                METRIC ADJUSTMENTS:
-                - [Metric Name]: [+/-X%] (with justification)
-                
-                IMPLEMENTATION STEPS:
-                1. [Step 1]
-                2. [Step 2]
-                ...
-                
-                RISKS AND MITIGATION:
-                - [Risk]: [Mitigation Strategy]
-                """
+            if analysis_cache is None or feedback or specific_recommendations:
+                analysis = await self._run_analysis(week_num, decision, department, feedback, specific_recommendations)
             else:
-                initial_prompt = f"""
-                Department: {department}
-                User's Decision: {decision}
-                
-                Analyze this decision and provide specific recommendations. Focus on:
-                1. Impact on core metrics (revenue, profit margin, satisfaction)
-                2. Impact on department metrics (efficiency, growth, innovation)
-                3. Implementation steps and timeline
-                
-                Format your response with:
-                METRIC ADJUSTMENTS:
-                - [Metric Name]: [+/-X%] (with justification)
-                
-                IMPLEMENTATION STEPS:
-                1. [Step 1]
-                2. [Step 2]
-                ...
-                
-                RISKS AND MITIGATION:
-                - [Risk]: [Mitigation Strategy]
-                """
-            
-            team = RoundRobinGroupChat(
-                participants=relevant_agents,
-                max_turns=3
-            )
-            
-            messages = []
-            stream = team.run_stream(task=initial_prompt)
-            async for message in stream:
-                if hasattr(message, 'source') and hasattr(message, 'content'):
-                    sender = message.source
-                    content = message.content
-                    tracker.process_message(sender, content)
-                    messages.append({
-                        "agent": sender,
-                        "content": content
-                    })
-            
-            return {
-                "discussion": messages,
-                "recommendations": tracker.decisions,
-                "implementation_strategy": {
-                    "steps": [
-                        "Update metrics based on approved recommendations",
-                        "Monitor impact on core and department KPIs",
-                        "Adjust implementation as needed based on feedback"
-                    ],
-                    "risks": [
-                        "Potential resistance to change",
-                        "Implementation timeline may need adjustment",
-                        "Resource allocation may need optimization"
-                    ]
-                }
-            }
+                key = json.dumps([scope, decision.strip()])
+                shared = analysis_cache.get(key)
+                if shared is None:
+                    shared = analysis_cache[key] = self._start_shared_analysis(week_num, decision, department)
+                # every session gets its own copy, the result ends up in its snapshot
+                analysis = deepcopy(await shared)
+            if reuse_similar and "error" not in analysis:
+                get_analysis_index().add(scope, decision, deepcopy(analysis))
+            self.record_analysis(week_num, analysis)
+            return analysis
             
         except Exception as e:
             return {"error": str(e)}
 
+    def _start_shared_analysis(self, week: int, decision: str, department: str) -> "asyncio.Task":
+        """Run an analysis several sessions wait for on agents none of them owns.
+
+        The runner only copies what the discussion depends on, the scenario and
+        the week's resource changes, so no session's agents, tracker or job
+        progress take part in another session's analysis.
+        """
+        runner = SimulationManager(scenario=self.scenario_name)
+        if week in self.resource_adjustments:
+            runner.resource_adjustments[week] = deepcopy(self.resource_adjustments[week])
+        # an empty context: progress of a shared run belongs to no single job
+        return asyncio.get_running_loop().create_task(
+            runner._run_analysis(week, decision, department),
+            context=contextvars.Context()
+        )
+
+    def record_analysis(self, week: int, analysis: Dict[str, Any], version: Optional[int] = None) -> None:
+        """Keep what the week commit needs from an analysis, with its RecommendationVersions index"""
+        self.weekly_decisions[week]["recommendations"] = analysis.get("recommendations")
+        self.weekly_decisions[week]["consensus"] = analysis.get("consensus")
+        if version is not None:
+            self.weekly_decisions[week]["recommendations_version"] = version
+
+    async def _run_analysis(
+        self,
+        week: int,
+        decision: str,
+        department: str,
+        feedback: str = None,
+        specific_recommendations: List[str] = None
+    ) -> Dict[str, Any]:
+        """Run the department's agents on a decision, without touching session state"""
+        from job_queue import report_progress
+        # extraction only emits metrics this department's commit can apply
+        allowed = self.metrics_manager.get_allowed_metrics(department)
+        # background jobs expose the live consensus while the agents are still talking
+        tracker = RecommendationTracker(
+            on_update=lambda t: report_progress({
+                "messages": len(t.messages),
+                "consensus": t.consensus()
+            }),
+            metrics=allowed
+        )
+        
+        dept_to_agent = {
+            "PRODUCT": ["CTO", "COO"],
+            "SALES": ["Sales", "COO"],
+            "MARKETING": ["Marketing", "COO"],
+            "HR": ["HR", "COO"],
+            "FINANCE": ["CFO", "COO"]
+        }
+        
+        relevant_agents = [self.agents["CEO"]]
+        for agent_name in dept_to_agent.get(department.upper(), []):
+            if agent_name in self.agents:
+                relevant_agents.append(self.agents[agent_name])
+        
+        if not relevant_agents:
+            return {"error": f"No agents found for department: {department}"}
+        
+        # shared instructions first, then the week's precompiled context, then this decision
+        initial_prompt = self.scenario_pack.prompts.analysis_task(
+            week,
+            department,
+            decision,
+            feedback,
+            specific_recommendations,
+            resource_changes=self.resource_adjustments.get(week)
+        )
+        
+        from autogen_agentchat.teams import RoundRobinGroupChat
+        from convergence import ApprovalTermination, ConvergenceTermination
+        participants = [agent.name for agent in relevant_agents]
+        # the condition extracts each agent reply into the tracker and ends the round early once it settles
+        convergence = ConvergenceTermination(
+            tracker,
+            [f"{category}.{metric}" for category, metrics in allowed.items() for metric in metrics],
+            participants
+        )
+        team = RoundRobinGroupChat(
+            participants=relevant_agents,
+            termination_condition=convergence | ApprovalTermination("CEO", participants),
+            max_turns=3
+        )
+        
+        messages = []
+        stream = team.run_stream(task=initial_prompt)
+        async for message in stream:
+            if hasattr(message, 'source') and hasattr(message, 'content'):
+                sender = message.source
+                content = message.content
+                messages.append({
+                    "agent": sender,
+                    "content": content
+                })
+        
+        return {
+            "discussion": messages,
+            "recommendations": tracker.decisions,
+            "consensus": tracker.consensus(),
+            "metric_stats": tracker.aggregate.summary(),
+            "implementation_strategy": {
+                "steps": [
+                    "Update metrics based on approved recommendations",
+                    "Monitor impact on core and department KPIs",
+                    "Adjust implementation as needed based on feedback"
+                ],
+                "risks": [
+                    "Potential resistance to change",
+                    "Implementation timeline may need adjustment",
+                    "Resource allocation may need optimization"
+                ]
+            }
+        }
+
     async def analyze_user_decision(self, decision: str, department: str = None) -> Dict[str, Any]:
         try:
             if not decision.strip():
@@ -461,7 +652,7 @@ class SimulationManager:
             week_num = self.current_week + 1
             self.weekly_decisions[week_num] = {"decision": decision, "recommendations": None}
             
-            tracker = RecommendationTracker()
+            tracker = RecommendationTracker(metrics=self.metrics_manager.get_allowed_metrics(department))
             
             dept_to_agent = {
                 "PRODUCT": ["CTO", "COO"],
@@ -500,6 +691,7 @@ class SimulationManager:
             - [Risk]: [Mitigation Strategy]
             """
             
+            from autogen_agentchat.teams import RoundRobinGroupChat
             team = RoundRobinGroupChat(
                 participants=relevant_agents,
                 max_turns=3
@@ -546,6 +738,7 @@ class SimulationManager:
                                     self.update_r_d_metric(metric_name, value)
                     
                     self.weekly_decisions[week_num]["recommendations"] = tracker.decisions
+                    self.weekly_decisions[week_num]["consensus"] = tracker.consensus()
                     
                     tracker.save_final_report(f'implementation_report_week{week_num}.txt')
                     tracker.save_conversation(f'conversation_history_week{week_num}.txt')
@@ -554,21 +747,20 @@ class SimulationManager:
                     print(f"\033[92mDetailed report saved to implementation_report_week{week_num}.txt\033[0m")
                     
                     self.current_week += 1
-                    next_week = f"week{self.current_week + 1}"
-                    if next_week in self.simulation_data["weekly_challenges"]:
-                        next_challenge = self.simulation_data["weekly_challenges"][next_week]
+                    next_challenge = self.scenario.challenge(self.current_week + 1)
+                    if next_challenge is not None:
                         print(f"\n\033[1m=== Moving to Week {self.current_week + 1} Challenge ===\033[0m")
-                        print(f"\nDepartment: {next_challenge['department']}")
-                        print(f"Situation: {next_challenge['situation']}")
+                        print(f"\nDepartment: {next_challenge.department}")
+                        print(f"Situation: {next_challenge.situation}")
                         print("\nAvailable Resources:")
-                        for resource, value in next_challenge['available_resources'].items():
+                        for resource, value in next_challenge.available_resources.items():
                             print(f"- {resource}: {value}")
                         print("\nPossible Approaches:")
-                        for approach in next_challenge['possible_approaches']:
+                        for approach in next_challenge.possible_approaches:
                             print(f"- {approach}")
                         
                         self.discussion_started = False
-                        self.current_department = next_challenge['department']
+                        self.current_department = next_challenge.department
                         return {
                             "discussion": tracker.messages,
                             "recommendations": tracker.decisions,
@@ -676,6 +868,8 @@ class SimulationManager:
         
         if self.metrics_manager.validate_changes(changes, department):
             actual_changes = self.metrics_manager.update_week_metrics(week, department, changes)
+            if self.metrics_file:
+                self.metrics_manager.save_metrics_data(self.metrics_file)
             
             if week in self.weekly_decisions:
                 self.weekly_decisions[week]["actual_changes"] = actual_changes
@@ -721,27 +915,26 @@ class SimulationManager:
     async def handle_user_response(self, week: int, response: str) -> Dict[str, Any]:
         try:
             if response == "approve":
-                week_data = self.simulation_data["weekly_challenges"].get(f"week{week}")
-                if not week_data:
+                challenge = self.scenario.challenge(week)
+                if challenge is None:
                     return {"error": f"No data found for week {week}"}
                 
-                department = week_data["department"]
+                department = challenge.department
                 if not department:
                     return {"error": "Department not specified in week data"}
                 
-                if week in self.weekly_decisions and self.weekly_decisions[week].get("recommendations"):
-                    changes = {}
-                    for agent, recs in self.weekly_decisions[week]["recommendations"].items():
-                        for metric, value in recs.items():
-                            if metric in changes:
-                                changes[metric] = (changes[metric] + value) / 2
-                            else:
-                                changes[metric] = value
-                    self.update_metrics(changes)
+                commit = self.commit_week(week)
+                self.current_metrics = self.metrics_manager.get_week_metrics(week)
+                if commit["actual_changes"]:
+                    print("\nActual changes with uncertainty:")
+                    for category, metrics in commit["actual_changes"].items():
+                        print(f"\n{category.upper()} Metrics:")
+                        for metric, (change, uncertainty) in metrics.items():
+                            print(f"  - {metric}: {change:+.1f}% ± {uncertainty}%")
                 
                 return {
                     "status": "approved",
-                    "continue_simulation": week < len(self.simulation_data["weekly_challenges"])
+                    "continue_simulation": week < self.scenario.total_weeks
                 }
             
             return {"error": "Invalid response"}
@@ -795,21 +988,31 @@ class SimulationManager:
     def get_weekly_summary(self) -> Dict[str, Any]:
         summary = {}
         for week, data in self.weekly_decisions.items():
+            challenge = self.scenario.challenge(week)
             summary[f"Week {week}"] = {
-                "Department": self.simulation_data["weekly_challenges"][f"week{week}"]["department"],
-                "Situation": self.simulation_data["weekly_challenges"][f"week{week}"]["situation"],
+                "Department": challenge.department,
+                "Situation": challenge.situation,
                 "Decision": data["decision"],
                 "Recommendations": data["recommendations"]
             }
         return summary
 
     def advance_week(self) -> Dict[str, Any]:
-        """Advance the simulation to the next week and return the new state"""
+        """Commit the current week's accepted decision and move to the next week.
+
+        Nothing is persisted here, callers save one snapshot of the new state.
+        """
         if not self.is_running:
             return {"error": "Simulation is not running"}
             
         if self.awaiting_action:
             return {"error": "Cannot advance week while awaiting action on current decision"}
+        
+        week_num = self.current_week + 1
+        try:
+            commit = self.commit_week(week_num)
+        except Exception as e:
+            return {"error": f"Could not apply week {week_num}: {str(e)}"}
             
         if self.current_week >= self.total_weeks - 1:
             self.is_running = False
@@ -817,40 +1020,15 @@ class SimulationManager:
                 "status": "completed",
                 "message": "Simulation has completed all weeks",
                 "final_metrics": self.get_current_metrics(),
-                "current_week": self.current_week + 1
+                "current_week": self.current_week + 1,
+                "events": commit["events"]
             }
-        
-        # apply recommended changes to metrics
-        week_num = self.current_week + 1
-        if week_num in self.weekly_decisions:
-            decision = self.weekly_decisions[week_num]
-            if 'recommendations' in decision and decision['recommendations']:
-                try:
-                    # extract metric changes from recommendations
-                    changes = {}
-                    for rec in decision['recommendations'].get('metric_impacts', []):
-                        if 'metric' in rec and 'change' in rec:
-                            changes[rec['metric']] = float(rec['change'])
-                    
-                    # apply changes through metrics manager
-                    if changes:
-                        department = self.current_department
-                        if self.metrics_manager.validate_changes(changes, department):
-                            actual_changes = self.metrics_manager.update_week_metrics(
-                                week_num, 
-                                department, 
-                                changes
-                            )
-                            print(f"Applied metric changes for week {week_num}: {actual_changes}")
-                        else:
-                            print(f"Warning: Invalid metric changes for week {week_num}")
-                except Exception as e:
-                    print(f"Error applying metric changes: {str(e)}")
-            
-            print(f"Implementing recommendations version {decision.get('recommendations_version', 1)} for week {week_num}")
             
         self.current_week += 1
-        self.current_recommendations_version = 1  # reset version for new week
+        next_challenge = self.get_week_challenge()
+        if next_challenge is not None:
+            self.current_department = next_challenge.department
+        self.discussion_started = False
         next_week_metrics = self.get_current_metrics()
         next_challenge = self.get_current_challenge()
         
@@ -858,10 +1036,115 @@ class SimulationManager:
             "status": "in_progress",
             "current_week": self.current_week + 1,
             "metrics": next_week_metrics,
-            "next_challenge": next_challenge
+            "next_challenge": next_challenge,
+            "events": commit["events"]
         }
         
+    def commit_week(self, week: int) -> Dict[str, Any]:
+        """Apply a week's accepted recommendations to the metrics as one transaction.
+
+        The agents' recommendations are merged into one change set (the mean per
+        metric), unknown metrics are dropped and out-of-range changes clamped,
+        uncertainty is sampled in one draw and the week's events fire. If any
+        step fails, what the commit touches (the session's metrics and draws,
+        the week's decision, fired events and resource changes) is rolled back.
+        """
+        decision = self.weekly_decisions.get(week)
+        result = {"changes": {}, "actual_changes": {}, "violations": [], "events": []}
+        if not decision:
+            return result
+        
+        checkpoint = (
+            deepcopy(self.metrics_manager.get_state()),
+            deepcopy(decision),
+            len(self.fired_events),
+            deepcopy(self.resource_adjustments)
+        )
+        try:
+            department = self.current_department
+            requested = decision.get("consensus")
+            if requested is None:
+                # decisions recorded before the aggregate existed only keep each agent's last proposal
+                requested = merge_recommendations(decision.get("recommendations") or {})
+            violations = self.metrics_manager.check_changes(requested, department)
+            changes = self.metrics_manager.clamp_changes(requested, department) if violations else requested
+            for violation in violations:
+                print(f"Warning: week {week} {violation['metric']} {violation['reason'].replace('_', ' ')}, "
+                      f"{'dropped' if violation['metric'] not in changes else 'clamped'}")
+            
+            actual_changes = {}
+            if changes:
+                actual_changes = self.metrics_manager.update_week_metrics(week, department, changes)
+            decision["applied_changes"] = changes
+            decision["actual_changes"] = actual_changes
+            print(f"Implementing recommendations version {decision.get('recommendations_version', 1)} for week {week}")
+            events = self.fire_events(week, decision)
+        except Exception:
+            metrics_state, self.weekly_decisions[week], fired, self.resource_adjustments = checkpoint
+            self.metrics_manager.restore_state(metrics_state)
+            del self.fired_events[fired:]
+            raise
+        
+        if self.metrics_file:
+            self.metrics_manager.save_metrics_data(self.metrics_file)
+        result.update(changes=changes, actual_changes=actual_changes, violations=violations, events=events)
+        if self.analytics is not None:
+            try:
+                self.analytics.record_week(self, week, decision, result)
+            except Exception as e:
+                # the week is committed either way, analytics must not undo it
+                print(f"Warning: could not record week {week} for analytics: {str(e)}")
+        return result
+        
+    def fire_events(self, week: int, decision: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fire the week's unexpected events triggered by an accepted decision.
+
+        Impacts land on each event's compiled target week and department, by
+        default the following week, which is what the player faces next.
+        Only the accepted decision text is matched: feedback such as "please do
+        not hire contractors" names an approach without taking it.
+        """
+        events = self.scenario_pack.event_engine.match(week, decision.get("decision") or "")
+        fired = []
+        for event in events:
+            applied = {}
+            if event.metric_changes:
+                applied = self.metrics_manager.apply_impacts(event.target_week, event.target_department, event.metric_changes)
+            if event.resource_changes:
+                adjustments = self.resource_adjustments.setdefault(event.target_week, {})
+                for resource, delta in event.resource_changes.items():
+                    adjustments[resource] = adjustments.get(resource, 0) + delta
+            fired.append({
+                "week": week,
+                "trigger": event.trigger,
+                "event": event.event,
+                "target_week": event.target_week,
+                "target_department": event.target_department,
+                "metric_changes": applied,
+                "resource_changes": dict(event.resource_changes),
+                "other_effects": dict(event.effects)
+            })
+        self.fired_events.extend(fired)
+        return fired
+
+    def get_available_resources(self) -> Dict[str, Any]:
+        """Resources of the current week after adjustments from fired events"""
+        challenge = self.get_week_challenge()
+        if challenge is None:
+            return {}
+        adjustments = self.resource_adjustments.get(self.current_week + 1)
+        if not adjustments:
+            return challenge.available_resources
+        resources = dict(challenge.available_resources)
+        for resource, delta in adjustments.items():
+            resources[resource] = resources.get(resource, 0) + delta
+        return resources
+
+    def get_week_challenge(self) -> Optional[WeeklyChallenge]:
+        """Get the compiled challenge for the current week, None once all weeks are done"""
+        return self.scenario.challenge(self.current_week + 1)
+
     def get_current_challenge(self) -> Dict[str, Any]:
         """Get the challenge for the current week"""
-        week_key = f"week{self.current_week + 1}"
-        return self.simulation_data["weekly_challenges"].get(week_key, {})
+        challenge = self.get_week_challenge()
+        return challenge.to_dict() if challenge is not None else {}
@@ -51,7 +51,7 @@ def format_message(msg) -> str:
 
 async def main():
     try:
-        simulation = SimulationManager()
+        simulation = SimulationManager(metrics_file="metrics_data.json")
         
         print("\n\033[1m=== Starting Business Simulation ===\033[0m\n")
         
@@ -59,9 +59,10 @@ async def main():
             if not simulation.discussion_started:
                 print("\n\033[1m=== Week", simulation.current_week + 1, " Challenge ===\033[0m\n")
                 print(f"Department: {simulation.current_department}")
-                print(f"Situation: {simulation.simulation_data['weekly_challenges'][f'week{simulation.current_week + 1}']['situation']}\n")
-                print("Available Resources:", json.dumps(simulation.simulation_data['weekly_challenges'][f'week{simulation.current_week + 1}']['available_resources'], indent=2))
-                print("\nConstraints:", json.dumps(simulation.simulation_data['weekly_challenges'][f'week{simulation.current_week + 1}']['constraints'], indent=2))
+                challenge = simulation.get_week_challenge()
+                print(f"Situation: {challenge.situation}\n")
+                print("Available Resources:", json.dumps(challenge.available_resources, indent=2))
+                print("\nConstraints:", json.dumps(challenge.constraints, indent=2))
                 print("\nCurrent Metrics:")
                 display_metrics(simulation)
             
@@ -135,16 +136,17 @@ async def main():
                             display_metrics(simulation)
                             
                             simulation.current_week += 1
-                            if simulation.current_week >= len(simulation.simulation_data["weekly_challenges"]):
+                            if simulation.current_week >= simulation.scenario.total_weeks:
                                 print("\nSimulation completed! Thank you for participating.")
                                 return
                                 
                             print(f"\n\033[1m=== Week {simulation.current_week + 1} Challenge ===\033[0m\n")
-                            week_data = simulation.simulation_data["weekly_challenges"][f"week{simulation.current_week + 1}"]
-                            print(f"Department: {week_data['department']}")
-                            print(f"Situation: {week_data['situation']}\n")
-                            print("Available Resources:", json.dumps(week_data.get("resources", {}), indent=2))
-                            print("\nConstraints:", json.dumps(week_data.get("constraints", {}), indent=2))
+                            challenge = simulation.get_week_challenge()
+                            simulation.current_department = challenge.department
+                            print(f"Department: {challenge.department}")
+                            print(f"Situation: {challenge.situation}\n")
+                            print("Available Resources:", json.dumps(challenge.available_resources, indent=2))
+                            print("\nConstraints:", json.dumps(challenge.constraints, indent=2))
                             print("\nCurrent Metrics:")
                             display_metrics(simulation)
                             break
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import sys
+
+# the API builds its session store at import time, tests keep sessions in memory
+os.environ.setdefault("SIMULATION_SESSION_STORE", "memory")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+
+from simulation_manager import SimulationManager
+
+
+@pytest.fixture
+def analyses(monkeypatch):
+    """Replace the agent discussion with a canned analysis and record every call"""
+    calls = []
+
+    async def run_analysis(self, week, decision, department, *args, **kwargs):
+        calls.append(decision)
+        return {
+            "discussion": [],
+            "recommendations": {"CEO": {"core.revenue": 5.0}},
+            "consensus": {"core.revenue": 5.0}
+        }
+
+    monkeypatch.setattr(SimulationManager, "_run_analysis", run_analysis)
+    return calls
+
+
+@pytest.fixture
+def call_api(monkeypatch):
+    """Run a coroutine taking an API client against the app, sessions are dropped afterwards"""
+    import api
+    from job_queue import JobQueue
+
+    # workers are bound to the event loop that started them, every test runs its own loop
+    monkeypatch.setattr(api, "job_queue", JobQueue(workers=2))
+
+    def run(scenario):
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://test") as client:
+                return await scenario(client)
+        return asyncio.run(main())
+
+    yield run
+    api.simulations.clear()
+    api.busy_sessions.clear()
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import analytics_export
+from analytics_export import TABLES, AnalyticsExporter, create_analytics_exporter
+from simulation_manager import SimulationManager
+
+
+def committed(exporter):
+    simulation = SimulationManager(scenario="default", seed=1, analytics=exporter)
+    simulation.weekly_decisions[1] = {
+        "decision": "Hire contractors",
+        "recommendations": {"CEO": {"core.revenue": 4.0}, "CFO": {"core.revenue": 6.0}},
+        "consensus": {"core.revenue": 5.0}
+    }
+    simulation.commit_week(1)
+    return simulation
+
+
+def read_jsonl(directory):
+    return [json.loads(line) for path in sorted(directory.glob("*.jsonl")) for line in path.read_text().splitlines()]
+
+
+def test_committed_week_is_written_as_json_lines_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics_export, "_load_pyarrow", lambda: None)
+    # a long interval keeps the writer thread out of the way, close writes what is left
+    exporter = AnalyticsExporter(str(tmp_path), flush_interval=3600)
+    simulation = committed(exporter)
+    exporter.close()
+
+    for table in TABLES:
+        assert (tmp_path / table / "scenario=default" / "week=1").is_dir()
+    decisions = read_jsonl(tmp_path / "decisions" / "scenario=default" / "week=1")
+    assert len(decisions) == 1
+    assert decisions[0]["decision"] == "Hire contractors"
+    assert decisions[0]["game_id"] == simulation.game_id
+    # partition keys live in the directory names only
+    assert "scenario" not in decisions[0] and "week" not in decisions[0]
+    recommendations = read_jsonl(tmp_path / "recommendations" / "scenario=default" / "week=1")
+    assert {(row["agent"], row["change"]) for row in recommendations} == {("CEO", 4.0), ("CFO", 6.0)}
+    applied = read_jsonl(tmp_path / "applied_changes" / "scenario=default" / "week=1")
+    assert [(row["metric"], row["requested"]) for row in applied] == [("core.revenue", 5.0)]
+
+
+def test_parquet_datasets_keep_the_fixed_schema(tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.dataset
+
+    exporter = AnalyticsExporter(str(tmp_path), flush_interval=3600)
+    committed(exporter)
+    exporter.close()
+    table = pyarrow.dataset.dataset(str(tmp_path / "decisions"), partitioning="hive").to_table()
+    assert table.num_rows == 1
+    assert table.schema.field("events").type == pyarrow.list_(pyarrow.string())
+
+
+def test_export_is_off_without_a_directory(monkeypatch):
+    monkeypatch.delenv("SIMULATION_ANALYTICS_DIR", raising=False)
+    assert create_analytics_exporter() is None
@@ -0,0 +1,48 @@
+import asyncio
+
+import api
+from simulation_manager import SimulationManager
+
+
+def test_read_during_locked_submit_does_not_disturb_it(monkeypatch, call_api):
+    async def slow_analysis(self, week, decision, department, *args, **kwargs):
+        await asyncio.sleep(0.2)
+        return {"discussion": [], "recommendations": {"CEO": {"core.revenue": 1.0}}, "consensus": {"core.revenue": 1.0}}
+
+    monkeypatch.setattr(SimulationManager, "_run_analysis", slow_analysis)
+
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=race")
+        submit = asyncio.create_task(
+            client.post("/api/decisions/submit?session_id=race&reuse=false", json={"content": "Hire contractors"})
+        )
+        await asyncio.sleep(0.05)
+        during = await client.get("/api/simulation/status?session_id=race")
+        submitted = await submit
+        after = await client.get("/api/simulation/status?session_id=race")
+        return during, submitted, after
+
+    during, submitted, after = call_api(scenario)
+    assert during.status_code == 200
+    assert not during.json()["awaiting_action"]
+    assert submitted.status_code == 200
+    assert after.json()["awaiting_action"]
+
+
+def test_invalid_session_ids_are_rejected(call_api):
+    async def scenario(client):
+        return [
+            await client.post("/api/simulation/start", params={"session_id": "../../tmp/evil"}),
+            await client.get("/api/simulation/status", params={"session_id": "a/b"}),
+        ]
+
+    assert [response.status_code for response in call_api(scenario)] == [422, 422]
+    assert not api.simulations
+
+
+def test_reads_of_unknown_sessions_are_not_cached(call_api):
+    async def scenario(client):
+        await client.get("/api/simulation/status?session_id=never-started")
+
+    call_api(scenario)
+    assert "never-started" not in api.simulations
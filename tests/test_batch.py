@@ -0,0 +1,41 @@
+import json
+
+import api
+from job_queue import _current_job
+from simulation_manager import SimulationManager
+
+
+def test_batch_shares_one_detached_run_per_identical_decision(monkeypatch, call_api):
+    runs = []
+
+    async def analysis(self, week, decision, department, *args, **kwargs):
+        runs.append({"runner": self, "decision": decision, "job": _current_job.get()})
+        return {"discussion": [], "recommendations": {"CEO": {"core.revenue": 2.0}}, "consensus": {"core.revenue": 2.0}}
+
+    monkeypatch.setattr(SimulationManager, "_run_analysis", analysis)
+
+    async def scenario(client):
+        for session_id in ("alice", "bob", "carol"):
+            await client.post(f"/api/simulation/start?session_id={session_id}")
+        response = await client.post("/api/decisions/batch", json={"items": [
+            {"session_id": "alice", "content": "Hire contractors"},
+            {"session_id": "bob", "content": "Hire contractors"},
+            {"session_id": "carol", "content": "Reduce feature scope"},
+            {"session_id": "../eve", "content": "Hire contractors"},
+        ]})
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    lines = call_api(scenario)
+    accepted, results = lines[0], lines[1:]
+    assert [item["session_id"] for item in accepted["items"]] == ["alice", "bob", "carol"]
+    assert [(item["index"], item["status_code"]) for item in accepted["rejected"]] == [(3, 422)]
+    assert sorted(result["status"] for result in results) == ["completed"] * 3
+
+    assert sorted(run["decision"] for run in runs) == ["Hire contractors", "Reduce feature scope"]
+    sessions = [api.simulations[session_id] for session_id in ("alice", "bob", "carol")]
+    # shared runs use their own agents and report progress to no job
+    assert all(run["runner"] not in sessions and run["job"] is None for run in runs)
+
+    alice, bob = (simulation.user_decisions[0]["analysis"] for simulation in sessions[:2])
+    assert alice == bob
+    assert alice is not bob
@@ -0,0 +1,52 @@
+import api
+
+
+def test_week_challenge_revalidates_with_the_scenario_etag(call_api):
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=etag-week")
+        first = await client.get("/api/simulation/week/1?session_id=etag-week")
+        again = await client.get("/api/simulation/week/1?session_id=etag-week", headers={"If-None-Match": first.headers["etag"]})
+        other = await client.get("/api/simulation/week/2?session_id=etag-week", headers={"If-None-Match": first.headers["etag"]})
+        return first, again, other
+
+    first, again, other = call_api(scenario)
+    digest = api.simulations["etag-week"].scenario.digest
+    assert first.headers["etag"] == f'W/"default-{digest}-1"'
+    # the URL belongs to a session that may start another scenario, no shared cache may keep it
+    assert first.headers["cache-control"] == api.REVALIDATE
+    assert again.status_code == 304
+    assert again.content == b""
+    assert other.status_code == 200
+
+
+def test_status_etag_changes_with_the_session(analyses, call_api):
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=etag-status")
+        before = await client.get("/api/simulation/status?session_id=etag-status")
+        unchanged = await client.get("/api/simulation/status?session_id=etag-status", headers={"If-None-Match": before.headers["etag"]})
+        await client.post("/api/decisions/submit?session_id=etag-status&reuse=false", json={"content": "Hire contractors"})
+        after = await client.get("/api/simulation/status?session_id=etag-status", headers={"If-None-Match": before.headers["etag"]})
+        return unchanged, after
+
+    unchanged, after = call_api(scenario)
+    assert unchanged.status_code == 304
+    assert after.status_code == 200
+    assert after.json()["awaiting_action"] is True
+
+
+def test_finished_week_metrics_keep_their_etag_within_a_game(analyses, call_api):
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=etag-metrics")
+        await client.post("/api/decisions/submit?session_id=etag-metrics&reuse=false", json={"content": "Hire contractors"})
+        await client.post("/api/decisions/decision_1/action?session_id=etag-metrics", json={"action": "accept_all"})
+        finished = await client.get("/api/metrics/week/1?session_id=etag-metrics")
+        await client.post("/api/decisions/submit?session_id=etag-metrics&reuse=false", json={"content": "Raise prices"})
+        still = await client.get("/api/metrics/week/1?session_id=etag-metrics", headers={"If-None-Match": finished.headers["etag"]})
+        await client.post("/api/simulation/reset?session_id=etag-metrics")
+        await client.post("/api/simulation/start?session_id=etag-metrics")
+        new_game = await client.get("/api/metrics/week/1?session_id=etag-metrics", headers={"If-None-Match": finished.headers["etag"]})
+        return still, new_game
+
+    still, new_game = call_api(scenario)
+    assert still.status_code == 304
+    assert new_game.status_code == 200
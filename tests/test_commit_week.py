@@ -0,0 +1,51 @@
+import json
+from copy import deepcopy
+
+import pytest
+
+from simulation_manager import SimulationManager
+
+
+def prepared(**kwargs):
+    simulation = SimulationManager(scenario="default", seed=1, **kwargs)
+    simulation.weekly_decisions[1] = {"decision": "Hire contractors", "consensus": {"core.revenue": 5.0}}
+    return simulation
+
+
+def test_commit_clamps_out_of_range_recommendations():
+    simulation = prepared()
+    simulation.weekly_decisions[1]["consensus"] = {"core.revenue": 80.0, "core.unknown": 1.0}
+    result = simulation.commit_week(1)
+    assert result["changes"] == {"core.revenue": 28.0}
+    assert {violation["reason"] for violation in result["violations"]} == {"out_of_range", "unknown_metric"}
+
+
+def test_failed_commit_rolls_back(monkeypatch):
+    simulation = prepared()
+    before = deepcopy(simulation.metrics_manager.get_week_metrics(1))
+    draws = dict(simulation.metrics_manager.draws)
+    fired = list(simulation.fired_events)
+
+    def fail(week, decision):
+        raise RuntimeError("event engine failed")
+
+    monkeypatch.setattr(simulation, "fire_events", fail)
+    with pytest.raises(RuntimeError):
+        simulation.commit_week(1)
+    assert simulation.metrics_manager.get_week_metrics(1) == before
+    assert simulation.metrics_manager.draws == draws
+    assert simulation.fired_events == fired
+    assert "applied_changes" not in simulation.weekly_decisions[1]
+
+
+def test_metrics_are_only_written_when_a_file_is_given(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    prepared().commit_week(1)
+    assert list(tmp_path.iterdir()) == []
+
+    metrics_file = tmp_path / "metrics_data.json"
+    simulation = prepared(metrics_file=str(metrics_file))
+    simulation.commit_week(1)
+    saved = json.loads(metrics_file.read_text())
+    week = simulation.metrics_manager.get_week_metrics(1)
+    assert saved["weekly_metrics"]["week1"]["core"] == week["core"]
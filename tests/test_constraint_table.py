@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from constraint_table import ConstraintTable
+
+METRICS = json.load(open("metrics_data.json"))
+
+
+@pytest.fixture
+def table():
+    return ConstraintTable(METRICS)
+
+
+def test_lookup_scopes_department_metrics(table):
+    assert table.lookup("core.revenue", None) is not None
+    assert table.lookup("department.quality_score", "product") is not None
+    assert table.lookup("department.quality_score", "SALES") is None
+
+
+def test_check_reports_every_violation(table):
+    violations = table.check(
+        {"core.revenue": 29.0, "core.unknown": 1.0, "department.development_speed": 5.0, "core.profit_margin": -14.0}, "Product"
+    )
+    reasons = {violation["metric"]: violation["reason"] for violation in violations}
+    # revenue allows up to 30%, but 29 ± 2 reaches past it
+    assert reasons == {"core.revenue": "out_of_range", "core.unknown": "unknown_metric", "core.profit_margin": "out_of_range"}
+    assert table.check({"core.revenue": 5.0}, "Product") == []
+
+
+def test_clamp_gives_a_change_set_that_passes_check(table):
+    changes = {"core.revenue": 50.0, "core.profit_margin": -40.0, "department.brand_value": 3.0}
+    clamped = table.clamp(changes, "Product")
+    # brand_value belongs to marketing, product changes cannot touch it
+    assert set(clamped) == {"core.revenue", "core.profit_margin"}
+    assert clamped["core.revenue"] == 28.0
+    assert clamped["core.profit_margin"] == -13.5
+    assert table.check(clamped, "Product") == []
+
+
+def test_clamp_uses_the_midpoint_when_the_band_is_wider_than_the_range():
+    table = ConstraintTable({"metrics_definitions": {"core": {"risky": {"min_change": -1, "max_change": 1, "uncertainty_range": 5}}}})
+    assert table.clamp({"core.risky": 10.0}, None) == {"core.risky": 0.0}
+
+
+def test_validate_endpoint_reports_and_clamps(call_api):
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=constraints")
+        return await client.post(
+            "/api/metrics/validate?session_id=constraints", json={"changes": {"core.revenue": 50.0}, "clamp": True}
+        )
+
+    body = call_api(scenario).json()
+    assert not body["valid"]
+    assert [violation["reason"] for violation in body["violations"]] == ["out_of_range"]
+    assert body["clamped"] == {"core.revenue": 28.0}
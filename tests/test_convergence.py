@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+from convergence import ApprovalTermination, ConvergenceTermination
+from recommendation_tracker import RecommendationAggregate
+
+ALLOWED = ["core.revenue", "core.profit_margin"]
+
+
+class Tracker:
+    """Extracts the recommendations scripted per reply instead of calling a model"""
+
+    def __init__(self, replies):
+        self.replies = dict(replies)
+        self.aggregate = RecommendationAggregate()
+
+    def process_message(self, sender, content):
+        recommendations = self.replies.get(content, {})
+        if recommendations:
+            self.aggregate.add(sender, recommendations)
+        return recommendations
+
+    def consensus(self):
+        return self.aggregate.consensus()
+
+
+def message(source, content):
+    return SimpleNamespace(source=source, content=content)
+
+
+def run(condition, messages):
+    """Feed messages one at a time like a group chat does, return the index that stopped it"""
+    async def main():
+        for index, item in enumerate(messages):
+            if await condition([item]) is not None:
+                return index
+        return None
+    return asyncio.run(main())
+
+
+def test_stops_once_a_contributing_reply_leaves_the_consensus_in_place():
+    tracker = Tracker({
+        "cto": {"core.revenue": 5.0, "core.profit_margin": 2.0},
+        "coo": {"core.revenue": 5.4, "core.profit_margin": 2.2},
+    })
+    condition = ConvergenceTermination(tracker, ALLOWED, ["CEO", "CTO", "COO"])
+    assert run(condition, [message("user", "task"), message("CTO", "cto"), message("COO", "coo")]) == 2
+
+
+def test_replies_without_recommendations_never_end_the_round():
+    tracker = Tracker({"cto": {"core.revenue": 5.0, "core.profit_margin": 2.0}})
+    condition = ConvergenceTermination(tracker, ALLOWED, ["CEO", "CTO", "COO"])
+    # the consensus is unchanged after the COO and CEO replies, but neither said anything extractable
+    assert run(condition, [message("CTO", "cto"), message("COO", "sounds good"), message("CEO", "agreed")]) is None
+
+
+def test_stable_replies_asks_for_agreement_in_a_row():
+    tracker = Tracker({
+        "first": {"core.revenue": 5.0, "core.profit_margin": 2.0},
+        "second": {"core.revenue": 5.0, "core.profit_margin": 2.0},
+        "third": {"core.revenue": 5.5, "core.profit_margin": 2.0},
+    })
+    condition = ConvergenceTermination(tracker, ALLOWED, ["CEO", "CTO", "COO"], stable_replies=2)
+    replies = [message("CTO", "first"), message("COO", "second"), message("CEO", "third")]
+    assert run(condition, replies) == 2
+
+
+def test_low_coverage_and_moving_values_keep_talking():
+    tracker = Tracker({
+        "narrow": {"core.revenue": 5.0},
+        "moved": {"core.revenue": 12.0, "core.profit_margin": 2.0},
+    })
+    condition = ConvergenceTermination(tracker, ALLOWED, ["CTO", "COO"], min_coverage=1.0)
+    assert run(condition, [message("CTO", "narrow"), message("COO", "narrow"), message("CTO", "moved")]) is None
+
+
+def test_approval_counts_only_after_every_other_participant_replied():
+    condition = ApprovalTermination("CEO", ["CEO", "CTO", "COO"])
+    messages = [
+        message("user", "Please APPROVE my plan"),
+        message("CEO", "APPROVE"),
+        message("CTO", "We need contractors"),
+        message("CEO", "APPROVE"),
+        message("COO", "Operations can absorb it"),
+        message("CEO", "APPROVE"),
+    ]
+    assert run(condition, messages) == 5
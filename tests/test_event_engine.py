@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from event_engine import EventEngine
+from scenario import Scenario, ScenarioError, ScenarioLoader
+from scenario_catalog import get_catalog
+from simulation_manager import SimulationManager
+
+METRICS = json.load(open("metrics_data.json"))
+
+
+def scenario(*events_by_week, departments=("Product", "HR")):
+    weeks = {}
+    for week, (department, events) in enumerate(zip(departments, events_by_week), start=1):
+        weeks[f"week{week}"] = {
+            "department": department,
+            "situation": "The release is late",
+            "available_resources": {"developers": 5, "hiring_budget": 50000},
+            "constraints": {},
+            "possible_approaches": ["Hire contractors"],
+            "unexpected_events": events
+        }
+    return Scenario("test", {"weekly_challenges": weeks})
+
+
+def event(impact, **extra):
+    return dict({"trigger": "hire_contractors", "event": "Contractors need onboarding", "impact": impact}, **extra)
+
+
+@pytest.fixture
+def engine():
+    return get_catalog().get("default").event_engine
+
+
+@pytest.mark.parametrize("decision, fired", [
+    ("Hire contractors", ["hire_contractors"]),
+    ("Hiring contractors to fix the bugs", ["hire_contractors"]),
+    ("We will not hire contractors; postpone other projects", []),
+    ("Avoid hiring contractors", []),
+    ("Don't reduce feature scope, hire contractors", ["hire_contractors"]),
+    ("Reduce feature scope", []),
+])
+def test_events_fire_only_from_clauses_that_take_the_trigger(engine, decision, fired):
+    assert [event.trigger for event in engine.match(1, decision)] == fired
+
+
+def test_impacts_resolve_exactly_against_the_declared_target():
+    compiled = EventEngine(scenario(
+        [event({"hiring_budget": "-10%", "revenue": "+5%", "timeline": "+1 week"}, effects={"budget": -10000})],
+        []
+    ), METRICS)
+    fired = compiled.match(1, "Hire contractors")[0]
+    assert (fired.target_week, fired.target_department) == (2, "HR")
+    assert fired.resource_changes == {"hiring_budget": -5000.0}
+    assert fired.metric_changes == {"core.revenue": 5.0}
+    assert fired.effects == {"budget": -10000, "timeline": "+1 week"}
+
+
+@pytest.mark.parametrize("impact, extra, message", [
+    # "budget" is only a part of week 2's hiring_budget, it must be named exactly
+    ({"budget": -10000}, {}, "impact 'budget'"),
+    # market_share belongs to sales, week 2 is HR
+    ({"market_share": -0.01}, {}, "impact 'market_share'"),
+    ({"revenue": "+5%"}, {"target_week": 3}, "target_week must be from 1 to 2"),
+    ({"revenue": "+5%"}, {"target_department": "Legal"}, "Legal has no metrics"),
+])
+def test_unmatched_impacts_reject_the_scenario(impact, extra, message):
+    with pytest.raises(ScenarioError, match=message):
+        EventEngine(scenario([event(impact, **extra)], []), METRICS)
+
+
+def test_declared_department_receives_its_metric():
+    compiled = EventEngine(scenario([event({"market_share": -0.01}, target_department="Sales")], []), METRICS)
+    assert compiled.match(1, "Hire contractors")[0].metric_changes == {"department.market_share": -1.0}
+
+
+def test_final_week_events_are_applied():
+    simulation = SimulationManager(scenario="default", seed=1)
+    final = simulation.scenario.total_weeks
+    revenue = simulation.metrics_manager.get_week_metrics(final)["core"]["revenue"]
+    market_share = simulation.metrics_manager.get_week_metrics(2)["department"]["SALES"]["market_share"]
+
+    fired = simulation.fire_events(final, {"decision": "Launch a referral program", "feedback": "no promotion"})
+
+    assert [(event["trigger"], event["target_week"]) for event in fired] == [("referral_program", final)]
+    metrics = simulation.metrics_manager.get_week_metrics(final)
+    assert metrics["core"]["revenue"] == pytest.approx(revenue * 1.03)
+    # the final week does not track sales metrics, the latest earlier value carries forward
+    assert metrics["department"]["SALES"]["market_share"] == pytest.approx(market_share * 1.02)
+
+
+def test_reload_with_an_invalid_event_keeps_the_last_good_version(tmp_path):
+    path = tmp_path / "simulation_data.json"
+    path.write_text(json.dumps(scenario([event({"revenue": "+5%"})], []).data))
+    loader = ScenarioLoader(str(path), "test", check_interval=0, on_load=lambda loaded: EventEngine(loaded, METRICS))
+    good = loader.get()
+
+    path.write_text(json.dumps(scenario([event({"budget": -10000})], []).data))
+    loader._mtime = 0
+    assert loader.get() is good
@@ -0,0 +1,66 @@
+import asyncio
+
+import api
+from simulation_manager import SimulationManager
+
+
+def test_idempotent_submit_replays_the_first_response(analyses, call_api):
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=idem")
+        headers = {"Idempotency-Key": "k1"}
+        body = {"content": "Hire contractors"}
+        first = await client.post("/api/decisions/submit?session_id=idem&reuse=false", json=body, headers=headers)
+        again = await client.post("/api/decisions/submit?session_id=idem&reuse=false", json=body, headers=headers)
+        other = await client.post(
+            "/api/decisions/submit?session_id=idem&reuse=false", json={"content": "Reduce feature scope"}, headers=headers
+        )
+        return first, again, other
+
+    first, again, other = call_api(scenario)
+    assert first.status_code == 200
+    assert again.json() == first.json()
+    assert analyses == ["Hire contractors"]
+    # the same key with a different body is a client error, not a replay
+    assert other.status_code == 422
+
+
+def test_idempotent_action_is_applied_once(analyses, call_api):
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=idem-action")
+        await client.post("/api/decisions/submit?session_id=idem-action&reuse=false", json={"content": "Hire contractors"})
+        headers = {"Idempotency-Key": "accept-1"}
+        first = await client.post("/api/decisions/decision_1/action?session_id=idem-action", json={"action": "accept_all"}, headers=headers)
+        again = await client.post("/api/decisions/decision_1/action?session_id=idem-action", json={"action": "accept_all"}, headers=headers)
+        return first, again
+
+    first, again = call_api(scenario)
+    assert first.status_code == 200
+    assert again.json() == first.json()
+    # a second accept would have moved the session on to week 3
+    assert api.simulations["idem-action"].current_week == 1
+
+
+def test_concurrent_submits_on_one_session_run_in_turn(monkeypatch, call_api):
+    running = []
+    overlaps = []
+
+    async def analysis(self, week, decision, department, *args, **kwargs):
+        overlaps.append(bool(running))
+        running.append(decision)
+        await asyncio.sleep(0.05)
+        running.remove(decision)
+        return {"discussion": [], "recommendations": {"CEO": {"core.revenue": 1.0}}, "consensus": {"core.revenue": 1.0}}
+
+    monkeypatch.setattr(SimulationManager, "_run_analysis", analysis)
+
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=serial")
+        return await asyncio.gather(*(
+            client.post("/api/decisions/submit?session_id=serial&reuse=false", json={"content": content})
+            for content in ("Hire contractors", "Reduce feature scope")
+        ))
+
+    responses = call_api(scenario)
+    # the second submit only starts once the first is saved, and finds its decision awaiting an action
+    assert sorted(response.status_code for response in responses) == [200, 400]
+    assert overlaps == [False]
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from job_queue import (
+    MAX_PRIORITY,
+    MIN_PRIORITY,
+    InvalidCallback,
+    JobQueue,
+    check_callback_url,
+    report_progress,
+)
+
+
+class Records:
+    def __init__(self):
+        self.saved = []
+
+    def save(self, job):
+        self.saved.append(job)
+
+    def load(self, job_id):
+        return None
+
+
+def test_jobs_of_a_session_run_in_order_and_priorities_are_clamped():
+    order = []
+
+    def job(name):
+        async def run():
+            order.append(name)
+            return {"name": name}
+        return run
+
+    async def main():
+        queue = JobQueue(workers=1)
+        jobs = [
+            await queue.submit("a", "submit", job("a1"), priority=5),
+            await queue.submit("a", "submit", job("a2"), priority=5),
+            await queue.submit("b", "submit", job("b1"), priority=-1000),
+            await queue.submit("c", "submit", job("c1"), priority=1000),
+        ]
+        for submitted in jobs:
+            await queue.wait(submitted)
+        return jobs
+
+    jobs = asyncio.run(main())
+    assert [job.priority for job in jobs] == [5, 5, MIN_PRIORITY, MAX_PRIORITY]
+    # everything is queued before the worker starts: b1 jumps every queue, c1 waits for all of a
+    assert order == ["b1", "a1", "a2", "c1"]
+    assert jobs[0].to_dict()["result"] == {"name": "a1"}
+
+
+def test_failed_job_records_the_error():
+    async def fail():
+        raise RuntimeError("agents unavailable")
+
+    async def main():
+        queue = JobQueue(workers=1)
+        return await queue.wait(await queue.submit("a", "submit", fail))
+
+    job = asyncio.run(main())
+    assert job.status == "failed"
+    assert job.error == "agents unavailable"
+    assert job.status_code == 500
+
+
+def test_progress_is_recorded_for_other_workers():
+    records = Records()
+
+    async def run():
+        report_progress({"messages": 3})
+        return {}
+
+    async def main():
+        queue = JobQueue(workers=1, records=records)
+        await queue.wait(await queue.submit("a", "submit", run))
+
+    asyncio.run(main())
+    assert {"status": "running", "progress": {"messages": 3}}.items() <= next(
+        job for job in records.saved if job["progress"]
+    ).items()
+    assert records.saved[-1]["status"] == "completed"
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://example.com/hook",
+    "http://127.0.0.1:8000/admin",
+    "http://10.0.0.5/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::ffff:127.0.0.1]/hook",
+])
+def test_callbacks_to_internal_addresses_are_refused(url):
+    with pytest.raises(InvalidCallback):
+        check_callback_url(url)
+
+
+def test_callback_allowlist():
+    check_callback_url("https://hooks.example.com/done", frozenset({"hooks.example.com"}))
+    with pytest.raises(InvalidCallback):
+        check_callback_url("https://other.example.com/done", frozenset({"hooks.example.com"}))
+
+
+def test_slow_callback_does_not_hold_the_next_job(monkeypatch):
+    delivered = threading.Event()
+    finished = {}
+
+    def slow_post(self, url, payload):
+        time.sleep(0.3)
+        delivered.set()
+
+    monkeypatch.setattr(JobQueue, "_post_callback", slow_post)
+
+    def job(name):
+        async def run():
+            finished[name] = delivered.is_set()
+            return {}
+        return run
+
+    async def main():
+        queue = JobQueue(workers=1, callback_hosts=["hooks.example.com"])
+        first = await queue.submit("a", "submit", job("first"), callback_url="https://hooks.example.com/done")
+        second = await queue.submit("a", "submit", job("second"))
+        await queue.wait(second)
+        await asyncio.gather(*queue._callbacks)
+        return first
+
+    first = asyncio.run(main())
+    assert first.status == "completed"
+    assert finished == {"first": False, "second": False}
+    assert delivered.is_set()
+
+
+def test_async_submit_answers_with_a_job_to_poll(analyses, call_api):
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=jobs")
+        accepted = await client.post(
+            "/api/decisions/submit?session_id=jobs&run_async=true&reuse=false", json={"content": "Hire contractors"}
+        )
+        job_id = accepted.json()["job_id"]
+        for _ in range(100):
+            job = (await client.get(f"/api/jobs/{job_id}")).json()
+            if job["status"] in ("completed", "failed"):
+                break
+            await asyncio.sleep(0.01)
+        return accepted, job
+
+    accepted, job = call_api(scenario)
+    assert accepted.status_code == 202
+    assert job["status"] == "completed"
+    assert job["result"]["decision_id"] == "decision_1"
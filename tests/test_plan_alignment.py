@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from plan_alignment import ALIGNMENT_KEYS, PlanAlignmentScorer
+from simulation_manager import SimulationManager
+
+CEO_PLAN = {
+    "quarterly_objectives": {
+        "key_initiatives": ["Launch the mobile app", "Expand into European markets"],
+        "timeline_milestones": [{"milestone": "Beta release in week 4"}],
+        "resource_allocation": {"marketing": 100000, "development": 200000}
+    }
+}
+
+
+@pytest.fixture
+def scorer():
+    return PlanAlignmentScorer(CEO_PLAN)
+
+
+def test_a_plan_following_the_ceo_outscores_an_unrelated_one(scorer):
+    following = scorer.score(
+        "Launch the mobile app with a beta release in week 4, then expand into European markets. "
+        "Mitigate risk with a rollback plan and monitor the launch.",
+        {"marketing": 80000, "development": 190000}
+    )
+    unrelated = scorer.score("Repaint the office lobby")
+    assert set(following) == set(ALIGNMENT_KEYS)
+    assert all(0 <= value <= 1 for value in following.values())
+    for key in ("strategic_alignment", "initiative_coverage", "risk_assessment", "resource_allocation", "timeline_feasibility"):
+        assert following[key] > unrelated[key]
+    assert following["resource_allocation"] == 1.0
+    # a budget the plan does not mention is neither right nor wrong
+    assert unrelated["resource_allocation"] == 0.5
+
+
+@pytest.mark.parametrize("amount, expected", [(50000, 1.0), (100000, 1.0), (150000, 0.5), (200000, 0.0), (25000, 0.75)])
+def test_budget_scores_against_the_target(scorer, amount, expected):
+    # development is not mentioned and scores 0.5, the mean of both is reported
+    assert scorer.budget_scores([{"marketing": amount}])[0] == pytest.approx((expected + 0.5) / 2)
+
+
+def test_batch_scores_match_single_scores(scorer):
+    plans = ["Launch the mobile app", "Expand into European markets by next quarter", ""]
+    batch = scorer.score_batch(plans)
+    assert batch.shape == (3, len(ALIGNMENT_KEYS))
+    for plan, row in zip(plans, batch):
+        assert list(scorer.score(plan).values()) == [round(float(value), 3) for value in row]
+
+
+def test_borderline_flags_the_middle_band():
+    scores = np.array([[0.5] * 5, [0.9] * 5, [0.1] * 5])
+    assert PlanAlignmentScorer.borderline(scores).tolist() == [True, False, False]
+
+
+def test_simulation_scores_plans_with_the_scenario_scorer():
+    results = SimulationManager(scenario="default").analyze_plan_alignment(["Launch the product", "Hire more engineers"])
+    assert len(results) == 2
+    assert all(set(result) == set(ALIGNMENT_KEYS) for result in results)
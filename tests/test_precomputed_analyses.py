@@ -0,0 +1,78 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from precomputed_analyses import ARTIFACT_VERSION, PrecomputedAnalyses, approach_decisions
+
+APPROACHES = ("Hire contractors", "Postpone other projects", "Reduce feature scope")
+
+
+def entries():
+    return [
+        {"week": 1, "department": "PRODUCT", "approaches": list(approaches), "decision": decision, "analysis": {"decision": decision}}
+        for approaches, decision in approach_decisions(APPROACHES)
+    ]
+
+
+@pytest.fixture
+def precomputed():
+    return PrecomputedAnalyses(entries())
+
+
+def test_approach_decisions_cover_combinations():
+    decisions = approach_decisions(APPROACHES, max_combination=2)
+    assert len(decisions) == 6
+    assert (("Hire contractors", "Reduce feature scope"), "Hire contractors and reduce feature scope") in decisions
+
+
+@pytest.mark.parametrize("decision", ["Hiring contractors", "We will hire contractors"])
+def test_precomputed_matches_rewordings(precomputed, decision):
+    similarity, entry = precomputed.match(1, "Product", decision)
+    assert similarity >= precomputed.threshold
+    assert entry.approaches == ("Hire contractors",)
+
+
+def test_precomputed_prefers_the_combination_named(precomputed):
+    _, entry = precomputed.match(1, "PRODUCT", "Hire contractors and reduce feature scope")
+    assert entry.approaches == ("Hire contractors", "Reduce feature scope")
+
+
+@pytest.mark.parametrize("decision", [
+    "Hire more contractors",
+    "We should hire contractors to hit the deadline",
+    "fire all contractors and postpone hiring",
+    "Do not hire contractors",
+    "don't reduce feature scope",
+])
+def test_precomputed_refuses_other_decisions(precomputed, decision):
+    assert precomputed.match(1, "PRODUCT", decision) is None
+
+
+def test_precomputed_only_serves_its_week(precomputed):
+    assert precomputed.match(2, "PRODUCT", "Hire contractors") is None
+
+
+def test_artifact_built_for_other_content_is_ignored(tmp_path):
+    path = tmp_path / "precomputed_analyses.json"
+    path.write_text(json.dumps({"version": ARTIFACT_VERSION, "scenario_digest": "abc", "entries": entries()}))
+    assert len(PrecomputedAnalyses.load(str(path), SimpleNamespace(digest="abc"))) == 6
+    assert len(PrecomputedAnalyses.load(str(path), SimpleNamespace(digest="edited"))) == 0
+    assert len(PrecomputedAnalyses.load(str(tmp_path / "missing.json"), SimpleNamespace(digest="abc"))) == 0
+
+
+def test_submit_serves_a_matching_approach_without_the_agents(analyses, call_api, monkeypatch):
+    from scenario_catalog import get_catalog
+
+    pack = get_catalog().get("default")
+    # no artifact is built in the repo, the pack keeps this matcher while its mtime stays 0
+    monkeypatch.setattr(pack, "_precomputed", PrecomputedAnalyses(entries(), scenario=pack.scenario))
+
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=precomputed")
+        return await client.post("/api/decisions/submit?session_id=precomputed", json={"content": "We will hire contractors"})
+
+    analysis = call_api(scenario).json()["analysis"]
+    assert analysis["decision"] == "Hire contractors"
+    assert analysis["reused_from"]["approaches"] == ["Hire contractors"]
+    assert analyses == []
@@ -0,0 +1,36 @@
+import pytest
+
+from prompts import ANALYSIS_INSTRUCTIONS
+from scenario_catalog import get_catalog
+
+
+@pytest.fixture
+def prompts():
+    return get_catalog().get("default").prompts
+
+
+def test_prompts_share_their_prefix_across_sessions(prompts):
+    first = prompts.analysis_task(1, "Product", "Hire contractors")
+    second = prompts.analysis_task(1, "Product", "Reduce feature scope", feedback="Too expensive")
+    shared = ANALYSIS_INSTRUCTIONS + "\n" + prompts.week_context(1, "Product") + "\n"
+    assert first.startswith(shared)
+    assert second.startswith(shared)
+    assert first.endswith("User's Decision: Hire contractors")
+    assert second.index("User's Decision") < second.index("Too expensive")
+
+
+def test_week_context_lists_resources_constraints_and_allowed_metrics(prompts):
+    context = prompts.week_context(1, "product")
+    assert context.startswith("WEEK 1 - PRODUCT")
+    assert "- developers: 5" in context
+    assert "- budget_cap: 30000" in context
+    assert "- core.revenue: -20% to +30% (outcome varies by ±2%)" in context
+    assert "department.quality_score" in context
+    # another department's metrics are never offered
+    assert "department.brand_value" not in context
+    assert prompts.week_context(1, "Product") is context
+
+
+def test_resource_changes_sit_between_context_and_decision(prompts):
+    prompt = prompts.analysis_task(2, "HR", "Raise salaries", resource_changes={"hiring_budget": -5000})
+    assert prompt.index("WEEK 2 - HR") < prompt.index("- hiring_budget: -5000") < prompt.index("User's Decision")
@@ -0,0 +1,41 @@
+import pytest
+
+from recommendation_tracker import RecommendationAggregate, RecommendationTracker, merge_recommendations
+
+
+def test_aggregate_matches_the_batch_mean_for_equal_weights():
+    decisions = {
+        "CEO": {"core.revenue": 4.0, "core.profit_margin": -1.0},
+        "CFO": {"core.revenue": 8.0},
+        "CTO": {"core.revenue": "n/a", "core.profit_margin": 3.0},
+    }
+    aggregate = RecommendationAggregate()
+    for agent, recommendations in decisions.items():
+        aggregate.add(agent, recommendations)
+    assert aggregate.consensus() == pytest.approx(merge_recommendations(decisions))
+
+
+def test_revisions_move_the_consensus_with_the_agent_weight():
+    aggregate = RecommendationAggregate(weights={"CEO": 3.0})
+    aggregate.add("CEO", {"core.revenue": 2.0})
+    aggregate.add("CFO", {"core.revenue": 10.0})
+    aggregate.add("CFO", {"core.revenue": 6.0})
+    # (3 * 2 + 10 + 6) / 5
+    assert aggregate.consensus() == {"core.revenue": pytest.approx(4.4)}
+    summary = aggregate.summary()["core.revenue"]
+    assert summary["count"] == 3
+    assert summary["agents"] == ["CEO", "CFO"]
+    assert summary["spread"] > 0
+
+
+def test_tracker_updates_the_consensus_as_each_message_arrives(monkeypatch):
+    replies = {"raise prices": {"core.revenue": 5.0}, "agreed": {}, "go further": {"core.revenue": 7.0}}
+    seen = []
+    tracker = RecommendationTracker(on_update=lambda current: seen.append(current.consensus()))
+    monkeypatch.setattr(tracker, "extract_recommendations_with_gpt", replies.get)
+
+    assert tracker.process_message("CEO", "raise prices") == {"core.revenue": 5.0}
+    assert tracker.process_message("CFO", "agreed") == {}
+    tracker.process_message("CFO", "go further")
+    assert seen == [{"core.revenue": 5.0}, {"core.revenue": 5.0}, {"core.revenue": 6.0}]
+    assert tracker.decisions == {"CEO": {"core.revenue": 5.0}, "CFO": {"core.revenue": 7.0}}
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from data_manager import DataManager
+from reports import Section, iter_report, session_sections
+from simulation_manager import SimulationManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sections():
+    return [
+        Section("decisions", ("week", "content"), iter([(1, "Hire, then train")])),
+        Section("metrics", ("week", "metric", "value"), iter([(1, "core.revenue", 5.0), (2, "core.revenue", 6.5)])),
+    ]
+
+
+def test_formats_render_every_row():
+    text = "".join(iter_report(sections(), "text"))
+    assert "decisions\n---------\nweek: 1  content: Hire, then train\n" in text
+    lines = [json.loads(line) for line in iter_report(sections(), "jsonl")]
+    assert lines[-1] == {"section": "metrics", "week": 2, "metric": "core.revenue", "value": 6.5}
+    rows = list(csv.reader(io.StringIO("".join(iter_report(sections(), "csv")))))
+    assert rows[:2] == [["section", "week", "content"], ["decisions", "1", "Hire, then train"]]
+    assert ["section", "week", "metric", "value"] in rows
+
+
+def test_unknown_format_is_refused():
+    with pytest.raises(ValueError):
+        iter_report(sections(), "xlsx")
+
+
+def test_session_report_is_a_snapshot_of_the_state():
+    simulation = SimulationManager(scenario="default", seed=1)
+    simulation.user_decisions.append({"id": "decision_1", "week": 1, "content": "Hire contractors", "analysis": {}})
+    report = session_sections(simulation)
+    # the session moves on while the report is still streaming
+    simulation.user_decisions[0]["content"] = "Raise prices"
+    simulation.user_decisions.append({"id": "decision_2", "week": 2, "content": "Cut costs", "analysis": {}})
+    decisions = [line for line in iter_report(report, "jsonl") if '"section": "decisions"' in line]
+    assert [json.loads(line)["content"] for line in decisions] == ["Hire contractors"]
+
+
+def test_session_report_endpoint_streams_a_download(analyses, call_api):
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=report")
+        await client.post("/api/decisions/submit?session_id=report&reuse=false", json={"content": "Hire contractors"})
+        return await client.get("/api/reports/session?session_id=report&format=csv")
+
+    response = call_api(scenario)
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="report-report-week1.csv"' in response.headers["content-disposition"]
+    assert "recommendations,1,CEO,core.revenue,5.0" in response.text
+
+
+def test_final_report_keeps_writing_the_company_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DataManager(os.path.join(ROOT, "company_data.json"))
+    manager.update_metrics("CFO", {"price_adjustment": 10})
+    manager.save_final_report("report.txt")
+    assert "Company Growth Strategy Impact Report" in (tmp_path / "report.txt").read_text()
+    assert json.loads((tmp_path / "final_company_data.json").read_text()) == manager.current_data
+
+    manager.save_final_report("report.jsonl", fmt="jsonl", data_file=None)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["final_company_data.json", "report.jsonl", "report.txt"]
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from scenario import Scenario, ScenarioError, ScenarioLoader, load_scenario
+
+
+def week(department="Product", **overrides):
+    data = {
+        "department": department,
+        "situation": "The release is late",
+        "available_resources": {"developers": 5},
+        "constraints": {"budget_cap": 30000},
+        "possible_approaches": ["Hire contractors", "Reduce feature scope"]
+    }
+    data.update(overrides)
+    return data
+
+
+def test_default_scenario_compiles_into_week_and_department_indexes():
+    scenario = load_scenario("simulation_data.json", "default")
+    assert scenario.total_weeks == len(scenario.weeks)
+    first = scenario.challenge(1)
+    assert first.week == 1
+    assert first.department == "Product"
+    assert first in scenario.challenges_for("PRODUCT")
+    assert scenario.challenge(0) is None
+    assert scenario.challenge(scenario.total_weeks + 1) is None
+
+
+def test_digest_follows_content():
+    one = Scenario("a", {"weekly_challenges": {"week1": week()}})
+    same = Scenario("b", {"weekly_challenges": {"week1": week()}})
+    other = Scenario("a", {"weekly_challenges": {"week1": week(situation="Sales are down")}})
+    assert one.digest == same.digest
+    assert one.digest != other.digest
+
+
+@pytest.mark.parametrize("data, message", [
+    ({}, "missing 'weekly_challenges'"),
+    ({"weekly_challenges": {}}, "must not be empty"),
+    ({"weekly_challenges": {"week1": week(), "week3": week()}}, "missing week2"),
+    ({"weekly_challenges": {"week1": week(department=" ")}}, "'department' must not be empty"),
+    ({"weekly_challenges": {"week1": week(possible_approaches="Hire contractors")}}, "'possible_approaches' must be a list"),
+    ({"weekly_challenges": {"week1": week(unexpected_events=[{"trigger": "hire", "event": "Onboarding"}])}}, "missing 'impact'"),
+])
+def test_invalid_scenarios_are_rejected_with_their_location(data, message):
+    with pytest.raises(ScenarioError, match=message):
+        Scenario("broken", data)
+
+
+def test_loader_reloads_changes_and_keeps_the_last_good_version(tmp_path):
+    path = tmp_path / "simulation_data.json"
+    path.write_text(json.dumps({"weekly_challenges": {"week1": week()}}))
+    loader = ScenarioLoader(str(path), "pack", check_interval=0)
+    first = loader.get()
+
+    path.write_text(json.dumps({"weekly_challenges": {"week1": week(), "week2": week("Sales")}}))
+    loader._mtime = 0  # file systems with coarse timestamps may not see the rewrite
+    assert loader.get().total_weeks == 2
+
+    path.write_text("{ not json")
+    loader._mtime = 0
+    assert loader.get().total_weeks == 2
+    assert loader.get() is not first
@@ -0,0 +1,47 @@
+import json
+import shutil
+
+import pytest
+
+from scenario_catalog import DEFAULT_SCENARIO, ScenarioCatalog, UnknownScenario
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    shutil.copy("simulation_data.json", tmp_path / "simulation_data.json")
+    shutil.copy("metrics_data.json", tmp_path / "metrics_data.json")
+    pack = tmp_path / "scenarios" / "retail"
+    pack.mkdir(parents=True)
+    data = json.load(open("simulation_data.json"))
+    data["weekly_challenges"] = {"week1": data["weekly_challenges"]["week1"]}
+    (pack / "simulation_data.json").write_text(json.dumps(data))
+    (tmp_path / "scenarios" / "empty").mkdir()
+    return ScenarioCatalog(root=str(tmp_path))
+
+
+def test_catalog_lists_packs_with_scenario_data(catalog):
+    assert catalog.names() == [DEFAULT_SCENARIO, "retail"]
+
+
+def test_packs_are_loaded_once_and_shared(catalog):
+    retail = catalog.get("retail")
+    assert catalog.get("retail") is retail
+    assert retail.scenario.total_weeks == 1
+    # a pack without its own metrics uses the default ones
+    assert retail.metrics_path == catalog.get(DEFAULT_SCENARIO).metrics_path
+
+    first, second = retail.create_metrics_manager(1), retail.create_metrics_manager(2)
+    assert first.metrics_data is second.metrics_data is retail.metrics_data
+
+
+@pytest.mark.parametrize("name", ["missing", "empty", "../scenarios/retail", ".hidden", ""])
+def test_unknown_or_escaping_names_are_refused(catalog, name):
+    with pytest.raises(UnknownScenario):
+        catalog.get(name)
+
+
+def test_start_on_an_unknown_scenario_is_not_found(call_api):
+    async def scenario(client):
+        return await client.post("/api/simulation/start?session_id=packs&scenario=missing")
+
+    assert call_api(scenario).status_code == 404
@@ -0,0 +1,65 @@
+from copy import deepcopy
+
+import pytest
+
+from metrics_manager import MAX_SEED, MetricsManager
+from simulation_manager import SimulationManager
+
+
+def committed(seed):
+    simulation = SimulationManager(scenario="default", seed=seed)
+    simulation.weekly_decisions[1] = {"decision": "Hire contractors", "consensus": {"core.revenue": 5.0}}
+    return simulation, simulation.commit_week(1)
+
+
+@pytest.mark.parametrize("seed", [-1, MAX_SEED])
+def test_invalid_seed_is_refused(seed):
+    with pytest.raises(ValueError):
+        MetricsManager(metrics_data={}, seed=seed)
+
+
+def test_commit_is_reproducible_for_a_seed():
+    first, first_result = committed(1234)
+    second, second_result = committed(1234)
+    assert first_result["actual_changes"] == second_result["actual_changes"]
+    assert first.metrics_manager.get_week_metrics(1) == second.metrics_manager.get_week_metrics(1)
+    _, other_result = committed(99)
+    assert other_result["actual_changes"] != first_result["actual_changes"]
+
+
+def test_seed_survives_a_snapshot():
+    simulation, _ = committed(1234)
+    restored = SimulationManager(scenario="default")
+    restored.restore_state(deepcopy(simulation.get_state()))
+    assert restored.seed == 1234
+
+    # the next draw of the week continues the stream instead of repeating it
+    again = [
+        manager.metrics_manager.update_week_metrics(1, "Product", {"core.revenue": 5.0})
+        for manager in (simulation, restored)
+    ]
+    assert again[0] == again[1]
+    assert again[0] != simulation.weekly_decisions[1]["actual_changes"]
+
+
+@pytest.mark.parametrize("seed", [-1, 2 ** 63])
+def test_start_rejects_seeds_numpy_cannot_use(seed, call_api):
+    async def scenario(client):
+        return await client.post(f"/api/simulation/start?session_id=seed&seed={seed}")
+
+    assert call_api(scenario).status_code == 422
+
+
+def test_same_seed_gives_the_same_committed_metrics(analyses, call_api):
+    async def play(client, session_id):
+        await client.post(f"/api/simulation/start?session_id={session_id}&seed=1234")
+        await client.post(f"/api/decisions/submit?session_id={session_id}&reuse=false", json={"content": "Hire contractors"})
+        response = await client.post(f"/api/decisions/decision_1/action?session_id={session_id}", json={"action": "accept_all"})
+        assert response.status_code == 200
+        return (await client.get(f"/api/metrics/week/1?session_id={session_id}")).json()
+
+    async def scenario(client):
+        return await play(client, "seed-a"), await play(client, "seed-b")
+
+    first, second = call_api(scenario)
+    assert first == second
@@ -0,0 +1,42 @@
+import json
+
+import numpy as np
+import pytest
+
+import serialization
+from serialization import dumps, encode_response
+
+
+def test_dumps_encodes_numpy_values_and_int_keys():
+    payload = {"metrics": {1: np.float64(2.5)}, "draws": np.array([1, 2]), "name": "Café"}
+    assert json.loads(dumps(payload)) == {"metrics": {"1": 2.5}, "draws": [1, 2], "name": "Café"}
+
+
+def test_compact_json_fallback_matches_orjson(monkeypatch):
+    payload = {"week": 1, "changes": {"core.revenue": [3.5, 2.0]}, "note": None}
+    fast = dumps(payload)
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert dumps(payload) == fast
+
+
+def test_msgpack_is_only_sent_when_accepted():
+    msgpack = pytest.importorskip("msgpack")
+    packed = encode_response({"week": 1}, accept="application/msgpack")
+    assert packed.media_type == "application/msgpack"
+    assert msgpack.unpackb(packed.body) == {"week": 1}
+    assert packed.headers["vary"] == "Accept"
+    assert encode_response({"week": 1}, accept="*/*").media_type == "application/json"
+
+
+def test_endpoints_speak_msgpack(call_api):
+    msgpack = pytest.importorskip("msgpack")
+
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=packed")
+        as_json = await client.get("/api/metrics/current?session_id=packed")
+        as_msgpack = await client.get("/api/metrics/current?session_id=packed", headers={"Accept": "application/msgpack"})
+        return as_json, as_msgpack
+
+    as_json, as_msgpack = call_api(scenario)
+    assert as_msgpack.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(as_msgpack.content) == as_json.json()
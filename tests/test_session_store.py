@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from session_store import (
+    SessionStore,
+    FileSessionStore,
+    InMemorySessionStore,
+    SessionLockTimeout,
+    create_session_store,
+    snapshot_stamp,
+    valid_session_id,
+)
+
+STATE = {"game_id": "g1", "revision": 3, "current_week": 2, "weekly_decisions": {1: {"decision": "Hire contractors"}}}
+
+
+def stores(tmp_path):
+    return [InMemorySessionStore(), FileSessionStore(str(tmp_path))]
+
+
+@pytest.mark.parametrize("kind", [0, 1])
+def test_round_trip_and_stamp(tmp_path, kind):
+    store = stores(tmp_path)[kind]
+    assert store.load("s1") is None
+    assert store.load_stamp("s1") is None
+
+    store.save("s1", STATE)
+    assert store.load("s1") == STATE
+    assert store.load_stamp("s1") == snapshot_stamp("g1", 3)
+
+    store.delete("s1")
+    assert store.load("s1") is None
+    assert store.load_stamp("s1") is None
+
+
+def test_file_store_rejects_path_traversal(tmp_path):
+    store = FileSessionStore(str(tmp_path / "snapshots"))
+    for session_id in ("../evil", "a/b", "", "x" * 65):
+        assert not valid_session_id(session_id)
+        with pytest.raises(ValueError):
+            store.load_bytes(session_id)
+    assert not (tmp_path / "evil.snapshot").exists()
+
+
+def test_store_interface_is_abstract():
+    class Partial(SessionStore):
+        def load_bytes(self, session_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_create_session_store_targets(tmp_path):
+    assert isinstance(create_session_store("memory"), InMemorySessionStore)
+    assert isinstance(create_session_store(str(tmp_path)), FileSessionStore)
+
+
+def test_lock_serializes_work_on_a_session():
+    store = InMemorySessionStore()
+    order = []
+
+    async def work(name):
+        async with store.lock("s1"):
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    async def main():
+        await asyncio.gather(work("a"), work("b"))
+
+    asyncio.run(main())
+    assert order == ["a start", "a end", "b start", "b end"]
+
+
+def test_lock_times_out_while_held():
+    store = InMemorySessionStore(lock_wait=0.05)
+
+    async def main():
+        async with store.lock("s1"):
+            with pytest.raises(SessionLockTimeout):
+                async with store.lock("s1"):
+                    pass
+            # other sessions are not blocked
+            async with store.lock("s2"):
+                pass
+
+    asyncio.run(main())
+
+
+def test_redis_store_round_trip_and_lock():
+    fakeredis = pytest.importorskip("fakeredis")
+    from session_store import RedisSessionStore
+
+    store = RedisSessionStore(client=fakeredis.FakeRedis(), lock_wait=0.05)
+    store.save("s1", STATE)
+    assert store.load("s1") == STATE
+    assert store.load_stamp("s1") == snapshot_stamp("g1", 3)
+
+    async def main():
+        async with store.lock("s1"):
+            with pytest.raises(SessionLockTimeout):
+                async with store.lock("s1"):
+                    pass
+
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+from similarity_index import AnalysisIndex
+
+SCOPE = "default:1:PRODUCT"
+
+
+def test_index_finds_rewordings_within_a_scope():
+    index = AnalysisIndex(threshold=0.85)
+    index.add(SCOPE, "Hire contractors to fix the bugs", {"id": 1})
+    index.add(SCOPE, "Postpone the marketing campaign", {"id": 2})
+
+    similarity, entry = index.lookup(SCOPE, "hiring contractors to fix bugs")
+    assert similarity >= 0.85
+    assert entry.analysis == {"id": 1}
+    assert index.lookup(SCOPE, "Cut the feature scope") is None
+    # another week or resource state never stands in
+    assert index.lookup("default:2:PRODUCT", "Hire contractors to fix the bugs") is None
+
+
+def test_index_keeps_one_entry_per_wording():
+    index = AnalysisIndex()
+    index.add("scope", "Hire contractors", {"id": 1})
+    index.add("scope", "hire contractors", {"id": 2})
+    assert len(index) == 1
+    assert index.lookup("scope", "Hire contractors")[1].analysis == {"id": 2}
+
+
+def test_negated_decisions_never_match_their_opposite():
+    index = AnalysisIndex(threshold=0.5)
+    index.add(SCOPE, "Hire contractors to fix the bugs", {"id": "hire"})
+    assert index.lookup(SCOPE, "Do not hire contractors to fix the bugs") is None
+    assert index.lookup(SCOPE, "Don't hire contractors to fix the bugs") is None
+
+    index.add(SCOPE, "Do not hire contractors to fix the bugs", {"id": "no hire"})
+    assert len(index) == 2
+    assert index.lookup(SCOPE, "do not hire contractors to fix bugs")[1].analysis == {"id": "no hire"}
+    assert index.lookup(SCOPE, "Hiring contractors to fix bugs")[1].analysis == {"id": "hire"}
+
+
+def test_document_frequencies_are_counted_per_scope():
+    index = AnalysisIndex()
+    index.add(SCOPE, "Hire contractors to fix the bugs", {"id": 1})
+    scored = index.search(SCOPE, "Hire contractors for the launch")[0][0]
+    # the same decisions indexed under other weeks leave this week's weights alone
+    for week in range(2, 20):
+        index.add(f"default:{week}:PRODUCT", "Hire contractors for the launch", {"week": week})
+    assert index.search(SCOPE, "Hire contractors for the launch")[0][0] == scored
@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pytest
+
+from scenario_catalog import get_catalog
+from trajectory import TrajectoryProjection
+
+
+@pytest.fixture
+def metrics():
+    return get_catalog().get("default").create_metrics_manager(7)
+
+
+def lines(projection, include_paths=False):
+    return [json.loads(line) for line in projection.iter_ndjson(include_paths)]
+
+
+def test_projection_is_reproducible_and_leaves_the_session_untouched(metrics):
+    first = TrajectoryProjection.from_metrics(metrics, 1, 4, {"core.revenue": 5.0}, paths=500)
+    second = TrajectoryProjection.from_metrics(metrics, 1, 4, {"core.revenue": 5.0}, paths=500)
+    assert lines(first) == lines(second)
+    assert metrics.draws == {}
+
+
+def test_untouched_metrics_stay_flat_and_touched_ones_compound(metrics):
+    projection = TrajectoryProjection(
+        base={"revenue": 100.0, "profit_margin": 15.0},
+        changes={"revenue": 10.0},
+        uncertainty={"revenue": 2.0, "profit_margin": 1.5},
+        start_week=1,
+        end_week=3,
+        paths=2000,
+        chunk_size=300
+    )
+    samples = np.concatenate(list(projection.iter_chunks()))
+    assert samples.shape == (2000, 4, 2)
+    assert np.all(samples[:, :, 1] == 15.0)
+    final = samples[:, -1, 0]
+    assert 100 * 1.08 ** 3 <= final.min() and final.max() <= 100 * 1.12 ** 3
+
+
+def test_stream_shape(metrics):
+    projection = TrajectoryProjection.from_metrics(metrics, 2, 4, {"core.revenue": 5.0}, paths=10)
+    streamed = lines(projection, include_paths=True)
+    assert [line["type"] for line in streamed] == ["projection", "paths", "week", "week", "week", "week", "final"]
+    assert [line["week"] for line in streamed if line["type"] == "week"] == [1, 2, 3, 4]
+    assert set(streamed[-1]["probability_above_start"]) == set(projection.metrics)
+
+
+@pytest.mark.parametrize("changes, extra, message", [
+    ({"department.quality_score": 5.0}, {}, "no core metric changes"),
+    ({"core.revenue": 50.0}, {}, "outside the allowed"),
+    ({"core.revenue": 5.0}, {"paths": 0}, "paths must be between"),
+    ({"core.revenue": 5.0}, {"seed": -1}, "seed must be"),
+])
+def test_invalid_policies_are_refused(metrics, changes, extra, message):
+    with pytest.raises(ValueError, match=message):
+        TrajectoryProjection.from_metrics(metrics, 1, 4, changes, **extra)
+
+
+def test_endpoint_streams_ndjson_and_rejects_bad_seeds(call_api):
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=trajectory&seed=3")
+        good = await client.post("/api/metrics/trajectory?session_id=trajectory", json={"changes": {"core.revenue": 4.0}, "paths": 50})
+        bad = await client.post("/api/metrics/trajectory?session_id=trajectory", json={"changes": {"core.revenue": 4.0}, "seed": -5})
+        return good, bad
+
+    good, bad = call_api(scenario)
+    assert good.headers["content-type"].startswith("application/x-ndjson")
+    assert json.loads(good.text.splitlines()[0])["seed"] == 3
+    assert bad.status_code == 400
@@ -0,0 +1,86 @@
+import pytest
+
+import api
+from simulation_manager import SimulationManager
+
+
+@pytest.fixture
+def revisions(monkeypatch):
+    """Each new discussion proposes the revenue change its feedback asks for, "fail" makes it error"""
+    async def run_analysis(self, week, decision, department, feedback=None, specific_recommendations=None):
+        if feedback == "fail":
+            return {"error": "agents unavailable"}
+        revenue = float(feedback) if feedback else 5.0
+        return {"discussion": [], "recommendations": {"CEO": {"core.revenue": revenue}}, "consensus": {"core.revenue": revenue}}
+
+    monkeypatch.setattr(SimulationManager, "_run_analysis", run_analysis)
+
+
+async def submitted(client, session_id, *feedback):
+    await client.post(f"/api/simulation/start?session_id={session_id}")
+    await client.post(f"/api/decisions/submit?session_id={session_id}&reuse=false", json={"content": "Hire contractors"})
+    responses = []
+    for text in feedback:
+        responses.append(await client.post(
+            f"/api/decisions/decision_1/action?session_id={session_id}",
+            json={"action": "request_new", "feedback": text}
+        ))
+    return responses
+
+
+def test_versions_are_listed_and_diffed(revisions, call_api):
+    async def scenario(client):
+        await submitted(client, "versions", "8")
+        listed = await client.get("/api/decisions/decision_1/versions?session_id=versions")
+        diff = await client.get("/api/decisions/decision_1/versions/diff?session_id=versions&from_version=1&to_version=2")
+        missing = await client.get("/api/decisions/decision_1/versions/diff?session_id=versions&from_version=1&to_version=9")
+        return listed.json(), diff.json(), missing
+
+    listed, diff, missing = call_api(scenario)
+    assert listed["current_version"] == 2
+    assert [(version["source"], version["consensus"]) for version in listed["versions"]] == [
+        ("submit", {"core.revenue": 5.0}),
+        ("request_new", {"core.revenue": 8.0}),
+    ]
+    assert diff["changed"] == {"core.revenue": {"from": 5.0, "to": 8.0, "delta": 3.0}}
+    assert missing.status_code == 404
+
+
+def test_accepting_an_earlier_version_commits_its_recommendations(revisions, call_api):
+    async def scenario(client):
+        await submitted(client, "accept-version", "8")
+        return await client.post("/api/decisions/decision_1/versions/1/accept?session_id=accept-version")
+
+    response = call_api(scenario)
+    assert response.status_code == 200
+    committed = api.simulations["accept-version"].weekly_decisions[1]
+    assert committed["recommendations_version"] == 1
+    assert committed["consensus"] == {"core.revenue": 5.0}
+
+
+def test_restoring_without_commit_keeps_the_decision_pending(revisions, call_api):
+    async def scenario(client):
+        await submitted(client, "restore-version", "8")
+        return await client.post("/api/decisions/decision_1/versions/1/accept?session_id=restore-version&commit=false")
+
+    assert call_api(scenario).json()["status"] == "restored"
+    simulation = api.simulations["restore-version"]
+    assert simulation.awaiting_action
+    assert simulation.weekly_decisions[1]["consensus"] == {"core.revenue": 5.0}
+
+
+def test_a_failed_rediscussion_keeps_the_previous_analysis(revisions, call_api):
+    async def scenario(client):
+        responses = await submitted(client, "failed-version", "8", "fail")
+        listed = await client.get("/api/decisions/decision_1/versions?session_id=failed-version")
+        return responses[-1], listed.json()
+
+    failed, listed = call_api(scenario)
+    assert failed.status_code == 400
+    assert listed["current_version"] == 2
+    assert len(listed["versions"]) == 2
+    simulation = api.simulations["failed-version"]
+    assert simulation.awaiting_action
+    assert simulation.user_decisions[0]["analysis"]["consensus"] == {"core.revenue": 8.0}
+    assert simulation.weekly_decisions[1]["consensus"] == {"core.revenue": 8.0}
+    assert simulation.weekly_decisions[1]["recommendations_version"] == 2
@@ -0,0 +1,48 @@
+import pytest
+
+from scenario_catalog import get_catalog
+
+
+@pytest.fixture
+def metrics():
+    return get_catalog().get("default").create_metrics_manager(1)
+
+
+def test_candidates_are_ranked_valid_first_then_by_score(metrics):
+    results = metrics.compare_candidates(1, "Product", [
+        {"core.revenue": 5.0},
+        {"core.revenue": 29.5},  # 29.5 ± 2 reaches past the 30% limit
+        {"core.revenue": 10.0, "department.quality_score": 5.0},
+    ])
+    assert [result["index"] for result in results] == [2, 0, 1]
+    assert [result["valid"] for result in results] == [True, True, False]
+    assert results[2]["violations"][0]["metric"] == "core.revenue"
+
+
+def test_projection_bounds_follow_the_uncertainty(metrics):
+    result = metrics.compare_candidates(1, "Product", [{"core.revenue": 10.0}])[0]
+    revenue = result["projected"]["core.revenue"]
+    assert revenue["current"] == 1000000
+    assert revenue["expected"] == pytest.approx(1100000)
+    assert (revenue["low"], revenue["high"]) == (pytest.approx(1080000), pytest.approx(1120000))
+    # metrics a candidate does not touch are not projected
+    assert list(result["projected"]) == ["core.revenue"]
+
+
+def test_comparing_draws_and_stores_nothing(metrics):
+    before = (dict(metrics.draws), dict(metrics.weekly_metrics))
+    metrics.compare_candidates(1, "Product", [{"core.revenue": 10.0}, {"core.profit_margin": 3.0}])
+    assert (metrics.draws, metrics.weekly_metrics) == before
+
+
+def test_endpoint_labels_candidates(call_api):
+    async def scenario(client):
+        await client.post("/api/simulation/start?session_id=whatif")
+        return await client.post("/api/metrics/what-if?session_id=whatif", json={
+            "candidates": [{"core.revenue": 2.0}, {"core.revenue": 8.0}],
+            "labels": ["cautious", "bold"]
+        })
+
+    response = call_api(scenario)
+    assert response.status_code == 200
+    assert [candidate["label"] for candidate in response.json()["candidates"]] == ["bold", "cautious"]
@@ -0,0 +1,158 @@
+from typing import Dict, List, Any, Iterator, Optional
+
+import numpy as np
+
+from metrics_manager import MAX_SEED, MetricsManager, valid_seed
+from serialization import dumps
+
+# spawn key namespace for projections, far above any week number so the
+# session's own (week, batch) uncertainty streams are never reused or advanced
+TRAJECTORY_STREAM = 0xFFFFFFFF
+MAX_PATHS = 100_000
+PERCENTILES = (5, 50, 95)
+
+
+class TrajectoryProjection:
+    """Monte Carlo projection of core metrics to the last week under a fixed weekly policy.
+
+    Every remaining week applies the same change set the way update_week_metrics
+    does: each metric is multiplied by 1 + change/100, with the change drawn
+    uniformly from its uncertainty range. Paths are sampled as a
+    (paths, weeks, metrics) array of weekly factors and compounded with one
+    cumulative product. Large path counts are drawn in fixed-size chunks, each
+    from its own stream spawned off the seed, so results are reproducible and
+    raw paths can be streamed as they are produced.
+    """
+
+    def __init__(
+        self,
+        base: Dict[str, float],
+        changes: Dict[str, float],
+        uncertainty: Dict[str, float],
+        start_week: int,
+        end_week: int,
+        paths: int = 1000,
+        seed: int = 0,
+        chunk_size: int = 10_000
+    ):
+        self.metrics: List[str] = list(base)
+        self.base = np.array([float(base[m]) for m in self.metrics])
+        self.requested = np.array([float(changes.get(m, 0)) for m in self.metrics])
+        # metrics the policy does not touch stay exactly where they are
+        self.spread = np.array([float(uncertainty.get(m, 0)) if m in changes else 0.0 for m in self.metrics])
+        self.changes = changes
+        self.start_week = start_week
+        self.end_week = end_week
+        self.weeks = max(0, end_week - start_week + 1)
+        self.paths = paths
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_metrics(
+        cls,
+        metrics_manager: MetricsManager,
+        week: int,
+        end_week: int,
+        changes: Dict[str, float],
+        paths: int = 1000,
+        seed: Optional[int] = None
+    ) -> "TrajectoryProjection":
+        """Build a projection from a session's metrics; raises ValueError for an invalid policy"""
+        core_changes = {
+            metric.split('.', 1)[1]: change for metric, change in changes.items() if metric.startswith("core.")
+        }
+        if not core_changes:
+            raise ValueError("Policy has no core metric changes to project")
+        if not metrics_manager.validate_changes({f"core.{m}": c for m, c in core_changes.items()}, ""):
+            raise ValueError("Policy changes are outside the allowed metric ranges")
+        if not 1 <= paths <= MAX_PATHS:
+            raise ValueError(f"paths must be between 1 and {MAX_PATHS}")
+        if seed is not None and not valid_seed(seed):
+            # checked here, the stream has already sent its 200 when sampling starts
+            raise ValueError(f"seed must be an integer from 0 to {MAX_SEED - 1}")
+
+        constraints = metrics_manager.get_metric_constraints("core")
+        return cls(
+            base=metrics_manager.get_week_metrics(week).get("core", {}),
+            changes=core_changes,
+            uncertainty={m: c.get("uncertainty_range", 0) for m, c in constraints.items()},
+            start_week=week,
+            end_week=end_week,
+            paths=paths,
+            seed=metrics_manager.seed if seed is None else seed
+        )
+
+    def sample_chunk(self, chunk: int, size: int) -> np.ndarray:
+        """Return `size` paths as a (size, weeks + 1, metrics) array, column 0 being today's values"""
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(TRAJECTORY_STREAM, chunk)))
+        draws = rng.uniform(
+            self.requested - self.spread,
+            self.requested + self.spread,
+            size=(size, self.weeks, len(self.metrics))
+        )
+        values = np.empty((size, self.weeks + 1, len(self.metrics)))
+        values[:, 0] = self.base
+        values[:, 1:] = self.base * np.cumprod(1 + draws / 100, axis=1)
+        return values
+
+    def iter_chunks(self) -> Iterator[np.ndarray]:
+        for chunk, offset in enumerate(range(0, self.paths, self.chunk_size)):
+            yield self.sample_chunk(chunk, min(self.chunk_size, self.paths - offset))
+
+    def bands(self, samples: np.ndarray) -> List[Dict[str, Any]]:
+        mean = samples.mean(axis=0)
+        quantiles = np.percentile(samples, PERCENTILES, axis=0)
+        weeks = []
+        for step in range(self.weeks + 1):
+            metrics = {}
+            for col, metric in enumerate(self.metrics):
+                band = {"mean": float(mean[step, col])}
+                for p, q in zip(PERCENTILES, quantiles):
+                    band[f"p{p}"] = float(q[step, col])
+                metrics[metric] = band
+            # step 0 is the start of the current week, step n the end of week start_week + n - 1
+            weeks.append({"week": self.start_week + step - 1, "metrics": metrics})
+        return weeks
+
+    def iter_ndjson(self, include_paths: bool = False) -> Iterator[bytes]:
+        """Stream the projection as newline-delimited JSON.
+
+        The first line describes the run, raw paths follow chunk by chunk when
+        requested, then one line per week with mean and percentile bands and a
+        final line with the chance of ending above today's value.
+        """
+        yield dumps({
+            "type": "projection",
+            "start_week": self.start_week,
+            "end_week": self.end_week,
+            "paths": self.paths,
+            "seed": self.seed,
+            "policy": {f"core.{m}": c for m, c in self.changes.items()},
+            "metrics": self.metrics,
+            "percentiles": list(PERCENTILES)
+        }) + b"\n"
+
+        chunks = []
+        offset = 0
+        for values in self.iter_chunks():
+            chunks.append(values)
+            if include_paths:
+                yield dumps({
+                    "type": "paths",
+                    "offset": offset,
+                    "values": {metric: np.round(values[:, :, col], 4) for col, metric in enumerate(self.metrics)}
+                }) + b"\n"
+            offset += len(values)
+
+        samples = np.concatenate(chunks)
+        for week in self.bands(samples):
+            yield dumps({"type": "week", **week}) + b"\n"
+
+        final = samples[:, -1]
+        yield dumps({
+            "type": "final",
+            "probability_above_start": {
+                metric: float((final[:, col] > self.base[col]).mean()) for col, metric in enumerate(self.metrics)
+            }
+        }) + b"\n"